@@ -0,0 +1,103 @@
+"""Compares ContainsComponentsQuery against the previous entity storage
+
+Before archetypes, entities were kept in a dict and each held a dict of
+its components, a query checked every entity. That storage and query are
+reproduced here so the comparison is against what the game actually ran.
+
+Run from the repository root:
+    python -m benchmarks.query_benchmark
+"""
+import timeit
+import uuid
+from typing import Dict, List
+import pygame
+from redpanda.ecs.core import Component, ContainsComponentsQuery, World
+
+
+ENTITY_COUNTS = [1_000, 10_000, 100_000]
+REPEAT = 5
+
+
+class BenchComponent(Component):
+    def __init__(self, name: str) -> None:
+        super().__init__(name)
+
+
+class BaselineEntity(pygame.sprite.Sprite):
+    """Previous Entity, a sprite with a dict of components"""
+    def __init__(self, component_list: List[Component]) -> None:
+        super().__init__()
+        self._id = uuid.uuid4()
+        self._components: Dict[str, Component] = {}
+        for component in component_list:
+            self._components[component.name] = component
+
+    @property
+    def id(self):
+        return self._id
+
+    @property
+    def components(self) -> Dict[str, Component]:
+        return self._components
+
+
+class BaselineEntities():
+    """Previous Entities, a dict of entities by id"""
+    def __init__(self) -> None:
+        self._entities: Dict[uuid.UUID, BaselineEntity] = {}
+
+    @property
+    def entities(self) -> Dict[uuid.UUID, BaselineEntity]:
+        return self._entities
+
+    def alloc(self, component_list: List[Component]) -> BaselineEntity:
+        entity = BaselineEntity(component_list)
+        self._entities[entity.id] = entity
+        return entity
+
+
+def baseline_query(entities: BaselineEntities, *components: str) -> List[BaselineEntity]:
+    """Previous ContainsComponentsQuery.execute"""
+    matching_entities: List[BaselineEntity] = []
+    for entity in entities.entities.values():
+        if all(component in entity.components.keys() for component in components):
+            matching_entities.append(entity)
+    return matching_entities
+
+
+def component_mix(count: int) -> List[List[Component]]:
+    """Components of a mix of entities, a quarter of them match the query"""
+    mix = []
+    for index in range(count):
+        components = [BenchComponent('location'), BenchComponent('direction')]
+        if index % 2:
+            components.append(BenchComponent('sprite'))
+        if index % 4 == 1:
+            components.append(BenchComponent('movement'))
+        mix.append(components)
+    return mix
+
+
+def main() -> None:
+    names = ('location', 'sprite', 'movement')
+    print(f'{"entities":>10} {"matches":>8} {"baseline ms":>12} {"cached ms":>10} {"speedup":>8}')
+    for count in ENTITY_COUNTS:
+        world = World.default()
+        baseline = BaselineEntities()
+        for components in component_mix(count):
+            world.spawn(components)
+            baseline.alloc(list(components))
+        query = world.register_query(ContainsComponentsQuery(*names))
+        matches = len(world.query(query))
+        assert matches == len(baseline_query(baseline, *names))
+
+        number = max(1, 100_000 // count)
+        scan = min(timeit.repeat(lambda: baseline_query(baseline, *names),
+                                 number=number, repeat=REPEAT)) / number
+        cached = min(timeit.repeat(lambda: world.query(query),
+                                   number=number, repeat=REPEAT)) / number
+        print(f'{count:>10} {matches:>8} {scan * 1000:>12.3f} {cached * 1000:>10.3f} {scan / cached:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,280 @@
+"""Microbenchmarks of the ECS hot paths with synthetic entities
+
+Runs headless, every benchmark is run at each entity count and reported as
+entities processed per second. Results can be written as JSON and compared
+against a saved baseline, the exit code is 1 when any benchmark is slower
+than the baseline by more than the threshold.
+
+Run from the repository root:
+    python -m benchmarks.suite --output results.json
+    python -m benchmarks.suite --baseline baseline.json --threshold 0.2
+    python -m benchmarks.suite --sizes 1000 --only movement animation
+"""
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import argparse
+import json
+import logging
+import platform
+import random
+import sys
+import timeit
+from typing import Callable, Dict, List, Optional
+import pygame
+from pygame.math import Vector3
+from pygame.rect import Rect
+from redpanda.ecs.core import App, Area, ContainsComponentsQuery, EventUpdate, Resources, Stage, System, World
+from redpanda.ecs.components import (AnimationComponent, DirectionComponent,
+                                     LocationComponent, MovementComponent,
+                                     SoundEffectsComponent, SpeedComponent,
+                                     SpriteComponent, VelocityComponent)
+from redpanda.ecs.pygame_plugin import PygamePlugin, ResourceTypes
+from redpanda.ecs.spatial import UniformGrid
+from redpanda.ecs.systems.animation import SpriteAnimation
+from redpanda.ecs.systems.collision import EntityCollision
+from redpanda.ecs.systems.movement import EntityMovement
+from redpanda.ecs.systems.sound import SoundEffects
+from redpanda.ecs.types import Direction, PyScrollMap, SoundEffect, Timer
+from redpanda.sprite import Sprite, SpriteAnimation as SpriteFrames, SpriteAnimationSet
+from redpanda.timerregistery import TimerRegistry
+
+
+ENTITY_COUNTS = [1_000, 10_000, 100_000]
+REPEAT = 5
+DEFAULT_THRESHOLD = 0.2
+AREA = 'bench'
+MAP_SIZE = 4096
+WALL_COUNT = 400
+FRAME_TIME = 16  # milliseconds
+
+# benchmark(count) returns the callable to time, it processes count entities per call
+Benchmark = Callable[[int], Callable[[], None]]
+
+
+def make_sprite(width: int = 16, height: int = 24) -> Sprite:
+    frames = [pygame.Surface((width, height)) for _ in range(4)]
+    animation_sets = [SpriteAnimationSet(str(action), [SpriteFrames(frames) for _ in Direction])
+                      for action in range(4)]
+    return Sprite('bench', animation_sets)
+
+
+def make_walls(count: int = WALL_COUNT) -> List[Rect]:
+    rng = random.Random(count)
+    return [Rect(rng.randrange(MAP_SIZE), rng.randrange(MAP_SIZE), rng.randrange(8, 64), rng.randrange(8, 64))
+            for _ in range(count)]
+
+
+def make_world() -> World:
+    world = World.default()
+    area = Area(AREA, 'bench.tmx')
+    walls = make_walls()
+    area._map = PyScrollMap(None, None, None, pygame.sprite.Group(), walls, UniformGrid(walls))
+    world.add_area(area)
+    world.enter_area(AREA)
+    return world
+
+
+def populate(world: World, count: int) -> None:
+    """Spawn count moving, animated entities spread over the map"""
+    rng = random.Random(count)
+    sprite = make_sprite()
+    for index in range(count):
+        movement = MovementComponent()
+        if index % 2:
+            movement.value = Vector3(rng.choice((-1, 1)), 0, 0)
+        sound_effects = SoundEffectsComponent()
+        # large timeout, triggers are evaluated but nothing is played
+        sound_effects.add('step', SoundEffect('step', 'step', ['movement', 'timer'], Timer(timeout=1e12)))
+        world.spawn([LocationComponent(AREA, Vector3(rng.randrange(MAP_SIZE), rng.randrange(MAP_SIZE), 0)),
+                     DirectionComponent(Direction(index % 4)),
+                     VelocityComponent(),
+                     SpeedComponent(Vector3(100, 100, 0)),
+                     movement,
+                     SpriteComponent(sprite),
+                     AnimationComponent(),
+                     sound_effects])
+
+
+def make_resources() -> Resources:
+    resources = Resources()
+    resources[ResourceTypes.GAME_TIME_ELAPSED] = FRAME_TIME
+    return resources
+
+
+def make_stage(world: World, resources: Resources, *systems: System) -> Stage:
+    """A stage running the systems through the executor, so change ticks
+    and Changed/Added filters behave as in a game. Events are updated each
+    frame so the channels do not keep growing."""
+    stage = Stage('bench')
+    stage.add_system(EventUpdate())
+    for system in systems:
+        stage.add_system(system)
+    stage.initialize(world, resources)
+    return stage
+
+
+def system_benchmark(system_type: Callable[[], System]) -> Benchmark:
+    """Times one frame of a new system_type() in steady state, the first
+    frame, where change filters match every entity, is not timed"""
+    def benchmark(count: int) -> Callable[[], None]:
+        world = make_world()
+        populate(world, count)
+        resources = make_resources()
+        stage = make_stage(world, resources, system_type())
+        stage.run(world, resources)
+        return lambda: stage.run(world, resources)
+    return benchmark
+
+
+def bench_spawn(count: int) -> Callable[[], None]:
+    sprite = make_sprite()
+
+    def spawn() -> None:
+        world = World.default()
+        for _ in range(count):
+            world.spawn([LocationComponent(AREA, Vector3(0, 0, 0)),
+                         DirectionComponent(),
+                         VelocityComponent(),
+                         SpeedComponent(Vector3(100, 100, 0)),
+                         MovementComponent(),
+                         SpriteComponent(sprite),
+                         AnimationComponent()])
+    return spawn
+
+
+def bench_query(count: int) -> Callable[[], None]:
+    world = make_world()
+    populate(world, count)
+    query = world.register_query(ContainsComponentsQuery('location', 'sprite', 'movement'))
+    return lambda: world.query(query)
+
+
+def find_system(app: App, name: str) -> System:
+    """Pull a system out of the schedule, for systems that are only defined inside a plugin"""
+    for stage in app.schedule._stages.values():
+        for system in stage._systems:
+            if system.name == name:
+                return system
+    raise ValueError(f'No system named {name}')
+
+
+def bench_timers(count: int) -> Callable[[], None]:
+    app = App.build().add_plugin(PygamePlugin(headless=True)).app
+    timers = find_system(app, 'Timers')
+    registry = TimerRegistry()
+    for index in range(count):
+        registry.create(timeout=1000 + index)
+    resources = make_resources()
+    resources[ResourceTypes.SYS_TIMERS] = registry
+    world = World.default()
+    stage = make_stage(world, resources, timers)
+
+    def advance() -> None:
+        stage.run(world, resources)
+        # Re-arm what fired like a game would, the heap never runs dry
+        for handle in registry.drain_fired():
+            registry.reset(handle)
+    return advance
+
+
+def bench_collide_check(count: int) -> Callable[[], None]:
+    world = make_world()
+    rng = random.Random(count)
+    rects = [Rect(rng.randrange(MAP_SIZE), rng.randrange(MAP_SIZE), 16, 8) for _ in range(count)]
+
+    def collide() -> None:
+        collide_check = world.collide_check
+        for rect in rects:
+            collide_check(rect)
+    return collide
+
+
+BENCHMARKS: Dict[str, Benchmark] = {
+    'spawn': bench_spawn,
+    'query': bench_query,
+    'movement': system_benchmark(EntityMovement),
+    'animation': system_benchmark(SpriteAnimation),
+    'sound_triggers': system_benchmark(SoundEffects),
+    'entity_collision': system_benchmark(EntityCollision),
+    'timers': bench_timers,
+    'collide_check': bench_collide_check,
+}
+
+
+def measure(function: Callable[[], None], repeat: int = REPEAT) -> float:
+    """Best time of one call in seconds"""
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()  # enough calls to take at least 0.2 seconds
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def run(names: List[str], sizes: List[int], repeat: int = REPEAT) -> Dict:
+    results: Dict[str, Dict] = {}
+    print(f'{"benchmark":>16} {"entities":>9} {"ms/call":>10} {"entities/s":>14}')
+    for name in names:
+        for count in sizes:
+            seconds = measure(BENCHMARKS[name](count), repeat)
+            ops = count / seconds
+            results[f'{name}@{count}'] = {'benchmark': name,
+                                          'entities': count,
+                                          'seconds': seconds,
+                                          'ops_per_second': ops}
+            print(f'{name:>16} {count:>9} {seconds * 1000:>10.3f} {ops:>14,.0f}')
+    return {'machine': {'python': platform.python_version(),
+                        'implementation': platform.python_implementation(),
+                        'platform': platform.platform(),
+                        'pygame': pygame.version.ver},
+            'results': results}
+
+
+def compare(results: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """Returns a line for each benchmark whose throughput dropped by more
+    than threshold (0.2 = 20%) against the baseline"""
+    regressions: List[str] = []
+    print(f'{"benchmark":>26} {"baseline/s":>14} {"current/s":>14} {"change":>8}')
+    for key, result in results['results'].items():
+        previous = baseline['results'].get(key)
+        if previous is None:
+            continue
+        change = result['ops_per_second'] / previous['ops_per_second'] - 1
+        flag = ''
+        if change < -threshold:
+            flag = ' REGRESSION'
+            regressions.append(f'{key}: {change:+.1%}')
+        print(f'{key:>26} {previous["ops_per_second"]:>14,.0f} {result["ops_per_second"]:>14,.0f} {change:>+8.1%}{flag}')
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=ENTITY_COUNTS)
+    parser.add_argument('--only', nargs='+', choices=list(BENCHMARKS), default=list(BENCHMARKS))
+    parser.add_argument('--repeat', type=int, default=REPEAT)
+    parser.add_argument('--output', help='write results as JSON')
+    parser.add_argument('--baseline', help='JSON results to compare against')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='allowed throughput drop against the baseline, 0.2 = 20%%')
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.INFO)
+    pygame.init()
+    pygame.display.set_mode((1, 1))
+
+    results = run(args.only, args.sizes, args.repeat)
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            json.dump(results, output_file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            regressions = compare(results, json.load(baseline_file), args.threshold)
+        if regressions:
+            print('Throughput regressions:\n\t' + '\n\t'.join(regressions))
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
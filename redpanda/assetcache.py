@@ -0,0 +1,127 @@
+from typing import Any, Callable, Dict, Optional, Tuple, TypeVar
+import hashlib
+import os
+import pickle
+import threading
+import redpanda.logging
+
+
+logger = redpanda.logging.get_logger('assets.cache')
+
+
+# Bump when the layout of the cached objects changes
+CACHE_FORMAT_VERSION = 1
+
+T = TypeVar('T')
+
+
+def file_digest(filename: str) -> bytes:
+    with open(filename, 'rb') as source:
+        return hashlib.blake2b(source.read(), digest_size=16).digest()
+
+
+class CompiledAssetCache():
+    """Parsed asset files kept in a binary cache file between runs.
+
+    Every source file has its own entry holding the parsed result, so only
+    changed files are parsed again. An entry is used when the size and
+    modification time of the file match, otherwise the content hash is
+    compared so touched but unchanged files are not parsed again.
+
+    Parsers take the cache as an optional argument, call save once all
+    assets are parsed. Files can be loaded from several threads.
+    """
+    def __init__(self, cache_filename: str) -> None:
+        self._cache_filename: str = cache_filename
+        # source filename -> (mtime_ns, size, digest, parsed)
+        self._entries: Dict[str, Tuple[int, int, bytes, Any]] = {}
+        self._dirty: bool = False
+        self._hits: int = 0
+        self._misses: int = 0
+        self._lock = threading.Lock()
+        self._read()
+
+    def __str__(self) -> str:
+        return f'CompiledAssetCache: {self._cache_filename} {len(self._entries)} files hits: {self._hits} misses: {self._misses}'
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def hits(self) -> int:
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        return self._misses
+
+    def _read(self) -> None:
+        try:
+            with open(self._cache_filename, 'rb') as cache_file:
+                version, entries = pickle.load(cache_file)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            # A corrupt or foreign cache file is rebuilt
+            logger.warning(f'Ignoring asset cache {self._cache_filename}: {e}')
+            return
+        if version != CACHE_FORMAT_VERSION:
+            logger.info(f'Asset cache {self._cache_filename} is version {version}, rebuilding')
+            return
+        self._entries = entries
+
+    def load(self, filename: str, parse: Callable[[str], T]) -> T:
+        """Returns the cached result for the file, calling parse(filename)
+        when the file changed since it was cached"""
+        key = os.path.abspath(filename)
+        stat = os.stat(key)
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None:
+            mtime_ns, size, digest, parsed = entry
+            if mtime_ns == stat.st_mtime_ns and size == stat.st_size:
+                with self._lock:
+                    self._hits += 1
+                return parsed
+            if size == stat.st_size and digest == file_digest(key):
+                with self._lock:
+                    self._entries[key] = (stat.st_mtime_ns, size, digest, parsed)
+                    self._dirty = True
+                    self._hits += 1
+                return parsed
+        # parsed outside the lock, other files are loaded meanwhile
+        parsed = parse(filename)
+        digest = file_digest(key)
+        with self._lock:
+            self._misses += 1
+            self._entries[key] = (stat.st_mtime_ns, stat.st_size, digest, parsed)
+            self._dirty = True
+        return parsed
+
+    def save(self) -> None:
+        """Write the cache file when anything changed"""
+        with self._lock:
+            if not self._dirty:
+                return
+            entries = dict(self._entries)
+            self._dirty = False
+        directory = os.path.dirname(os.path.abspath(self._cache_filename))
+        os.makedirs(directory, exist_ok=True)
+        temp_filename = f'{self._cache_filename}.tmp'
+        with open(temp_filename, 'wb') as cache_file:
+            pickle.dump((CACHE_FORMAT_VERSION, entries), cache_file, protocol=pickle.HIGHEST_PROTOCOL)
+        # Readers never see a partly written cache
+        os.replace(temp_filename, self._cache_filename)
+        logger.info(str(self))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._dirty = True
+
+
+def cached(cache: Optional[CompiledAssetCache], filename: str, parse: Callable[[str], T]) -> T:
+    """Parse through the cache when there is one"""
+    if cache is None:
+        return parse(filename)
+    return cache.load(filename, parse)
@@ -3,9 +3,16 @@ from redpanda.template.worldtemplate import WorldTemplate
 from redpanda.parser.worldparser import WorldTemplateParser  # python 3.10
 import yaml
 import os
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+import pygame
+from redpanda.assetcache import CompiledAssetCache, cached
+from redpanda.atlas import TextureAtlas, build_collection_atlas
+from redpanda.spriteloader import ImageCache, image_cache
 from redpanda.spritesheet import SpriteSheetMetaData, SpriteSheetParser
 from redpanda.sounds import SoundData
-from typing import Union
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 import redpanda.logging
 
 logger = redpanda.logging.get_logger('registry.Asset')
@@ -13,6 +20,7 @@ logger = redpanda.logging.get_logger('registry.Asset')
 class AssetRegistry():
     def __init__(self) -> None:
         self._db: dict[str, Union[SpriteSheetMetaData, SoundData, WorldTemplate]] = {}
+        self._atlas: Optional[TextureAtlas] = None
 
     def __str__(self) -> str:
        return f'{str(self._db)}'
@@ -31,6 +39,15 @@ class AssetRegistry():
     def add_spritesheet(self, name: str, meta: SpriteSheetMetaData) -> None:
         # TODO consider handling adding twice
         self._db[name] = meta
+        self._atlas = None
+
+    def atlas(self) -> TextureAtlas:
+        """Frames of all spritesheet-collection spritesheets packed into an
+        atlas, built on first use as it needs the display to be set up"""
+        if self._atlas is None:
+            self._atlas = build_collection_atlas(data for data in self._db.values()
+                                                 if isinstance(data, SpriteSheetMetaData))
+        return self._atlas
 
     def sound(self, name: str) -> SoundData:
         if name in self._db:
@@ -45,6 +62,9 @@ class AssetRegistry():
         # TODO consider converting this to just Metadata
         self._db[name] = SoundData(name, sound_filename)
 
+    def add_sound_data(self, sound: SoundData) -> None:
+        self._db[sound.name] = sound
+
     def world(self) -> WorldTemplate:
         name = 'world'
         if name in self._db:
@@ -59,38 +79,153 @@ class AssetRegistry():
         self._db['world'] = template
 
 
+def _load_yaml(filename: str):
+    with open(filename) as yaml_file:
+        return yaml.load(yaml_file, Loader=yaml.FullLoader)
+
+
+@dataclass
+class AssetLoadTiming():
+    kind: str  # sprite, image, sound or world
+    name: str
+    seconds: float
+
+
+# Called on the parsing thread with (done, total, timing) after every asset
+ProgressCallback = Callable[[int, int, AssetLoadTiming], None]
+
+# (kind, name, load)
+_Task = Tuple[str, str, Callable[[], Any]]
+
+
+def _timed(task: _Task) -> Tuple[AssetLoadTiming, Any]:
+    kind, name, load = task
+    start = time.perf_counter()
+    result = load()
+    return AssetLoadTiming(kind, name, time.perf_counter() - start), result
+
+
 class AssetRegistryParser():  # TODO Move this
-    def __init__(self, yaml_dir: str) -> None:
+    """Parses the asset list, with a cache only changed files are parsed again.
+
+    With workers the sprite, sound and world files are loaded on a thread
+    pool, and the images of the sprite sheets are decoded there too. The
+    decoded images are converted on the parsing thread and put in the
+    image cache, which needs the display to be set up, without one they
+    are left to be loaded on first use.
+    """
+    def __init__(self,
+                 yaml_dir: str,
+                 cache: Optional[CompiledAssetCache] = None,
+                 workers: int = 0,
+                 progress: Optional[ProgressCallback] = None,
+                 images: Optional[ImageCache] = None) -> None:
         self._registry: AssetRegistry = AssetRegistry()
         self._yaml_dir: str = yaml_dir
+        self._cache: Optional[CompiledAssetCache] = cache
+        self._workers: int = workers
+        self._progress: Optional[ProgressCallback] = progress
+        self._images: ImageCache = images if images is not None else image_cache
+        self._timings: List[AssetLoadTiming] = []
+
+    @property
+    def timings(self) -> List[AssetLoadTiming]:
+        """Time taken by every asset, in order of completion"""
+        return self._timings
+
+    def _parse_sprite(self, sprites_dir: str, yaml_filename: str) -> SpriteSheetMetaData:
+        return cached(self._cache,
+                      os.path.join(sprites_dir, yaml_filename),
+                      lambda _: SpriteSheetParser().parse(sprites_dir, yaml_filename).meta())
+
+    def _parse_world(self, world_filename: str) -> WorldTemplate:
+        return cached(self._cache,
+                      os.path.join(self._yaml_dir, world_filename),
+                      lambda _: WorldTemplateParser(self._yaml_dir).parse(world_filename).build())
 
     def parse(self, meta_filename: str) -> AssetRegistryParser:
         # load yaml meta file
         meta_filename = os.path.join(self._yaml_dir, meta_filename)
         try:
-            with open(meta_filename) as meta_file:
-                data = yaml.load(meta_file, Loader=yaml.FullLoader)
-                if data.get('type') != 'asset-list':
-                    raise ValueError(f'{data.get("type")} is not of type resource')
-                if 'sprites' in data:
-                    logger.info('Assets: Parsing Sprites')
-                    for name, yaml_filename in data['sprites'].items():
-                        meta = SpriteSheetParser().parse(os.path.join(self._yaml_dir, 'sprites'), yaml_filename).meta()  # TODO fix this
-                        self._registry.add_spritesheet(meta.name, meta)
-                if 'sounds' in data:
-                    logger.info('Assets: Parsing Sounds')
-                    for name, sound_filename in data['sounds'].items():
-                        self._registry.add_sound(name, os.path.join(self._yaml_dir, 'sounds', sound_filename))  # TODO fix this
-                if 'world' in data:
-                    logger.info('Assets: Parsing World')
-                    world_filename = data['world']
-                    world = WorldTemplateParser(self._yaml_dir).parse(world_filename).build()
-                    self._registry.add_world(world)
+            data = cached(self._cache, meta_filename, _load_yaml)
+            if data.get('type') != 'asset-list':
+                raise ValueError(f'{data.get("type")} is not of type resource')
+            tasks: List[_Task] = []
+            if 'sprites' in data:
+                sprites_dir = os.path.join(self._yaml_dir, 'sprites')  # TODO fix this
+                for name, yaml_filename in data['sprites'].items():
+                    tasks.append(('sprite', name, lambda yaml_filename=yaml_filename: self._parse_sprite(sprites_dir, yaml_filename)))
+            if 'sounds' in data:
+                for name, sound_filename in data['sounds'].items():
+                    sound_filename = os.path.join(self._yaml_dir, 'sounds', sound_filename)  # TODO fix this
+                    tasks.append(('sound', name, lambda name=name, sound_filename=sound_filename: SoundData(name, sound_filename)))
+            if 'world' in data:
+                tasks.append(('world', 'world', lambda: self._parse_world(data['world'])))
+
+            logger.info(f'Assets: Loading {len(tasks)} assets with {self._workers} workers')
+            start = time.perf_counter()
+            if self._workers > 0:
+                results = self._load_parallel(tasks)
+            else:
+                results = self._load(tasks)
+            for (kind, _, _), result in zip(tasks, results):
+                # Added in the order of the asset list whatever order they finished in
+                if kind == 'sprite':
+                    self._registry.add_spritesheet(result.name, result)
+                elif kind == 'sound':
+                    self._registry.add_sound_data(result)
+                elif kind == 'world':
+                    self._registry.add_world(result)
+            logger.info(f'Assets: Loaded {len(self._timings)} assets in {time.perf_counter() - start:.3f}s')
+            for timing in sorted(self._timings, key=lambda timing: timing.seconds, reverse=True)[:5]:
+                logger.debug(f'Assets: {timing.kind} {timing.name} {timing.seconds * 1000:.1f}ms')
         except yaml.YAMLError:
             logger.error('Unable to load assets metadata')
             raise
         return self
 
+    def _completed(self, timing: AssetLoadTiming, total: int) -> None:
+        self._timings.append(timing)
+        if self._progress is not None:
+            self._progress(len(self._timings), total, timing)
+
+    def _load(self, tasks: List[_Task]) -> List[Any]:
+        results = []
+        for task in tasks:
+            timing, result = _timed(task)
+            self._completed(timing, len(tasks))
+            results.append(result)
+        return results
+
+    def _load_parallel(self, tasks: List[_Task]) -> List[Any]:
+        results: List[Any] = [None] * len(tasks)
+        convert = pygame.display.get_surface() is not None
+        decoding = set()
+        total = len(tasks)
+        with ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix='asset-loader') as pool:
+            # future -> index of the task or filename of the image
+            pending: Dict[Future, Union[int, str]] = {pool.submit(_timed, task): index
+                                                      for index, task in enumerate(tasks)}
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    item = pending.pop(future)
+                    timing, result = future.result()
+                    if isinstance(item, str):
+                        # pygame surfaces can only be converted on the display thread
+                        self._images.add(item, result.convert_alpha())
+                    else:
+                        results[item] = result
+                        if timing.kind == 'sprite' and convert:
+                            for filename in result.filenames():
+                                if filename not in decoding and filename not in self._images:
+                                    decoding.add(filename)
+                                    total += 1
+                                    task = ('image', filename, lambda filename=filename: pygame.image.load(filename))
+                                    pending[pool.submit(_timed, task)] = filename
+                    self._completed(timing, total)
+        return results
+
     def build(self) -> AssetRegistry:
         registry = self._registry
         self._registry = AssetRegistry()
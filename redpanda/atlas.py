@@ -0,0 +1,140 @@
+from typing import TYPE_CHECKING, Dict, Hashable, Iterable, List, Optional, Tuple
+import pygame
+from redpanda.ecs.types import Animation, Direction
+from redpanda.spritesheet import SpriteSheetMetaData
+import redpanda.logging
+if TYPE_CHECKING:
+    from redpanda.spriteloader import ImageCache
+
+
+logger = redpanda.logging.get_logger('sprite.atlas')
+
+
+DEFAULT_PAGE_SIZE = (1024, 1024)
+
+
+def pack(sizes: Dict[Hashable, Tuple[int, int]],
+         page_size: Tuple[int, int] = DEFAULT_PAGE_SIZE,
+         padding: int = 1) -> Tuple[Dict[Hashable, Tuple[int, pygame.Rect]], List[Tuple[int, int]]]:
+    """Shelf bin packing, next fit with decreasing height.
+
+    Returns where each key goes as (page index, rect) and the size each
+    page needs. Images larger than a page get a page of their own.
+    """
+    page_width, page_height = page_size
+    placements: Dict[Hashable, Tuple[int, pygame.Rect]] = {}
+    pages: List[Tuple[int, int]] = []
+    order = sorted(sizes, key=lambda key: (sizes[key][1], sizes[key][0]), reverse=True)
+    x = y = shelf_height = used_width = 0
+    page = -1
+    for key in order:
+        width, height = sizes[key]
+        if width > page_width or height > page_height:
+            pages.append((width, height))
+            placements[key] = (len(pages) - 1, pygame.Rect(0, 0, width, height))
+            continue
+        if page < 0 or x + width > page_width:
+            # next shelf
+            x = 0
+            y += shelf_height + padding if shelf_height else 0
+            shelf_height = 0
+        if page < 0 or y + height > page_height:
+            # next page
+            page = len(pages)
+            pages.append((0, 0))
+            x = y = shelf_height = used_width = 0
+        placements[key] = (page, pygame.Rect(x, y, width, height))
+        x += width + padding
+        shelf_height = max(shelf_height, height)
+        used_width = max(used_width, x - padding)
+        pages[page] = (used_width, max(pages[page][1], y + height))
+    return placements, pages
+
+
+class TextureAtlas():
+    """Many small images packed into a few large page surfaces.
+
+    region returns the page and the rect an image was packed to, image
+    returns it as a subsurface of its page. Pages are trimmed to the
+    space they use.
+    """
+    def __init__(self, pages: List[pygame.Surface], regions: Dict[Hashable, Tuple[int, pygame.Rect]]) -> None:
+        self._pages: List[pygame.Surface] = pages
+        self._regions: Dict[Hashable, Tuple[int, pygame.Rect]] = regions
+
+    def __str__(self) -> str:
+        return f'TextureAtlas: {len(self._regions)} images on {len(self._pages)} pages'
+
+    def __len__(self) -> int:
+        return len(self._regions)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._regions
+
+    @property
+    def pages(self) -> List[pygame.Surface]:
+        return self._pages
+
+    def region(self, key: Hashable) -> Optional[Tuple[pygame.Surface, pygame.Rect]]:
+        region = self._regions.get(key)
+        if region is None:
+            return None
+        return self._pages[region[0]], region[1]
+
+    def image(self, key: Hashable) -> pygame.Surface:
+        page, rect = self.region(key)
+        return page.subsurface(rect)
+
+    @staticmethod
+    def build(images: Dict[Hashable, pygame.Surface],
+              page_size: Tuple[int, int] = DEFAULT_PAGE_SIZE,
+              padding: int = 1) -> 'TextureAtlas':
+        """Pack images, the images are copied onto the pages"""
+        placements, page_sizes = pack({key: image.get_size() for key, image in images.items()},
+                                      page_size,
+                                      padding)
+        pages = [pygame.Surface(size, pygame.SRCALPHA).convert_alpha() for size in page_sizes]
+        for page in pages:
+            page.fill((0, 0, 0, 0))
+        for key, (page, rect) in placements.items():
+            pages[page].blit(images[key], rect)
+        return TextureAtlas(pages, placements)
+
+
+def collection_filenames(metas: Iterable[SpriteSheetMetaData]) -> List[str]:
+    """Image files of spritesheet-collection frames, each file used as a whole frame"""
+    filenames: Dict[str, None] = {}
+    for meta in metas:
+        for entry in Animation:
+            animation_set = meta.animation_set(entry.name)
+            if animation_set is None:
+                continue
+            for direction in Direction:
+                for frame in animation_set.direction(direction.value).frames:
+                    if frame.rect is None:
+                        filenames[frame.filename] = None
+    return list(filenames)
+
+
+def build_collection_atlas(metas: Iterable[SpriteSheetMetaData],
+                           page_size: Tuple[int, int] = DEFAULT_PAGE_SIZE,
+                           padding: int = 1,
+                           cache: Optional['ImageCache'] = None) -> TextureAtlas:
+    """Pack the frames of all spritesheet-collection sprites into an atlas
+    keyed by frame filename.
+
+    Frames come from the image cache, those decoded while parsing the
+    assets are not decoded again. The pages hold copies, the cache may
+    evict the frames afterwards."""
+    if cache is None:
+        from redpanda.spriteloader import image_cache as cache
+    images: Dict[str, pygame.Surface] = {}
+    for filename in collection_filenames(metas):
+        try:
+            images[filename] = cache.load(filename)
+        except pygame.error as message:
+            logger.error(f'Unable to load sprite frame: {filename}')
+            raise SystemExit from message
+    atlas = TextureAtlas.build(images, page_size, padding)
+    logger.info(str(atlas))
+    return atlas
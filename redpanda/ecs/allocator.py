@@ -0,0 +1,70 @@
+from typing import List
+
+
+# Handle layout: generation in the high bits, slot index in the low 32 bits
+INDEX_BITS = 32
+INDEX_MASK = (1 << INDEX_BITS) - 1
+
+
+def make_handle(index: int, generation: int) -> int:
+    """Pack a slot index and its generation into one integer handle"""
+    return (generation << INDEX_BITS) | index
+
+
+def handle_index(handle: int) -> int:
+    """Returns the slot index of a handle"""
+    return handle & INDEX_MASK
+
+
+def handle_generation(handle: int) -> int:
+    """Returns the generation of a handle"""
+    return handle >> INDEX_BITS
+
+
+class EntityAllocator():
+    """Issues generational integer handles for entities.
+
+    Freed slots are recycled. Every time a slot is freed its generation is
+    bumped, so handles issued for the previous occupant are detected as stale.
+    """
+    __slots__ = ['_generations', '_alive', '_free']
+
+    def __init__(self) -> None:
+        self._generations: List[int] = []
+        self._alive = bytearray()
+        self._free: List[int] = []
+
+    def __len__(self) -> int:
+        """Number of live handles"""
+        return len(self._generations) - len(self._free)
+
+    @property
+    def capacity(self) -> int:
+        """Number of slots ever allocated"""
+        return len(self._generations)
+
+    def alloc(self) -> int:
+        """Returns a new handle, reusing a free slot when there is one"""
+        if self._free:
+            index = self._free.pop()
+            self._alive[index] = 1
+            return make_handle(index, self._generations[index])
+        self._generations.append(0)
+        self._alive.append(1)
+        return len(self._generations) - 1
+
+    def free(self, handle: int) -> None:
+        """Release a handle so its slot can be reused"""
+        if not self.is_alive(handle):
+            raise ValueError(f'Stale entity handle {handle_index(handle)}v{handle_generation(handle)}')
+        index = handle & INDEX_MASK
+        self._generations[index] += 1
+        self._alive[index] = 0
+        self._free.append(index)
+
+    def is_alive(self, handle: int) -> bool:
+        """Test if handle refers to the current occupant of its slot"""
+        index = handle & INDEX_MASK
+        return (index < len(self._generations)
+                and self._alive[index] == 1
+                and self._generations[index] == handle >> INDEX_BITS)
@@ -3,6 +3,7 @@ from pygame import Rect
 from pygame.math import Vector3
 from redpanda.ecs.core import Component
 from redpanda.sprite import Sprite
+from redpanda.spriteloader import SpriteCache
 from redpanda.ecs.types import Animation, Direction, SoundEffect
 
 
@@ -17,7 +18,9 @@ class DirectionComponent(Component):
 
     @value.setter
     def value(self, direction: Direction) -> None:
-        self._value = direction
+        if direction != self._value:
+            self._value = direction
+            self._changed()
 
 
 class LocationComponent(Component):
@@ -34,7 +37,9 @@ class LocationComponent(Component):
     @area.setter
     def area(self, new_area: str) -> None:
         # TODO enforce position change here as well?
-        self._area = new_area
+        if new_area != self._area:
+            self._area = new_area
+            self._mark_changed()
 
     @property
     def position(self) -> Vector3:
@@ -42,8 +47,10 @@ class LocationComponent(Component):
 
     @position.setter
     def position(self, vector: Vector3) -> None:
+        # Vector3 += mutates in place, so always report a change
         self._last_position = self._position
         self._position = vector
+        self._changed()
 
 
 class VectorBasedComponent(Component):
@@ -57,7 +64,9 @@ class VectorBasedComponent(Component):
 
     @value.setter
     def value(self, vector: Vector3) -> None:
-        self._vector = vector
+        if vector != self._vector:
+            self._vector = vector
+            self._mark_changed()
 
     @property
     def x(self) -> float:
@@ -88,14 +97,28 @@ class SpeedComponent(VectorBasedComponent):
 
 
 class SpriteComponent(Component):
-    def __init__(self, sprite: Sprite) -> None:
+    """Sprite of an entity. When the sprite comes from a SpriteCache pass
+    the cache, the sprite is retained while the component is attached to
+    an entity."""
+    def __init__(self, sprite: Sprite, cache: Optional[SpriteCache] = None) -> None:
         super().__init__('sprite')
         self._sprite: Sprite = sprite
+        self._cache: Optional[SpriteCache] = cache
 
     @property
     def sprite(self) -> Sprite:
         return self._sprite
 
+    def _attached(self, entity) -> None:
+        super()._attached(entity)
+        if self._cache is not None:
+            self._cache.retain(self._sprite)
+
+    def _detached(self) -> None:
+        super()._detached()
+        if self._cache is not None:
+            self._cache.release(self._sprite)
+
 
 class AnimationComponent(Component):
     def __init__(self) -> None:
@@ -111,6 +134,7 @@ class AnimationComponent(Component):
     @timer.setter
     def timer(self, value: float) -> None:
         self._timer = value
+        self._mark_changed()
 
     @property
     def counter(self) -> int:
@@ -118,7 +142,9 @@ class AnimationComponent(Component):
 
     @counter.setter
     def counter(self, value: int) -> None:
-        self._counter = value
+        if value != self._counter:
+            self._counter = value
+            self._changed()
 
     @property
     def action(self) -> Animation:
@@ -145,16 +171,16 @@ class ControllerComponent(Component):
 
 
 class TimerComponent(Component):
-    def __init__(self, name: str, id: str) -> None:
+    def __init__(self, name: str, id: int) -> None:
         super().__init__(name)
-        self._id: str = id
+        self._id: int = id  # TimerRegistry handle
 
     @property
-    def id(self) -> str:
+    def id(self) -> int:
         return self._id
 
 class RandomDirectionTimerComponent(TimerComponent):
-    def __init__(self, id: str) -> None:
+    def __init__(self, id: int) -> None:
         super().__init__('random_direction_timer', id)
 
 
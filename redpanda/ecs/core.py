@@ -1,19 +1,34 @@
 from __future__ import annotations
 from abc import ABC, abstractmethod
-import uuid
 from collections import UserDict
-from typing import List, Dict, Optional, Tuple
+from collections.abc import MutableMapping
+from concurrent.futures import ThreadPoolExecutor
+import threading
+from typing import Any, Callable, Iterable, Iterator, List, Dict, FrozenSet, Optional, Tuple
 import pygame
 from pygame.rect import Rect
 from pygame.surface import Surface
 import pytmx
 import pyscroll
 import pprint
+import time
 from redpanda.ecs.types import PyScrollMap
+from redpanda.ecs.storage import Archetype
+from redpanda.ecs.allocator import EntityAllocator, handle_generation, handle_index
+from redpanda.ecs.events import DEFAULT_CAPACITY, Events
 import redpanda.logging
 
 _atexit_fns = []
 
+# Debug access checking, see ParallelExecutor
+# Number of systems running with checks, component writes only pay for them while there are any
+_access_checks_running = 0
+_access_checks_lock = threading.Lock()
+_access_check = threading.local()
+
+# Change tick the system running on this thread last ran at, see Changed
+_system_tick = threading.local()
+
 logger = redpanda.logging.get_logger('ecs')
 
 
@@ -53,12 +68,70 @@ class ECS:
     STAGE_UPDATE = 'stage_update'
     STAGE_POST_UPDATE = 'stage_post_update'
     STAGE_LAST = 'stage_last'
+    RESOURCE_PROFILER = 'ecs.profiler'
+    RESOURCE_EVENTS = 'ecs.events'
+
+
+class AccessError(Exception):
+    """Raised in debug mode when a system writes something it did not declare"""
+    pass
+
+
+class Access():
+    """Components and resources a system reads and writes. Used by
+    ParallelExecutor to find systems that can safely run at the same time."""
+    __slots__ = ['_read_components', '_write_components', '_read_resources', '_write_resources']
+
+    def __init__(self,
+                 read_components: Iterable[str] = (),
+                 write_components: Iterable[str] = (),
+                 read_resources: Iterable[str] = (),
+                 write_resources: Iterable[str] = ()) -> None:
+        self._read_components: FrozenSet[str] = frozenset(read_components)
+        self._write_components: FrozenSet[str] = frozenset(write_components)
+        self._read_resources: FrozenSet[str] = frozenset(read_resources)
+        self._write_resources: FrozenSet[str] = frozenset(write_resources)
+
+    def __str__(self) -> str:
+        return (f'components r:{sorted(self._read_components)} w:{sorted(self._write_components)} '
+                f'resources r:{sorted(self._read_resources)} w:{sorted(self._write_resources)}')
+
+    @property
+    def read_components(self) -> FrozenSet[str]:
+        return self._read_components
+
+    @property
+    def write_components(self) -> FrozenSet[str]:
+        return self._write_components
+
+    @property
+    def read_resources(self) -> FrozenSet[str]:
+        return self._read_resources
+
+    @property
+    def write_resources(self) -> FrozenSet[str]:
+        return self._write_resources
+
+    def conflicts_with(self, other: Access) -> bool:
+        """Two systems conflict if either one writes something the other uses"""
+        return bool(self._write_components & (other._read_components | other._write_components)
+                    or other._write_components & self._read_components
+                    or self._write_resources & (other._read_resources | other._write_resources)
+                    or other._write_resources & self._read_resources)
 
 
 class System(ABC):
-    """An ECS system that can be added to a Schedule"""
+    """An ECS system that can be added to a Schedule
+
+    Systems can declare what they access with set_access, a system
+    without a declaration is treated as exclusive and never runs
+    alongside another system."""
     def __init__(self, name: str) -> None:
         self._name = name
+        self._access: Optional[Access] = None
+        self._commands: Optional[CommandBuffer] = None
+        self._last_run_tick: int = 0
+        self._run_criteria: List[Callable[[World, Resources], bool]] = []
 
     def __str__(self) -> str:
         return f'{self._name}'
@@ -68,6 +141,45 @@ class System(ABC):
         """Returns name of system"""
         return self._name
 
+    @property
+    def access(self) -> Optional[Access]:
+        """Returns declared access, None if the system is exclusive"""
+        return self._access
+
+    def with_run_criteria(self, *criteria: Callable[[World, Resources], bool]) -> System:
+        """Only run the system when all criteria return True, see redpanda.ecs.criteria"""
+        self._run_criteria.extend(criteria)
+        return self
+
+    def should_run(self, world: World, resources: Resources) -> bool:
+        for criteria in self._run_criteria:
+            if not criteria(world, resources):
+                return False
+        return True
+
+    @property
+    def last_run_tick(self) -> int:
+        """World change tick of the last run, 0 if it never ran"""
+        return self._last_run_tick
+
+    def set_access(self, access: Access) -> System:
+        """Declare the components and resources the system reads and writes"""
+        self._access = access
+        return self
+
+    def conflicts_with(self, other: System) -> bool:
+        if self._access is None or other._access is None:
+            return True
+        return self._access.conflicts_with(other._access)
+
+    def commands(self, world: World) -> CommandBuffer:
+        """Returns the system's command buffer, structural changes written
+        to it are applied to the world at the end of the stage"""
+        commands = getattr(self, '_commands', None)  # subclasses may skip System.__init__
+        if commands is None:
+            commands = self._commands = CommandBuffer(world)
+        return commands
+
     def initialize(self, world: World, resources: Resources) -> None:
         """Initializes the system"""
         pass
@@ -80,14 +192,115 @@ class System(ABC):
 
 
 class Component(ABC):
+    """Components remember the world change tick they were added to an
+    entity at and the tick of their last change, see Changed and Added.
+    Changes are reported by the component's setters, so assign new values
+    instead of mutating them in place."""
     def __init__(self, name: str) -> None:
         self._name = name
+        self._owner: Optional[Entity] = None
+        self._added_tick: int = 0
+        self._changed_tick: int = 0
 
     @property
     def name(self):
         """Return component name"""
         return self._name
 
+    @property
+    def added_tick(self) -> int:
+        return self._added_tick
+
+    @property
+    def changed_tick(self) -> int:
+        return self._changed_tick
+
+    def _mark_changed(self) -> None:
+        """Called by components when one of their values changes"""
+        owner = self._owner
+        if owner is not None:
+            self._changed_tick = owner._storage._change_tick
+
+    def _changed(self) -> None:
+        """Called by components when a value the entity caches changes"""
+        owner = self._owner
+        if owner is not None:
+            self._changed_tick = owner._storage._change_tick
+            owner._invalidate()
+
+    def _attached(self, entity: Entity) -> None:
+        """Called by Entities when the component is added to entity"""
+        self._owner = entity
+        self._added_tick = self._changed_tick = entity._storage._change_tick
+
+    def _detached(self) -> None:
+        """Called by Entities when the component is removed from its entity"""
+        self._owner = None
+
+
+class EntityComponents(MutableMapping):
+    """Dict like view of the components of an entity. The components
+    themselves live in the columns of the entity's archetype."""
+    __slots__ = ['_entity']
+
+    def __init__(self, entity: Entity) -> None:
+        self._entity = entity
+
+    def __getitem__(self, name: str) -> Component:
+        entity = self._entity
+        return entity._archetype._columns[name][entity._row]
+
+    def __setitem__(self, name: str, component: Component) -> None:
+        entity = self._entity
+        entity._storage.insert_component(entity, name, component)
+
+    def __delitem__(self, name: str) -> None:
+        if _access_checks_running:
+            _check_component_write(name)
+        entity = self._entity
+        if name not in entity._archetype._signature:
+            raise KeyError(name)
+        entity._storage.remove_component(entity, name)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._entity._archetype._signature
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._entity._archetype._columns)
+
+    def __len__(self) -> int:
+        return len(self._entity._archetype._signature)
+
+
+def _check_component_write(name: str) -> None:
+    """Raise if the system running on this thread did not declare writing name"""
+    access = getattr(_access_check, 'access', None)
+    if access is not None and name not in access.write_components:
+        raise AccessError(f'{_access_check.system} writes undeclared component {name}')
+
+
+class CacheStats():
+    """Hit/miss counters of a cache"""
+    __slots__ = ['hits', 'misses', 'invalidations']
+
+    def __init__(self) -> None:
+        self.hits: int = 0
+        self.misses: int = 0
+        self.invalidations: int = 0
+
+    def __str__(self) -> str:
+        return f'hits: {self.hits} misses: {self.misses} invalidations: {self.invalidations} hit rate: {self.hit_rate:.1%}'
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def reset(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
 
 class Entity(pygame.sprite.Sprite):
     """Entity class that holds components. It is
@@ -101,21 +314,50 @@ class Entity(pygame.sprite.Sprite):
 
     For Sprite Collision
     - rect attribute
+
+    Components are not stored on the entity, they are stored in the
+    archetype (see redpanda.ecs.storage) of the Entities container that
+    owns the entity. An entity created on its own gets a private container.
+
+    The id is a generational integer handle issued by the container, it
+    goes stale once the entity is released.
+
+    image, rect and feet are cached and only recomputed after a component
+    they depend on reports a change (location, direction, animation frame)
+    or the entity's components are replaced. The returned values are
+    shared, treat them as read only. Hit rates are in Entity.cache_stats.
     """
-    def __init__(self, component_list: List[Component]=[]) -> None:
+    cache_stats: Dict[str, CacheStats] = {
+        'image': CacheStats(),
+        'rect': CacheStats(),
+        'feet': CacheStats(),
+    }
+
+    def __init__(self,
+                 component_list: List[Component]=[],
+                 storage: Optional[Entities]=None,
+                 reserve: bool=False) -> None:
         super().__init__()
-        self._id = uuid.uuid4()
-        self._components: Dict[str, Component] = {}
-        for component in component_list:
-            self._components[component.name] = component
+        self._id: int
+        self._storage: Entities = storage if storage is not None else Entities()
+        self._archetype: Archetype
+        self._row: int
+        self._components = EntityComponents(self)
+        self._image: Optional[Surface] = None
+        self._rect: Optional[Rect] = None
+        self._feet: Optional[Rect] = None
+        if reserve:
+            self._storage.reserve(self)
+        else:
+            self._storage.attach(self, component_list)
 
     def __str__(self) -> str:
-        return f'{self._id}: {" ".join(str(c) for c in self._components)}'
+        return f'{handle_index(self._id)}v{handle_generation(self._id)}: {" ".join(str(c) for c in self._components)}'
 
     def __repr__(self) -> str:
         # TODO make this easier to print and commonize with __str__
         # return super().__repr__()
-        return f'{self._id}: {" ".join(str(c) for c in self._components)}'
+        return f'{handle_index(self._id)}v{handle_generation(self._id)}: {" ".join(str(c) for c in self._components)}'
 
     @staticmethod
     def default() -> Entity:
@@ -127,22 +369,26 @@ class Entity(pygame.sprite.Sprite):
         return self._id
 
     @property
-    def components(self) -> Dict[str, Component]:
+    def components(self) -> EntityComponents:
         return self._components
 
+    @property
+    def archetype(self) -> Archetype:
+        """Returns the archetype table the entity's components live in"""
+        return self._archetype
+
     def clear(self) -> Entity:
         """Removes all components from entity"""
-        self._components = {}
+        self._storage.clear_components(self)
         return self
 
     def add_component(self, component: Component) -> Entity:
         """Add component to entity"""
-        self._components[component.name] = component
+        self._storage.insert_component(self, component.name, component)
         return self
 
     def add_components(self, component_list: List[Component]) -> Entity:
-        for component in component_list:
-            self._components[component.name] = component
+        self._storage.insert_components(self, component_list)
         return self
 
     def remove(self, component: Component) -> Entity:
@@ -150,14 +396,32 @@ class Entity(pygame.sprite.Sprite):
         del self._components[component.name]
         return self
 
+    def _invalidate(self) -> None:
+        """Drop cached image, rect and feet"""
+        if self._image is not None:
+            Entity.cache_stats['image'].invalidations += 1
+            self._image = None
+        if self._rect is not None:
+            Entity.cache_stats['rect'].invalidations += 1
+            self._rect = None
+        if self._feet is not None:
+            Entity.cache_stats['feet'].invalidations += 1
+            self._feet = None
+
     @property
     def image(self):
         """Used for Pygame sprite rendering"""
+        image = self._image
+        if image is not None:
+            Entity.cache_stats['image'].hits += 1
+            return image
+        Entity.cache_stats['image'].misses += 1
         sprite = self._components['sprite'].sprite
         action = self._components['animation'].action
         direction = self._components['direction'].value
         frame_index = self._components['animation'].counter
-        return sprite.animation_set(action).direction(direction).frames[frame_index]
+        image = self._image = sprite.animation_set(action).direction(direction).frames[frame_index]
+        return image
 
     @property
     def rect(self) -> Rect:
@@ -165,24 +429,52 @@ class Entity(pygame.sprite.Sprite):
         x, y == location
         width, height == size
         """
+        rect = self._rect
+        if rect is not None:
+            Entity.cache_stats['rect'].hits += 1
+            return rect
+        Entity.cache_stats['rect'].misses += 1
         # TODO for now use size from sprite, figure out how to handle scaled image
         image = self.image
-        return Rect((self._components['location'].position.x,
-                     self._components['location'].position.y),
-                     (image.get_width(), image.get_height()))
+        rect = self._rect = Rect((self._components['location'].position.x,
+                                  self._components['location'].position.y),
+                                  (image.get_width(), image.get_height()))
+        return rect
 
     @property
     def feet(self) -> Rect:
         """Used for Pygame sprite collision"""
+        feet_rect = self._feet
+        if feet_rect is not None:
+            Entity.cache_stats['feet'].hits += 1
+            return feet_rect
+        Entity.cache_stats['feet'].misses += 1
         rect = self.rect
         feet_rect = Rect(0, 0, rect.width * 0.7, rect.height * 0.3)  # TODO verify this
         feet_rect.midbottom = rect.midbottom
+        self._feet = feet_rect
         return feet_rect
 
 
 class Entities():
+    """Container for entities using archetype storage. Entities with the
+    same set of components share an Archetype, whose columns hold the
+    components. Adding or removing a component moves the entity to
+    another archetype.
+
+    Entity ids are generational handles from an EntityAllocator, slots
+    are recycled on release and stale handles are rejected."""
     def __init__(self) -> None:
+        self._allocator: EntityAllocator = EntityAllocator()
         self._entities: Dict[int, Entity] = {}
+        self._archetypes: Dict[FrozenSet[str], Archetype] = {}
+        # Registered queries and the archetypes that currently match them
+        self._queries: Dict[FrozenSet[str], List[Archetype]] = {}
+        self._empty_archetype: Archetype = self.archetype(frozenset())
+        # Handles can be reserved by systems running in parallel
+        self._allocator_lock = threading.Lock()
+        # Advanced before each system runs, components stamp changes with it
+        self._change_tick: int = 1
 
     def __str__(self) -> None:
         value = ''
@@ -200,34 +492,233 @@ class Entities():
     def entities(self) -> Dict[int, Entity]:
         return self._entities
 
+    @property
+    def archetypes(self) -> List[Archetype]:
+        return list(self._archetypes.values())
+
+    def archetype(self, signature: FrozenSet[str]) -> Archetype:
+        """Return archetype for the set of component names, creating it if needed"""
+        archetype = self._archetypes.get(signature)
+        if archetype is None:
+            archetype = Archetype(signature)
+            self._archetypes[signature] = archetype
+            # Keep registered queries current, this is the only place
+            # where the set of matching archetypes can change
+            for names, matches in self._queries.items():
+                if names <= signature:
+                    matches.append(archetype)
+        return archetype
+
+    def register_query(self, names: FrozenSet[str]) -> List[Archetype]:
+        """Register a query for the given component names and return the
+        live list of archetypes matching it"""
+        matches = self._queries.get(names)
+        if matches is None:
+            matches = [archetype for archetype in self._archetypes.values()
+                       if names <= archetype._signature]
+            self._queries[names] = matches
+        return matches
+
+    def matching_archetypes(self, names: FrozenSet[str]) -> List[Archetype]:
+        """Return all archetypes holding at least the given component names.
+        The query is registered on first use, after that this is a lookup."""
+        matches = self._queries.get(names)
+        if matches is None:
+            matches = self.register_query(names)
+        return matches
+
+    def query_columns(self, *names: str) -> List[Tuple[List[Entity], Tuple[List[Component], ...]]]:
+        """Return, per non-empty matching archetype, its entities and the
+        requested columns in the order the names were given"""
+        return [(archetype._entities, tuple(archetype._columns[name] for name in names))
+                for archetype in self.matching_archetypes(frozenset(names))
+                if archetype._entities]
+
     def contains(self, entity: Entity) -> bool:
         """Test if entity still exists"""
-        return entity.id() in self._entities
+        return entity.id in self._entities
+
+    def get(self, handle: int) -> Optional[Entity]:
+        """Return the entity for a handle, None if the handle is stale"""
+        return self._entities.get(handle)
 
     def clear(self) -> None:
         """Destroy all entities"""
-        for entity in self._entities:
-            entity.clear()
-        self._entities = {}
+        for entity in list(self._entities.values()):
+            self.release(entity)
 
     def alloc(self, component_list: List[Component] = []) -> Entity:
         """Return new Entity"""
-        entity = Entity.default()
-        self._entities[entity.id] = entity
-        if component_list:
-            entity.add_components(component_list)
-        return entity
+        return Entity(component_list, self)
 
     def release(self, entity: Entity) -> None:
-        """Remove Entity from container"""
-        del self._entities[entity.id()]
+        """Remove Entity from container, its handle becomes stale. A reserved
+        entity that was never attached only gives its handle back. Raises
+        ValueError when the handle is already stale."""
+        attached = self._entities.pop(entity.id, None) is not None
+        with self._allocator_lock:
+            self._allocator.free(entity.id)
+        if attached:
+            self._detach(entity)
+
+    def reserve(self, entity: Entity) -> None:
+        """Give a newly created entity a handle without placing it, it
+        does not exist until attach_reserved is called"""
+        with self._allocator_lock:
+            entity._id = self._allocator.alloc()
+        entity._archetype = self._empty_archetype
+        entity._row = -1
+
+    def attach(self, entity: Entity, component_list: List[Component]) -> None:
+        """Give a newly created entity a handle and place it in the
+        archetype matching its components"""
+        with self._allocator_lock:
+            entity._id = self._allocator.alloc()
+        self.attach_reserved(entity, component_list)
+
+    def attach_reserved(self, entity: Entity, component_list: List[Component]) -> None:
+        """Place an entity that already has a handle"""
+        if entity._id in self._entities or not self._allocator.is_alive(entity._id):
+            raise ValueError(f'Entity {handle_index(entity._id)}v{handle_generation(entity._id)} is not reserved')
+        self._entities[entity._id] = entity
+        components = {component.name: component for component in component_list}
+        for component in component_list:
+            component._attached(entity)
+        archetype = self.archetype(frozenset(components))
+        entity._archetype = archetype
+        entity._row = archetype.append(entity, components)
+
+    def _detach(self, entity: Entity) -> None:
+        """Take a released entity out of its archetype, it has no row after this"""
+        removed, moved = entity._archetype.swap_remove(entity._row)
+        if moved is not None:
+            moved._row = entity._row
+        for component in removed.values():
+            component._detached()
+        entity._archetype = self._empty_archetype
+        entity._row = -1
+        entity._invalidate()
+
+    def _move(self, entity: Entity, archetype: Archetype, components: Dict[str, Component]) -> None:
+        """Move entity from its current archetype to the given one"""
+        if entity._row < 0:
+            raise ValueError(f'Entity {handle_index(entity.id)}v{handle_generation(entity.id)} has been released')
+        removed, moved = entity._archetype.swap_remove(entity._row)
+        if moved is not None:
+            moved._row = entity._row
+        # Attach before detach, a replacement holding the same cached
+        # resource keeps it retained throughout
+        for component in components.values():
+            if component._owner is not entity:
+                component._attached(entity)
+        for name, component in removed.items():
+            if components.get(name) is not component:
+                component._detached()
+        entity._archetype = archetype
+        entity._row = archetype.append(entity, components)
+        entity._invalidate()
+
+    def _components_of(self, entity: Entity) -> Dict[str, Component]:
+        archetype = entity._archetype
+        row = entity._row
+        return {name: column[row] for name, column in archetype._columns.items()}
+
+    def insert_component(self, entity: Entity, name: str, component: Component) -> None:
+        """Add or replace a component of an entity"""
+        if _access_checks_running:
+            _check_component_write(name)
+        source = entity._archetype
+        if name in source._signature:
+            column = source._columns[name]
+            previous = column[entity._row]
+            if previous is not component:
+                component._attached(entity)
+                column[entity._row] = component
+                previous._detached()
+            entity._invalidate()
+            return
+        target = source._add_edges.get(name)
+        if target is None:
+            target = self.archetype(source._signature | {name})
+            source._add_edges[name] = target
+        components = self._components_of(entity)
+        components[name] = component
+        self._move(entity, target, components)
+
+    def insert_components(self, entity: Entity, component_list: List[Component]) -> None:
+        """Add or replace several components, moving the entity only once"""
+        components = self._components_of(entity)
+        for component in component_list:
+            if _access_checks_running:
+                _check_component_write(component.name)
+            components[component.name] = component
+        target = self.archetype(frozenset(components))
+        if target is entity._archetype:
+            for name, component in components.items():
+                column = target._columns[name]
+                previous = column[entity._row]
+                if previous is not component:
+                    component._attached(entity)
+                    column[entity._row] = component
+                    previous._detached()
+            entity._invalidate()
+        else:
+            self._move(entity, target, components)
+
+    def remove_component(self, entity: Entity, name: str) -> None:
+        """Remove a component from an entity"""
+        if _access_checks_running:
+            _check_component_write(name)
+        source = entity._archetype
+        target = source._remove_edges.get(name)
+        if target is None:
+            target = self.archetype(source._signature - {name})
+            source._remove_edges[name] = target
+        components = self._components_of(entity)
+        del components[name]
+        self._move(entity, target, components)
+
+    def clear_components(self, entity: Entity) -> None:
+        """Remove all components from an entity"""
+        if entity._row >= 0 and entity._archetype is not self._empty_archetype:
+            self._move(entity, self._empty_archetype, {})
 
 
 class Resources(UserDict):
-    """For now Resources will be a simple key/value store"""
+    """For now Resources will be a simple key/value store
+
+    Setting a resource bumps its version, run criteria use it to tell if
+    a resource changed. Call mark_changed after mutating one in place."""
+    def __init__(self, *args, **kwargs) -> None:
+        self._version: int = 0
+        self._versions: Dict[Any, int] = {}
+        super().__init__(*args, **kwargs)
+
     def __str__(self) -> str:
         return pprint.pformat(self.data)
 
+    def __setitem__(self, key, value) -> None:
+        self.data[key] = value
+        self.mark_changed(key)
+
+    def mark_changed(self, key) -> None:
+        self._version += 1
+        self._versions[key] = self._version
+
+    def version(self, key) -> int:
+        """Returns the version of a resource, 0 if it was never set"""
+        return self._versions.get(key, 0)
+
+    def events(self, event_type: type, capacity: int = DEFAULT_CAPACITY) -> Events:
+        """Returns the event channel for event_type, creating it on first use"""
+        channels = self.data.get(ECS.RESOURCE_EVENTS)
+        if channels is None:
+            channels = self.data[ECS.RESOURCE_EVENTS] = {}
+        channel = channels.get(event_type)
+        if channel is None:
+            channel = channels[event_type] = Events(event_type, capacity)
+        return channel
+
 
 class Query(ABC):
     def __init__(self) -> None:
@@ -238,15 +729,75 @@ class Query(ABC):
 
     __call__ = execute
 
-class ContainsComponentsQuery(Query):
+class Changed():
+    """Query filter, matches entities where at least one of the given
+    components was added or changed since the running system last ran.
+    Changes a system makes itself are not reported back to it.
+
+    Outside of a system run (no executor) everything counts as changed."""
     def __init__(self, *components: str) -> None:
         self._components: Tuple[str] = components
 
+    @property
+    def components(self) -> Tuple[str]:
+        return self._components
+
+    @staticmethod
+    def _tick(component: Component) -> int:
+        return component._changed_tick
+
+    def filter(self, archetype: Archetype, since: int) -> List[Entity]:
+        """Returns the entities of archetype that match"""
+        tick = self._tick
+        columns = [archetype._columns[name] for name in self._components]
+        if len(columns) == 1:
+            return [entity for entity, component in zip(archetype._entities, columns[0])
+                    if tick(component) > since]
+        return [entity for entity, *components in zip(archetype._entities, *columns)
+                if any(tick(component) > since for component in components)]
+
+
+class Added(Changed):
+    """Query filter, matches entities where at least one of the given
+    components was added since the running system last ran"""
+    @staticmethod
+    def _tick(component: Component) -> int:
+        return component._added_tick
+
+
+def last_run_tick() -> int:
+    """Change tick the system running on this thread last ran at"""
+    return getattr(_system_tick, 'last_run', 0)
+
+
+class ContainsComponentsQuery(Query):
+    """Matches entities that have all of the given components. The matching
+    archetypes are cached by Entities, so executing the query costs
+    O(matching entities) rather than a scan of every entity.
+
+    With a filter (Changed or Added) only entities whose components
+    changed since the running system last ran are returned."""
+    def __init__(self, *components: str, filter: Optional[Changed] = None) -> None:
+        self._components: Tuple[str] = components
+        self._filter: Optional[Changed] = filter
+        self._names: FrozenSet[str] = frozenset(components)
+        if filter is not None:
+            self._names |= frozenset(filter.components)
+
+    @property
+    def components(self) -> Tuple[str]:
+        return tuple(self._names) if self._filter is not None else self._components
+
     def execute(self, entities: Entities) -> List[Entity]:
         matching_entities: List[Entity] = []
-        for entity in entities.entities.values():
-            if all(component in entity.components.keys() for component in self._components):
-                matching_entities.append(entity)
+        if self._filter is None:
+            for archetype in entities.matching_archetypes(self._names):
+                matching_entities.extend(archetype.entities)
+            return matching_entities
+        since = last_run_tick()
+        for archetype in entities.matching_archetypes(self._names):
+            if archetype._entities:
+                matching_entities.extend(self._filter.filter(archetype, since))
         return matching_entities
 
     __call__ = execute
@@ -286,7 +837,7 @@ class Area():
         self._name = name
         self._map_file = map_filename
         self._map: Optional[PyScrollMap] = None
-        self._entities: list[Entity] = list()
+        self._entities: Dict[int, Entity] = {}
 
     @property
     def name(self) -> str:
@@ -301,10 +852,12 @@ class Area():
         return self._map
 
     @map.setter
-    def map(self, map: PyScrollMap) -> None:
+    def map(self, map: Optional[PyScrollMap]) -> None:
+        """Set to None to unload the map"""
         self._map = map
-        for entity in self._entities:
-            self._map.main_group.add(entity)
+        if self._map is not None:
+            for entity in self._entities.values():
+                self._map.main_group.add(entity)
 
     def enter(self) -> None:
         """Enter an area"""
@@ -315,17 +868,33 @@ class Area():
         """Leave an area"""
         pass
 
+    @property
+    def entities(self) -> List[Entity]:
+        return list(self._entities.values())
+
+    def contains(self, entity: Entity) -> bool:
+        return entity.id in self._entities
+
     def add(self, entity: Entity) -> None:
-        """Add an entity to area"""
-        self._entities.append(entity)
+        """Add an entity to area, adding it again does nothing"""
+        if entity.id in self._entities:
+            return
+        self._entities[entity.id] = entity
         if self._map:
             self._map.main_group.add(entity)
 
     def remove(self, entity: Entity) -> None:
         """Remove an entity from area"""
-        # TODO remove from entities
+        if self._entities.pop(entity.id, None) is None:
+            return
+        if self._map:
+            self._map.main_group.remove(entity)
+
+    def clear(self) -> None:
+        """Remove all entities from area"""
         if self._map:
-            self._map.main_group.add(entity)  # TODO fix this
+            self._map.main_group.remove(*self._entities.values())
+        self._entities.clear()
 
     def render(self, surface: Surface, camera_center: Tuple[int, int]) -> None:
         if self._map:
@@ -334,12 +903,21 @@ class Area():
 
     def collide_check(self, entity_rect: Rect) -> bool:
         if self._map:
+            grid = self._map.stationary_collision_grid
+            if grid is not None:
+                return grid.collides(entity_rect)
             return entity_rect.collidelist(self._map.stationary_collision_list) > -1
         return False
 
 
 class World():
-    """Container for entities"""
+    """Container for entities
+
+    Entities that can be drawn (AREA_COMPONENTS) are members of the area
+    named by their location component. Membership is kept in sync by
+    spawn, despawn, insert, remove and clear."""
+    AREA_COMPONENTS: FrozenSet[str] = frozenset(('location', 'sprite', 'animation', 'direction'))
+
     def __init__(self) -> None:
         self._entities: Entities = Entities.default()
         self._areas: Dict[str, Area] = {}
@@ -368,6 +946,19 @@ class World():
     def add_area(self, area: Area) -> None:
         """Add Area to world"""
         self._areas[area.name] = area
+        for entity in self._entities.entities.values():
+            self._update_area(entity)
+
+    def _update_area(self, entity: Entity) -> None:
+        """Make entity a member of the area its location names, and of no other area"""
+        area_name = None
+        if World.AREA_COMPONENTS <= entity._archetype._signature:
+            area_name = entity.components['location'].area
+        for name, area in self._areas.items():
+            if name == area_name:
+                area.add(entity)
+            else:
+                area.remove(entity)
 
     def find_area(self, name: str) -> Optional[Area]:
         """Return an area if found"""
@@ -395,32 +986,59 @@ class World():
     def current_area(self) -> Area:
         return self._areas[self._current_area]
 
+    @property
+    def current_area_name(self) -> str:
+        """Empty until an area is entered"""
+        return self._current_area
+
     def spawn(self, component_list: List[Component]) -> Entity:
         """Create an entity with certain components"""
         entity = self._entities.alloc(component_list)
-        # TODO Add entity to area
+        self._update_area(entity)
+        return entity
+
+    def reserve(self) -> Entity:
+        """Create an entity handle now, the entity is spawned by spawn_reserved"""
+        return Entity(storage=self._entities, reserve=True)
+
+    def spawn_reserved(self, entity: Entity, component_list: List[Component]) -> Entity:
+        """Spawn a reserved entity with certain components"""
+        self._entities.attach_reserved(entity, component_list)
+        self._update_area(entity)
         return entity
 
     def despawn(self, entity: Entity) -> None:
         """Destroy an entity and all its components"""
-        # TODO remove entity from area
-        del self._entities[entity.id()]
-        entity.clear()
+        for area in self._areas.values():
+            area.remove(entity)
+        self._entities.release(entity)
 
     def clear(self) -> None:
         """Destroy all entities"""
-        for entity in self._entities:
-            # TODO remove entity from area
-            entity.clear()
-        self._entities = {}
+        for area in self._areas.values():
+            area.clear()
+        self._entities.clear()
 
     def contains(self, entity: Entity) -> bool:
         """Test if entity still exists"""
-        return entity.id() in self._entities
+        return self._entities.contains(entity)
+
+    @property
+    def change_tick(self) -> int:
+        return self._entities._change_tick
+
+    def increment_change_tick(self) -> int:
+        """Advance and return the change tick, done before each system runs"""
+        self._entities._change_tick += 1
+        return self._entities._change_tick
+
+    def entity(self, handle: int) -> Optional[Entity]:
+        """Return the entity for a handle, None if it was despawned"""
+        return self._entities.get(handle)
 
     def has_component_type(self, entity: Entity, component_type) -> bool:
         """Returns true if the given entity has a component with the given type"""
-        for component in entity.components():
+        for component in entity.components.values():
             if isinstance(component, component_type):
                 return True
         return False
@@ -429,23 +1047,95 @@ class World():
         """Iterates over all entities that have certain components and returns a generator"""
         return query_fn(self._entities)
 
+    def register_query(self, query: ContainsComponentsQuery) -> ContainsComponentsQuery:
+        """Register a query up front so its matching set is maintained
+        from now on instead of being built on first execution"""
+        self._entities.register_query(frozenset(query.components))
+        return query
+
+    def query_columns(self, *components: str) -> List[Tuple[List[Entity], Tuple[List[Component], ...]]]:
+        """Returns the entities and component columns of every archetype
+        that has all the given components, columns are in the order given"""
+        return self._entities.query_columns(*components)
+
     def insert(self, entity: Entity, components: List[Component]) -> None:
         """Add components to entity"""
-        for component in components:
-            entity.add(component)
+        entity.add_components(components)
+        self._update_area(entity)
 
     def remove(self, entity: Entity) -> None:
         """Remove all components from entity"""
         entity.clear()
+        self._update_area(entity)
 
     def remove_one(self, entity: Entity, component: Component) -> None:
         """Remove one component from entity"""
         entity.remove(component)
+        self._update_area(entity)
 
     def collide_check(self, entity_rect: Rect) -> bool:
         """Checks if entity collides with world"""
         return self._areas[self._current_area].collide_check(entity_rect)
 
+class CommandBuffer():
+    """Structural changes to the world recorded by a system.
+
+    Spawn, despawn, insert and remove are only recorded, they are applied
+    in the order they were written when the stage ends (Stage.run), so
+    systems never change archetypes or areas while other systems iterate
+    them. Spawn returns the entity right away, its handle is reserved but
+    it is not in the world until the buffer is applied. Commands on an
+    entity that has been despawned by then are skipped."""
+    SPAWN = 0
+    DESPAWN = 1
+    INSERT = 2
+    REMOVE = 3
+
+    def __init__(self, world: World) -> None:
+        self._world: World = world
+        self._commands: List[Tuple[int, Entity, Any]] = []
+
+    def __len__(self) -> int:
+        return len(self._commands)
+
+    def spawn(self, component_list: List[Component]) -> Entity:
+        """Queue spawning an entity with certain components"""
+        entity = self._world.reserve()
+        self._commands.append((CommandBuffer.SPAWN, entity, list(component_list)))
+        return entity
+
+    def despawn(self, entity: Entity) -> CommandBuffer:
+        """Queue destroying an entity"""
+        self._commands.append((CommandBuffer.DESPAWN, entity, None))
+        return self
+
+    def insert(self, entity: Entity, components: List[Component]) -> CommandBuffer:
+        """Queue adding components to entity"""
+        self._commands.append((CommandBuffer.INSERT, entity, list(components)))
+        return self
+
+    def remove(self, entity: Entity, component_name: str) -> CommandBuffer:
+        """Queue removing a component from entity"""
+        self._commands.append((CommandBuffer.REMOVE, entity, component_name))
+        return self
+
+    def apply(self) -> None:
+        """Apply queued commands in order and empty the buffer"""
+        world = self._world
+        commands, self._commands = self._commands, []
+        for command, entity, argument in commands:
+            if command == CommandBuffer.SPAWN:
+                world.spawn_reserved(entity, argument)
+            elif not world.contains(entity):
+                logger.warning(f'Skipping command on despawned entity {entity.id}')
+            elif command == CommandBuffer.DESPAWN:
+                world.despawn(entity)
+            elif command == CommandBuffer.INSERT:
+                world.insert(entity, argument)
+            elif argument in entity.components:
+                world.remove_one(entity, entity.components[argument])
+
+
 class WorldBuilder():
     """Modifies the world using a builder pattern
 
@@ -456,10 +1146,11 @@ class WorldBuilder():
 
 class Stage():
     """Stage holder"""
-    def __init__(self, name: str) -> None:
+    def __init__(self, name: str, executor: Optional[Executor] = None) -> None:
         self._name = name
         self._systems : List[System] = []
-        self._executor : Executor = Executor.default()
+        self._executor : Executor = executor or Executor.default()
+        self._run_criteria: List[Callable[[World, Resources], bool]] = []
 
     def __str__(self) -> str:
         value = f'{self._name}\n'
@@ -473,6 +1164,14 @@ class Stage():
     def name(self) -> str:
         return self._name
 
+    def set_executor(self, executor: Executor) -> None:
+        self._executor = executor
+
+    def with_run_criteria(self, *criteria: Callable[[World, Resources], bool]) -> Stage:
+        """Only run the stage when all criteria return True"""
+        self._run_criteria.extend(criteria)
+        return self
+
     def add_system(self, system: System) -> None:
         self._systems.append(system)
         # TODO add to uninitialized list
@@ -487,8 +1186,26 @@ class Stage():
             system.initialize(world, resources)
 
     def run(self, world: World, resources: Resources) -> None:
+        for criteria in self._run_criteria:
+            if not criteria(world, resources):
+                profiler = resources.get(ECS.RESOURCE_PROFILER)
+                if profiler is not None and profiler.enabled:
+                    for system in self._systems:
+                        profiler.record_skip(self._name, system.name)
+                return
         # TODO pass in list of stages to execute on, for now use all
-        self._executor.execute_stage(self._systems, world, resources)
+        self._executor.execute_stage(self._systems, world, resources, self._name)
+        # Structural changes are applied once all systems are done, in system order.
+        # They get a tick of their own, newer than the last run of every system
+        # in the stage, so Added and Changed queries see them on the next run
+        ticked = False
+        for system in self._systems:
+            commands = getattr(system, '_commands', None)
+            if commands:
+                if not ticked:
+                    world.increment_change_tick()
+                    ticked = True
+                commands.apply()
 
 
 class Schedule():
@@ -500,6 +1217,7 @@ class Schedule():
         self._stages: Dict[str, Stage] = {}
         self._stage_order: List[str] = []
         self._name: str = 'Schedule'
+        self._executor: Optional[Executor] = None
 
     def __str__(self):
         value = f'{self._name}:\n'
@@ -520,12 +1238,19 @@ class Schedule():
         self._name = name + '_Schedule'
         return self
 
+    def set_executor(self, executor: Executor) -> Schedule:
+        """Use executor for every stage, including stages added later"""
+        self._executor = executor
+        for stage in self._stages.values():
+            stage.set_executor(executor)
+        return self
+
     def add_stage(self, stage_name: str) -> Schedule:
         """Add new stage to end of the list of stages"""
         if stage_name in self._stage_order:
             raise Exception(f'Stage already exists {stage_name}')
         else:
-            self._stages[stage_name] = Stage(stage_name)
+            self._stages[stage_name] = Stage(stage_name, self._executor)
             self._stage_order.append(stage_name)
         return self
 
@@ -535,7 +1260,7 @@ class Schedule():
             raise Exception(f'Stage already exists {stage_name}')
         else:
             target_index = self._stage_order.index(target_name)
-            self._stages[stage_name] = Stage(stage_name)
+            self._stages[stage_name] = Stage(stage_name, self._executor)
             self._stage_order.insert(target_index, stage_name)
         return self
 
@@ -545,7 +1270,7 @@ class Schedule():
             raise Exception(f'Stage already exists {stage_name}')
         else:
             target_index = self._stage_order.index(target_name)
-            self._stages[stage_name] = Stage(stage_name)
+            self._stages[stage_name] = Stage(stage_name, self._executor)
             self._stage_order.insert(target_index + 1, stage_name)
         return self
 
@@ -565,6 +1290,13 @@ class Schedule():
             self._stages[stage_name].add_system_to_front(system)
         return self
 
+    def add_stage_run_criteria(self, stage_name: str, *criteria: Callable[[World, Resources], bool]) -> Schedule:
+        """Only run the stage when all criteria return True"""
+        if stage_name not in self._stage_order:
+            raise Exception(f'Stage does not exists {stage_name}')
+        self._stages[stage_name].with_run_criteria(*criteria)
+        return self
+
     def initialize(self, world: World, resources: Resources) -> Schedule:
         """Initialize all systems in stage order, called once per update"""
         for stage_name in self._stage_order:
@@ -572,10 +1304,37 @@ class Schedule():
             self._stages[stage_name].initialize(world, resources)
         return self
 
+    @property
+    def stage_names(self) -> List[str]:
+        """Returns names of the stages in execution order"""
+        return list(self._stage_order)
+
     def run_once(self, world: World, resources: Resources) -> None:
-        """Iterate over the stages in order and run systems contained within"""
-        for stage_name in self._stage_order:
+        """Iterate over the stages in order and run systems contained within,
+        recorded by the profiler as one frame"""
+        profiler = resources.get(ECS.RESOURCE_PROFILER)
+        if profiler is None or not profiler.enabled:
+            self.run_stages(self._stage_order, world, resources)
+            return
+        clock = time.perf_counter
+        frame_start = clock()
+        self.run_stages(self._stage_order, world, resources)
+        profiler.record_frame(frame_start, clock())
+
+    def run_stages(self, stage_names: List[str], world: World, resources: Resources) -> None:
+        """Run only the given stages, in the order given. No frame is
+        recorded, runners calling this record their own frames"""
+        profiler = resources.get(ECS.RESOURCE_PROFILER)
+        if profiler is None or not profiler.enabled:
+            for stage_name in stage_names:
+                self._stages[stage_name].run(world, resources)
+            return
+
+        clock = time.perf_counter
+        for stage_name in stage_names:
+            start = clock()
             self._stages[stage_name].run(world, resources)
+            profiler.record_stage(stage_name, start, clock())
 
     def initialize_and_run(self, world: World, resources: Resources) -> None:
         logger.info(f'Initializing - {" ".join(self._stage_order)}')
@@ -583,8 +1342,21 @@ class Schedule():
         self.run_once(world, resources)
 
 
+class EventUpdate(System):
+    """Starts a new frame on every event channel, runs first in STAGE_FIRST"""
+    def __init__(self) -> None:
+        super().__init__('EventUpdate')
+
+    def run_once(self, world: World, resources: Resources) -> None:
+        for channel in resources.get(ECS.RESOURCE_EVENTS, {}).values():
+            channel.update()
+
+
 class Executor():
-    """Executes each schedule stage."""
+    """Executes each schedule stage.
+
+    When a Profiler is in the resources (ECS.RESOURCE_PROFILER) the time
+    of every system's update and run_once is recorded."""
     def __init__(self) -> None:
         pass
 
@@ -595,10 +1367,162 @@ class Executor():
     def initialize(self, resources: Resources) -> None:
         pass
 
-    def execute_stage(self, systems: List[System], world: World, resources: Resources) -> None:
+    def execute_stage(self, systems: List[System], world: World, resources: Resources, stage_name: str = '') -> None:
+        profiler = resources.get(ECS.RESOURCE_PROFILER)
+        if profiler is None or not profiler.enabled:
+            for system in systems:
+                if system._run_criteria and not system.should_run(world, resources):
+                    continue
+                tick = world.increment_change_tick()
+                _system_tick.last_run = system._last_run_tick
+                system.update(world, resources)
+                system.run_once(world, resources)
+                system._last_run_tick = tick
+            _system_tick.last_run = 0
+            return
+
+        clock = time.perf_counter
         for system in systems:
+            if system._run_criteria and not system.should_run(world, resources):
+                profiler.record_skip(stage_name, system.name)
+                continue
+            tick = world.increment_change_tick()
+            _system_tick.last_run = system._last_run_tick
+            update_start = clock()
+            system.update(world, resources)
+            run_once_start = clock()
+            system.run_once(world, resources)
+            profiler.record_system(stage_name, system.name, update_start, run_once_start, clock())
+            system._last_run_tick = tick
+        _system_tick.last_run = 0
+
+
+class _CheckedResources(Resources):
+    """Resources seen by a system in debug mode, raises on undeclared writes"""
+    def __init__(self, resources: Resources, system: System) -> None:
+        # Share the underlying dict instead of copying it
+        self.data = resources.data
+        self._resources = resources
+        self._system = system
+
+    def __setitem__(self, key, value) -> None:
+        if key not in self._system.access.write_resources:
+            raise AccessError(f'{self._system.name} writes undeclared resource {key}')
+        self._resources[key] = value
+
+    def __delitem__(self, key) -> None:
+        if key not in self._system.access.write_resources:
+            raise AccessError(f'{self._system.name} writes undeclared resource {key}')
+        del self._resources[key]
+
+    def mark_changed(self, key) -> None:
+        self._resources.mark_changed(key)
+
+    def version(self, key) -> int:
+        return self._resources.version(key)
+
+
+class ParallelExecutor(Executor):
+    """Executes systems of a stage concurrently on a thread pool.
+
+    Systems are split into batches using their declared Access. A system
+    goes into the batch after the last earlier system it conflicts with,
+    so systems ordered through shared writes still run in stage order
+    while independent ones run together. Systems without declared access
+    are exclusive, they get a batch of their own and run on the calling
+    thread.
+
+    Structural changes (spawn, despawn, adding or removing components)
+    are not safe from systems running in parallel.
+
+    In debug mode writes to undeclared components and resources raise
+    AccessError. Only writes through Resources and entity component
+    assignment/insertion/removal can be checked, mutating the attributes
+    of a component is not detected.
+    """
+    def __init__(self, max_workers: Optional[int] = None, debug: bool = False) -> None:
+        super().__init__()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='ecs')
+        self._debug = debug
+        self._batches: Dict[Tuple[int, ...], List[List[System]]] = {}
+
+    @staticmethod
+    def batch(systems: List[System]) -> List[List[System]]:
+        """Split systems into batches of mutually non-conflicting systems"""
+        levels: List[int] = []
+        batches: List[List[System]] = []
+        for index, system in enumerate(systems):
+            level = 0
+            for earlier in range(index):
+                if levels[earlier] >= level and system.conflicts_with(systems[earlier]):
+                    level = levels[earlier] + 1
+            levels.append(level)
+            if level == len(batches):
+                batches.append([])
+            batches[level].append(system)
+        return batches
+
+    def _run_system(self, system: System, world: World, resources: Resources, stage_name: str, profiler, tick: int) -> None:
+        global _access_checks_running
+        _system_tick.last_run = system._last_run_tick
+        clock = time.perf_counter
+        update_start = clock()
+        if self._debug and system.access is not None:
+            _access_check.access = system.access
+            _access_check.system = system.name
+            with _access_checks_lock:
+                _access_checks_running += 1
+            try:
+                checked = _CheckedResources(resources, system)
+                system.update(world, checked)
+                run_once_start = clock()
+                system.run_once(world, checked)
+            finally:
+                with _access_checks_lock:
+                    _access_checks_running -= 1
+                _access_check.access = None
+        else:
             system.update(world, resources)
+            run_once_start = clock()
             system.run_once(world, resources)
+        if profiler is not None:
+            profiler.record_system(stage_name, system.name, update_start, run_once_start, clock())
+        system._last_run_tick = tick
+        _system_tick.last_run = 0
+
+    def execute_stage(self, systems: List[System], world: World, resources: Resources, stage_name: str = '') -> None:
+        key = tuple(id(system) for system in systems)
+        batches = self._batches.get(key)
+        if batches is None:
+            batches = self.batch(systems)
+            self._batches[key] = batches
+        profiler = resources.get(ECS.RESOURCE_PROFILER)
+        if profiler is not None and not profiler.enabled:
+            profiler = None
+        for batch in batches:
+            # Run criteria are evaluated on this thread, once the batches before are done
+            running = []
+            for system in batch:
+                if system._run_criteria and not system.should_run(world, resources):
+                    if profiler is not None:
+                        profiler.record_skip(stage_name, system.name)
+                else:
+                    running.append(system)
+            batch = running
+            if not batch:
+                continue
+            # Systems in a batch share a tick, they cannot see each other's writes anyway
+            tick = world.increment_change_tick()
+            if len(batch) == 1:
+                self._run_system(batch[0], world, resources, stage_name, profiler, tick)
+            else:
+                futures = [self._pool.submit(self._run_system, system, world, resources, stage_name, profiler, tick)
+                           for system in batch]
+                for future in futures:
+                    future.result()
+
+    def shutdown(self) -> None:
+        self._pool.shutdown()
 
 
 class Plugin(ABC):
@@ -662,14 +1586,29 @@ class App():
     def resources(self) -> Resources:
         return self._resources
 
+    @property
+    def world(self) -> World:
+        return self._world
+
+    @property
+    def schedule(self) -> Schedule:
+        return self._schedule
+
     def update(self) -> None:
         self._schedule.run_once(self._world, self._resources)
 
+    def update_stages(self, stage_names: List[str]) -> None:
+        """Run a subset of the schedule's stages, used by runners that
+        split simulation and rendering"""
+        self._schedule.run_stages(stage_names, self._world, self._resources)
+
     def initialize(self) -> None:
         logger.info('Initialize Application')
         self._startup_schedule.initialize(self._world, self._resources)
         self._schedule.initialize(self._world, self._resources)
-        self._startup_schedule.run_once(self._world, self._resources)  # TODO should we do this here?
+        # Startup is not a frame, run_stages leaves it out of the profiler's frames
+        self._startup_schedule.run_stages(self._startup_schedule.stage_names,
+                                          self._world, self._resources)  # TODO should we do this here?
 
     def run(self) -> None:
         self._runner(self)
@@ -687,9 +1626,15 @@ class AppBuilder():
     def default() -> AppBuilder:
         app_builder = AppBuilder(App.default())
         app_builder.add_default_stages()
-        # app_builder.add_event(AppExit)  # TODO Figure this out
+        app_builder.add_system_to_stage_front(ECS.STAGE_FIRST, EventUpdate())
+        app_builder.add_event(AppExit)  # TODO nothing sends or reads it yet
         return app_builder
 
+    @property
+    def app(self) -> App:
+        """App being built, for driving it without a runner"""
+        return self._app
+
     def run(self) -> AppBuilder:
         """Start running the application"""
         self._app.initialize()
@@ -808,10 +1753,15 @@ class AppBuilder():
         self._app._schedule.add_system_to_stage_front(stage_name, system)
         return self
 
-    """TODO
-    def add_event(self, ????) -> AppBuilder:
+    def add_stage_run_criteria(self, stage_name: str, *criteria: Callable[[World, Resources], bool]) -> AppBuilder:
+        """Only run the stage when all criteria return True"""
+        self._app._schedule.add_stage_run_criteria(stage_name, *criteria)
+        return self
+
+    def add_event(self, event_type: type, capacity: int = DEFAULT_CAPACITY) -> AppBuilder:
+        """Add an event channel, see Resources.events"""
+        self._app._resources.events(event_type, capacity)
         return self
-    """
 
     def add_resource(self, key: str, value) -> AppBuilder:
         """Add resource"""
@@ -823,6 +1773,11 @@ class AppBuilder():
         """TODO figure this out"""
         return self
 
+    def set_executor(self, executor: Executor) -> AppBuilder:
+        """Set the executor used to run every stage of the schedule"""
+        self._app._schedule.set_executor(executor)
+        return self
+
     def set_runner(self, runner) -> AppBuilder:
         """Set the application runner"""
         self._app._runner = runner
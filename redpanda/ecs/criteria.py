@@ -0,0 +1,96 @@
+"""Run criteria for systems and stages
+
+A run criterion is a callable taking (world, resources) and returning
+whether the system or stage should run this frame. Attach them with
+System.with_run_criteria or Stage.with_run_criteria, all of them have to
+pass. Most criteria keep state, create one per system.
+"""
+import time
+from typing import Any, Callable
+from redpanda.ecs.core import Resources, World
+
+
+RunCriteria = Callable[[World, Resources], bool]
+
+
+class ResourceChanged():
+    """Runs when the resource was set since the last time this returned True"""
+    def __init__(self, key: str) -> None:
+        self._key = key
+        self._seen: int = 0
+
+    def __call__(self, world: World, resources: Resources) -> bool:
+        version = resources.version(self._key)
+        if version == self._seen:
+            return False
+        self._seen = version
+        return True
+
+
+class EveryMs():
+    """Runs at most once every interval milliseconds of wall clock time"""
+    def __init__(self, interval: float) -> None:
+        self._interval: float = interval / 1000
+        self._next: float = 0.0
+
+    def __call__(self, world: World, resources: Resources) -> bool:
+        now = time.perf_counter()
+        if now < self._next:
+            return False
+        self._next = now + self._interval
+        return True
+
+
+class EventsNotEmpty():
+    """Runs when events of the type were sent since the last time this returned True"""
+    def __init__(self, event_type: type) -> None:
+        self._event_type = event_type
+        self._reader = None
+
+    def __call__(self, world: World, resources: Resources) -> bool:
+        if self._reader is None:
+            self._reader = resources.events(self._event_type).reader()
+        if self._reader.is_empty():
+            return False
+        self._reader.clear()
+        return True
+
+
+class StateIs():
+    """Runs while the resource equals value"""
+    def __init__(self, key: str, value: Any) -> None:
+        self._key = key
+        self._value = value
+
+    def __call__(self, world: World, resources: Resources) -> bool:
+        return resources.get(self._key) == self._value
+
+
+class AnyOf():
+    """Runs when any of the criteria passes, all of them are evaluated"""
+    def __init__(self, *criteria: RunCriteria) -> None:
+        self._criteria = criteria
+
+    def __call__(self, world: World, resources: Resources) -> bool:
+        results = [criteria(world, resources) for criteria in self._criteria]
+        return any(results)
+
+
+def resource_changed(key: str) -> RunCriteria:
+    return ResourceChanged(key)
+
+
+def every_ms(interval: float) -> RunCriteria:
+    return EveryMs(interval)
+
+
+def events_not_empty(event_type: type) -> RunCriteria:
+    return EventsNotEmpty(event_type)
+
+
+def state_is(key: str, value: Any) -> RunCriteria:
+    return StateIs(key, value)
+
+
+def any_of(*criteria: RunCriteria) -> RunCriteria:
+    return AnyOf(*criteria)
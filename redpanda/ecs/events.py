@@ -0,0 +1,142 @@
+from __future__ import annotations
+from typing import Generic, Iterable, Iterator, List, Optional, Type, TypeVar
+
+
+T = TypeVar('T')
+
+DEFAULT_CAPACITY = 64
+
+
+class Events(Generic[T]):
+    """Channel of events of one type, backed by a ring buffer.
+
+    Events are double buffered: an event sent during a frame can be read
+    during that frame and the next one, update() (run by the EventUpdate
+    system at the start of every frame) drops the events of the frame
+    before. Nothing is cleared by hand.
+
+    Events are numbered in the order they are sent. Each EventReader keeps
+    the number of the next event it has not seen, so any number of systems
+    can read the same events without copying them and without seeing an
+    event twice. The buffer only grows when the events of the last two
+    frames do not fit, it is never shrunk.
+    """
+    __slots__ = ['_event_type', '_buffer', '_mask', '_start', '_frame_start', '_end']
+
+    def __init__(self, event_type: Type[T], capacity: int = DEFAULT_CAPACITY) -> None:
+        self._event_type: Type[T] = event_type
+        size = 1
+        while size < capacity:
+            size <<= 1
+        self._buffer: List[Optional[T]] = [None] * size
+        self._mask: int = size - 1
+        self._start: int = 0  # oldest readable event, first event of the previous frame
+        self._frame_start: int = 0  # first event of the current frame
+        self._end: int = 0  # number the next event gets
+
+    def __str__(self) -> str:
+        return f'Events[{self._event_type.__name__}]: {len(self)} events'
+
+    __repr__ = __str__
+
+    def __len__(self) -> int:
+        """Number of readable events"""
+        return self._end - self._start
+
+    @staticmethod
+    def resource_name(event_type: type) -> str:
+        """Name to use for the channel in Access declarations"""
+        return f'events.{event_type.__name__}'
+
+    @property
+    def event_type(self) -> Type[T]:
+        return self._event_type
+
+    @property
+    def capacity(self) -> int:
+        return len(self._buffer)
+
+    def send(self, event: T) -> None:
+        if self._end - self._start > self._mask:
+            self._grow()
+        self._buffer[self._end & self._mask] = event
+        self._end += 1
+
+    def send_batch(self, events: Iterable[T]) -> None:
+        for event in events:
+            self.send(event)
+
+    def _grow(self) -> None:
+        buffer = self._buffer
+        mask = self._mask
+        new_mask = (mask + 1) * 2 - 1
+        new_buffer: List[Optional[T]] = [None] * (new_mask + 1)
+        for number in range(self._start, self._end):
+            new_buffer[number & new_mask] = buffer[number & mask]
+        self._buffer = new_buffer
+        self._mask = new_mask
+
+    def update(self) -> None:
+        """Start a new frame, dropping the events sent two frames ago"""
+        buffer = self._buffer
+        mask = self._mask
+        # drop references so the events can be collected
+        for number in range(self._start, self._frame_start):
+            buffer[number & mask] = None
+        self._start = self._frame_start
+        self._frame_start = self._end
+
+    def clear(self) -> None:
+        """Drop all events, readers will not see them"""
+        for number in range(self._start, self._end):
+            self._buffer[number & self._mask] = None
+        self._start = self._frame_start = self._end
+
+    def reader(self) -> EventReader[T]:
+        """Returns a reader that starts at the oldest readable event"""
+        return EventReader(self)
+
+    def __iter__(self) -> Iterator[T]:
+        """All readable events, oldest first, without moving any reader"""
+        buffer = self._buffer
+        mask = self._mask
+        return (buffer[number & mask] for number in range(self._start, self._end))
+
+
+class EventReader(Generic[T]):
+    """Cursor of one consumer into an Events channel"""
+    __slots__ = ['_events', '_cursor', '_missed']
+
+    def __init__(self, events: Events[T]) -> None:
+        self._events: Events[T] = events
+        self._cursor: int = events._start
+        self._missed: int = 0
+
+    def __len__(self) -> int:
+        """Number of events not read yet"""
+        return self._events._end - max(self._cursor, self._events._start)
+
+    @property
+    def missed(self) -> int:
+        """Events dropped before this reader got to them"""
+        return self._missed
+
+    def is_empty(self) -> bool:
+        return len(self) == 0
+
+    def read(self) -> Iterator[T]:
+        """Events sent since the last read, oldest first"""
+        events = self._events
+        start = self._cursor
+        if start < events._start:
+            self._missed += events._start - start
+            start = events._start
+        end = events._end
+        self._cursor = end
+        buffer = events._buffer
+        mask = events._mask
+        return (buffer[number & mask] for number in range(start, end))
+
+    def clear(self) -> None:
+        """Skip all unread events"""
+        self._cursor = self._events._end
@@ -0,0 +1,174 @@
+from __future__ import annotations
+from collections import deque
+import json
+import math
+import threading
+import time
+from typing import Deque, Dict, List, Tuple
+
+
+class Timings():
+    """Rolling window of durations in milliseconds"""
+    __slots__ = ['_samples', '_count', '_total']
+
+    def __init__(self, window: int) -> None:
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._count: int = 0
+        self._total: float = 0.0
+
+    def __str__(self) -> str:
+        return (f'n: {self._count} last: {self.last:.3f}ms mean: {self.mean:.3f}ms '
+                f'p95: {self.percentile(95):.3f}ms max: {self.max:.3f}ms')
+
+    def add(self, duration: float) -> None:
+        self._samples.append(duration)
+        self._count += 1
+        self._total += duration
+
+    @property
+    def count(self) -> int:
+        """Number of samples ever added"""
+        return self._count
+
+    @property
+    def total(self) -> float:
+        """Sum of all samples ever added"""
+        return self._total
+
+    @property
+    def samples(self) -> List[float]:
+        """Samples in the window"""
+        return list(self._samples)
+
+    @property
+    def last(self) -> float:
+        return self._samples[-1] if self._samples else 0.0
+
+    @property
+    def mean(self) -> float:
+        return sum(self._samples) / len(self._samples) if self._samples else 0.0
+
+    @property
+    def max(self) -> float:
+        return max(self._samples) if self._samples else 0.0
+
+    def percentile(self, percent: float) -> float:
+        """Nearest rank percentile of the window"""
+        if not self._samples:
+            return 0.0
+        ordered = sorted(self._samples)
+        return ordered[max(1, math.ceil(percent / 100 * len(ordered))) - 1]
+
+    def histogram(self, bins: int = 10) -> List[Tuple[float, int]]:
+        """Window as (bin upper edge in ms, count) pairs"""
+        if not self._samples:
+            return []
+        low = min(self._samples)
+        width = (self.max - low) / bins or 1.0
+        counts = [0] * bins
+        for sample in self._samples:
+            counts[min(bins - 1, int((sample - low) / width))] += 1
+        return [(low + width * (index + 1), count) for index, count in enumerate(counts)]
+
+
+class Profiler():
+    """Records wall time of systems and stages.
+
+    Add it as the ECS.RESOURCE_PROFILER resource and Executor and Schedule
+    start recording, remove it or set enabled to False to stop. Timings
+    keeps a rolling window per system ('stage:system'), per stage and per
+    frame. Each run is also kept as a trace event that can be exported in
+    the Chrome trace event format, open it in chrome://tracing or Perfetto.
+    """
+    def __init__(self, enabled: bool = True, window: int = 300, trace_capacity: int = 100_000) -> None:
+        self.enabled: bool = enabled
+        self._window: int = window
+        self._systems: Dict[str, Timings] = {}
+        self._stages: Dict[str, Timings] = {}
+        self._frames: Timings = Timings(window)
+        self._skips: Dict[str, int] = {}
+        # (name, category, start, duration, thread id), times are perf_counter seconds
+        self._trace: Deque[Tuple[str, str, float, float, int]] = deque(maxlen=trace_capacity)
+        self._origin: float = time.perf_counter()
+
+    def __str__(self) -> str:
+        lines = [f'frame: {self._frames}']
+        for name, timings in self._stages.items():
+            lines.append(f'  {name}: {timings}')
+            prefix = name + ':'
+            for system_name, system_timings in self._systems.items():
+                if system_name.startswith(prefix):
+                    lines.append(f'    {system_name[len(prefix):]}: {system_timings}')
+            for system_name, skips in self._skips.items():
+                if system_name.startswith(prefix):
+                    lines.append(f'    {system_name[len(prefix):]}: skipped {skips}')
+        return '\n'.join(lines)
+
+    @property
+    def systems(self) -> Dict[str, Timings]:
+        return self._systems
+
+    @property
+    def stages(self) -> Dict[str, Timings]:
+        return self._stages
+
+    @property
+    def frames(self) -> Timings:
+        return self._frames
+
+    @property
+    def skips(self) -> Dict[str, int]:
+        """Times each system ('stage:system') was skipped by its run criteria"""
+        return self._skips
+
+    def clear(self) -> None:
+        self._systems.clear()
+        self._stages.clear()
+        self._frames = Timings(self._window)
+        self._skips.clear()
+        self._trace.clear()
+
+    def _timings(self, table: Dict[str, Timings], name: str) -> Timings:
+        timings = table.get(name)
+        if timings is None:
+            timings = table.setdefault(name, Timings(self._window))
+        return timings
+
+    def record_system(self, stage: str, system: str, update_start: float,
+                      run_once_start: float, end: float) -> None:
+        """Record one run of a system, times are time.perf_counter() values"""
+        self._timings(self._systems, f'{stage}:{system}').add((end - update_start) * 1000)
+        thread = threading.get_ident()
+        self._trace.append((f'{system}.update', stage, update_start, run_once_start - update_start, thread))
+        self._trace.append((f'{system}.run_once', stage, run_once_start, end - run_once_start, thread))
+
+    def record_skip(self, stage: str, system: str) -> None:
+        """Record a system not running because of its run criteria"""
+        name = f'{stage}:{system}'
+        self._skips[name] = self._skips.get(name, 0) + 1
+        self._trace.append((f'{system}.skipped', stage, time.perf_counter(), 0.0, threading.get_ident()))
+
+    def record_stage(self, stage: str, start: float, end: float) -> None:
+        self._timings(self._stages, stage).add((end - start) * 1000)
+        self._trace.append((stage, 'stage', start, end - start, threading.get_ident()))
+
+    def record_frame(self, start: float, end: float) -> None:
+        self._frames.add((end - start) * 1000)
+        self._trace.append(('frame', 'frame', start, end - start, threading.get_ident()))
+
+    def chrome_trace(self) -> Dict:
+        """Trace in the Chrome trace event JSON format"""
+        origin = self._origin
+        events = [{'name': name,
+                   'cat': category,
+                   'ph': 'X',
+                   'ts': (start - origin) * 1_000_000,
+                   'dur': duration * 1_000_000,
+                   'pid': 0,
+                   'tid': thread}
+                  for name, category, start, duration, thread in list(self._trace)]
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def export_chrome_trace(self, filename: str) -> None:
+        with open(filename, 'w') as trace_file:
+            json.dump(self.chrome_trace(), trace_file)
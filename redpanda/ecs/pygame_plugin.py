@@ -1,6 +1,7 @@
-import random
+import os
 import pygame
 import pygame.time
+from redpanda.ecs.core import Access
 from redpanda.ecs.core import System
 from redpanda.ecs.core import Plugin
 from redpanda.ecs.core import AppBuilder
@@ -8,6 +9,7 @@ from redpanda.ecs.core import World
 from redpanda.ecs.core import Resources
 from redpanda.ecs.core import ECS
 from redpanda.ecs.core import register_atexit
+from redpanda.ecs.criteria import any_of, every_ms, resource_changed
 from redpanda.ecs.types import Controller
 from pygame_gui import UIManager
 from redpanda.timerregistery import TimerRegistry
@@ -17,6 +19,7 @@ logger = redpanda.logging.get_logger('pygame_plugin')
 
 class ResourceTypes:
     SYS_QUIT = 'sys.quit'
+    SYS_HEADLESS = 'sys.headless'
     SYS_CLOCK = 'sys.clock'
     SYS_TIMERS = 'sys.timers'
     SYS_RESOLUTION = 'sys.resolution'
@@ -24,6 +27,8 @@ class ResourceTypes:
     GAME_DIRECTORIES = 'sys.directories'
     GAME_TITLE = 'game.title'
     GAME_TIME_ELAPSED = 'game.time_elapsed'
+    GAME_FIXED_TIMESTEP = 'game.fixed_timestep'
+    GAME_INTERPOLATION_ALPHA = 'game.interpolation_alpha'
     GAME_BACKGROUND_MUSIC = 'game.music.background'
     GAME_CAMERA_TRACKING_ENTITY = 'game.camera.tracking_entity'
     RENDERER_SURFACE = 'renderer.surface'
@@ -31,10 +36,19 @@ class ResourceTypes:
 
 
 class PygamePlugin(Plugin):
-    def __init__(self) -> None:
+    """Pygame setup, input, timing and rendering systems.
+
+    With headless=True SDL's dummy video and audio drivers are used, the
+    renderer draws to an offscreen surface and frames are not slowed down
+    to a fixed frame rate. Used for benchmarks and CI without a display.
+    """
+    def __init__(self, headless: bool = False) -> None:
         super().__init__('PygamePlugin')
+        self._headless: bool = headless
 
     def build(self, app: AppBuilder):
+        headless = self._headless
+
         class Config(System):
             def __init__(self) -> None:
                 super().__init__('Config')
@@ -52,6 +66,11 @@ class PygamePlugin(Plugin):
                 super().__init__('PygameSetup')
 
             def initialize(self, world: World, resources: Resources) -> None:
+                resources[ResourceTypes.SYS_HEADLESS] = headless
+                if headless:
+                    # Must be set before pygame.init
+                    os.environ['SDL_VIDEODRIVER'] = 'dummy'
+                    os.environ['SDL_AUDIODRIVER'] = 'dummy'
                 pygame.mixer.pre_init(44100, -16, 2, 2048) # setup mixer to avoid sound lag
                 pygame.init()
                 pygame.font.init()
@@ -93,9 +112,15 @@ class PygamePlugin(Plugin):
             def run_once(self, world: World, resources: Resources) -> None:
                 if self._resolution_changed:
                     self._resolution_changed = False
-                    surface = pygame.display.set_mode((self._width, self._height))
+                    if headless:
+                        # A display mode is still needed for convert/convert_alpha
+                        pygame.display.set_mode((1, 1))
+                        surface = pygame.Surface((self._width, self._height))
+                        logger.info(f'{self.name} - offscreen surface created {self._width}x{self._height}')
+                    else:
+                        surface = pygame.display.set_mode((self._width, self._height))
+                        logger.info(f'{self.name} - window created {self._width}x{self._height}')
                     resources[ResourceTypes.RENDERER_SURFACE] = surface
-                    logger.info(f'{self.name} - window created {self._width}x{self._height}')
 
 
         class PygameWindowCaption(System):
@@ -103,6 +128,7 @@ class PygamePlugin(Plugin):
                 super().__init__('PygameWindowCaption')
                 self._caption: str = ''
                 self._caption_changed: bool = False
+                self.with_run_criteria(resource_changed(ResourceTypes.GAME_TITLE))
 
             def update(self, world: World, resources: Resources) -> None:
                 if self._caption != resources[ResourceTypes.GAME_TITLE]:
@@ -120,7 +146,8 @@ class PygamePlugin(Plugin):
                 super().__init__('PygameRendererFlip')
 
             def run_once(self, world: World, resources: Resources) -> None:
-                pygame.display.update()
+                if not headless:
+                    pygame.display.update()
 
 
         class PygameRenderer(System):
@@ -151,7 +178,12 @@ class PygamePlugin(Plugin):
                 super().__init__('PygameTimeElapsed')
             
             def run_once(self, world: World, resources: Resources) -> None:
-                resources[ResourceTypes.GAME_TIME_ELAPSED] = resources[ResourceTypes.SYS_CLOCK].get_time()
+                # A fixed timestep runner sets the step size, use it instead of the clock
+                fixed_timestep = resources.get(ResourceTypes.GAME_FIXED_TIMESTEP)
+                if fixed_timestep:
+                    resources[ResourceTypes.GAME_TIME_ELAPSED] = fixed_timestep
+                else:
+                    resources[ResourceTypes.GAME_TIME_ELAPSED] = resources[ResourceTypes.SYS_CLOCK].get_time()
 
 
         class PygameSleepToNextFrame(System):
@@ -160,7 +192,10 @@ class PygamePlugin(Plugin):
                 super().__init__('PygameSleepToNextFrame')
             
             def run_once(self, world: World, resources: Resources) -> None:
-                resources[ResourceTypes.SYS_CLOCK].tick(60)  # TODO Fix this by using config
+                if headless:
+                    resources[ResourceTypes.SYS_CLOCK].tick()  # keep time elapsed, no sleep
+                else:
+                    resources[ResourceTypes.SYS_CLOCK].tick(60)  # TODO Fix this by using config
 
 
         class PygameInput(System):
@@ -200,7 +235,10 @@ class PygamePlugin(Plugin):
             """Plays background music"""
             def __init__(self) -> None:
                 super().__init__('PygameBackgroundMusic')
-    
+                # Start right away when the music changes, otherwise poll whether it stopped
+                self.with_run_criteria(any_of(resource_changed(ResourceTypes.GAME_BACKGROUND_MUSIC),
+                                              every_ms(500)))
+
             def run_once(self, world: World, resources: Resources) -> None:
                 # TODO Make this better!!!
                 if not pygame.mixer.music.get_busy():
@@ -216,27 +254,13 @@ class PygamePlugin(Plugin):
             """Manages Registered Timers"""
             def __init__(self) -> None:
                 super().__init__('Timers')
+                self.set_access(Access(read_resources=(ResourceTypes.GAME_TIME_ELAPSED,),
+                                       write_resources=(ResourceTypes.SYS_TIMERS,)))
+                self.with_run_criteria(lambda world, resources: len(resources[ResourceTypes.SYS_TIMERS]) > 0)
 
             def run_once(self, world: World, resources: Resources) -> None:
-                timers = resources[ResourceTypes.SYS_TIMERS].timers
-                for id, timer in timers.items():
-                    # Check for timer reset first
-                    if timer.queue_reset:
-                        timer.queue_reset = False
-                        timer.expired = False
-                        if not timer.random_timeout:
-                            if timer.expired:
-                                timer.timer -= timer.timeout
-                            else:
-                                timer.timer = 0
-                        else:
-                            timer.timer = 0
-                            timer.timeout = random.uniform(timer.timer_range_begin, timer.timer_range_end)
-
-                    # Update timer and check for expiry
-                    timer.timer += resources[ResourceTypes.GAME_TIME_ELAPSED]
-                    if timer.timer >= timer.timeout:
-                        timer.expired = True
+                # Only the timers that expire are touched, see TimerRegistry
+                resources[ResourceTypes.SYS_TIMERS].advance(resources[ResourceTypes.GAME_TIME_ELAPSED])
 
 
 
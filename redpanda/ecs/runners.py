@@ -0,0 +1,159 @@
+import math
+import time
+from typing import Dict, List, Optional, Sequence
+from redpanda.ecs.core import App, ECS
+from redpanda.ecs.pygame_plugin import ResourceTypes
+import redpanda.logging
+
+
+logger = redpanda.logging.get_logger('ecs.runners')
+
+
+class FixedTimestepRunner():
+    """Runs simulation stages at a fixed rate and render stages once per
+    display frame.
+
+    Real elapsed time is accumulated and consumed in fixed steps, each
+    step runs every stage that is not a render stage with
+    GAME_TIME_ELAPSED set to the step size. The render stages then run
+    once with GAME_INTERPOLATION_ALPHA set to how far the simulation is
+    into the next step (0 to 1), so rendering can interpolate.
+
+    Frame time is clamped to max_frame_time seconds so a slow frame can
+    not start a spiral of ever more catch up steps, the simulation runs
+    slower than real time instead.
+
+    With a profiler, each pass of the loop (the steps it takes and the
+    render) is recorded as one frame.
+
+    Usage: AppBuilder.set_runner(FixedTimestepRunner(steps_per_second=120))
+    """
+    def __init__(self,
+                 steps_per_second: float = 60,
+                 render_stages: Sequence[str] = (ECS.STAGE_POST_UPDATE, ECS.STAGE_LAST),
+                 max_frame_time: float = 0.25) -> None:
+        self._step: float = 1.0 / steps_per_second
+        self._render_stages: List[str] = list(render_stages)
+        self._max_frame_time: float = max_frame_time
+
+    @property
+    def step(self) -> float:
+        """Step size in seconds"""
+        return self._step
+
+    def __call__(self, app: App) -> None:
+        resources = app.resources
+        step = self._step
+        step_ms = step * 1000
+        render_stages = self._render_stages
+        simulation_stages = [name for name in app.schedule.stage_names
+                             if name not in render_stages]
+        logger.info(f'Fixed timestep {step_ms:.2f}ms, simulation: {" ".join(simulation_stages)}, '
+                    f'render: {" ".join(render_stages)}')
+
+        resources[ResourceTypes.GAME_FIXED_TIMESTEP] = step_ms
+        accumulator = 0.0
+        clock = time.perf_counter
+        previous = clock()
+        while not resources.get(ResourceTypes.SYS_QUIT):
+            now = clock()
+            frame_time = now - previous
+            previous = now
+            if frame_time > self._max_frame_time:
+                frame_time = self._max_frame_time
+            accumulator += frame_time
+
+            while accumulator >= step:
+                resources[ResourceTypes.GAME_TIME_ELAPSED] = step_ms
+                app.update_stages(simulation_stages)
+                accumulator -= step
+
+            resources[ResourceTypes.GAME_INTERPOLATION_ALPHA] = accumulator / step
+            app.update_stages(render_stages)
+
+            profiler = resources.get(ECS.RESOURCE_PROFILER)
+            if profiler is not None and profiler.enabled:
+                profiler.record_frame(now, clock())
+
+
+class FrameTimeReport():
+    """Frame time statistics in milliseconds"""
+    def __init__(self, frame_times: List[float]) -> None:
+        self._frame_times: List[float] = sorted(frame_times)
+
+    def __str__(self) -> str:
+        return (f'frames: {self.frames} mean: {self.mean:.3f}ms p50: {self.p50:.3f}ms '
+                f'p95: {self.p95:.3f}ms p99: {self.p99:.3f}ms max: {self.max:.3f}ms')
+
+    @property
+    def frames(self) -> int:
+        return len(self._frame_times)
+
+    @property
+    def mean(self) -> float:
+        return sum(self._frame_times) / len(self._frame_times) if self._frame_times else 0.0
+
+    @property
+    def max(self) -> float:
+        return self._frame_times[-1] if self._frame_times else 0.0
+
+    @property
+    def p50(self) -> float:
+        return self.percentile(50)
+
+    @property
+    def p95(self) -> float:
+        return self.percentile(95)
+
+    @property
+    def p99(self) -> float:
+        return self.percentile(99)
+
+    def percentile(self, percent: float) -> float:
+        """Nearest rank percentile"""
+        if not self._frame_times:
+            return 0.0
+        rank = max(1, math.ceil(percent / 100 * len(self._frame_times)))
+        return self._frame_times[rank - 1]
+
+    def as_dict(self) -> Dict[str, float]:
+        return {'frames': self.frames, 'mean': self.mean, 'p50': self.p50,
+                'p95': self.p95, 'p99': self.p99, 'max': self.max}
+
+
+class BenchmarkRunner():
+    """Runs a fixed number of frames and reports frame time percentiles.
+
+    Combine with PygamePlugin(headless=True) to benchmark or soak test
+    without a display:
+
+        runner = BenchmarkRunner(frames=10000)
+        App.build().add_plugin(PygamePlugin(headless=True)).set_runner(runner).run()
+        print(runner.report)
+    """
+    def __init__(self, frames: int = 1000, warmup: int = 10) -> None:
+        self._frames: int = frames
+        self._warmup: int = warmup
+        self._report: Optional[FrameTimeReport] = None
+
+    @property
+    def report(self) -> Optional[FrameTimeReport]:
+        """Report of the last run"""
+        return self._report
+
+    def __call__(self, app: App) -> None:
+        resources = app.resources
+        for _ in range(self._warmup):
+            app.update()
+
+        frame_times: List[float] = []
+        clock = time.perf_counter
+        for _ in range(self._frames):
+            if resources.get(ResourceTypes.SYS_QUIT):
+                break
+            start = clock()
+            app.update()
+            frame_times.append((clock() - start) * 1000)
+
+        self._report = FrameTimeReport(frame_times)
+        logger.info(f'Benchmark {self._report}')
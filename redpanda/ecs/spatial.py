@@ -0,0 +1,141 @@
+from typing import Dict, Hashable, Iterator, KeysView, List, Set, Tuple
+from pygame.rect import Rect
+
+
+DEFAULT_CELL_SIZE = 64
+
+
+def _cells(rect: Rect, cell_size: int) -> Iterator[Tuple[int, int]]:
+    """Grid cells a non-empty rect overlaps"""
+    for cell_x in range(rect.x // cell_size, (rect.right - 1) // cell_size + 1):
+        for cell_y in range(rect.y // cell_size, (rect.bottom - 1) // cell_size + 1):
+            yield cell_x, cell_y
+
+
+class UniformGrid():
+    """Static uniform grid over a list of rects, used for map collision.
+
+    Each rect is stored in every cell it overlaps, a lookup only tests the
+    rects sharing a cell with the query rect instead of the whole list.
+    """
+    def __init__(self, rects: List[Rect], cell_size: int = DEFAULT_CELL_SIZE) -> None:
+        self._rects: List[Rect] = rects
+        self._cell_size: int = cell_size
+        self._cells: Dict[Tuple[int, int], List[int]] = {}
+        for index, rect in enumerate(rects):
+            if rect.width <= 0 or rect.height <= 0:
+                continue  # empty rects never collide
+            for cell in _cells(rect, cell_size):
+                self._cells.setdefault(cell, []).append(index)
+
+    def __len__(self) -> int:
+        return len(self._rects)
+
+    @property
+    def rects(self) -> List[Rect]:
+        return self._rects
+
+    @property
+    def cell_size(self) -> int:
+        return self._cell_size
+
+    def collidelist(self, rect: Rect) -> int:
+        """Same result as rect.collidelist(rects), index of the first
+        colliding rect or -1"""
+        if rect.width <= 0 or rect.height <= 0:
+            return -1
+        cells = self._cells
+        rects = self._rects
+        found = -1
+        for cell in _cells(rect, self._cell_size):
+            for index in cells.get(cell, ()):
+                if (found == -1 or index < found) and rect.colliderect(rects[index]):
+                    found = index
+        return found
+
+    def collides(self, rect: Rect) -> bool:
+        """Test if rect collides with any rect in the grid"""
+        if rect.width <= 0 or rect.height <= 0:
+            return False
+        cells = self._cells
+        rects = self._rects
+        for cell in _cells(rect, self._cell_size):
+            for index in cells.get(cell, ()):
+                if rect.colliderect(rects[index]):
+                    return True
+        return False
+
+
+class SpatialHash():
+    """Dynamic spatial hash of keyed rects, used for entity collision.
+
+    Updating a key only touches the cells when the rect moved into a
+    different set of cells.
+    """
+    def __init__(self, cell_size: int = DEFAULT_CELL_SIZE) -> None:
+        self._cell_size: int = cell_size
+        self._cells: Dict[Tuple[int, int], Set[Hashable]] = {}
+        self._items: Dict[Hashable, Tuple[Rect, Tuple[int, int, int, int]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._items
+
+    def keys(self) -> KeysView:
+        return self._items.keys()
+
+    def rect(self, key: Hashable) -> Rect:
+        return self._items[key][0]
+
+    def _span(self, rect: Rect) -> Tuple[int, int, int, int]:
+        cell_size = self._cell_size
+        return (rect.x // cell_size, (rect.right - 1) // cell_size,
+                rect.y // cell_size, (rect.bottom - 1) // cell_size)
+
+    def update(self, key: Hashable, rect: Rect) -> None:
+        """Insert key or move it to rect"""
+        span = self._span(rect)
+        item = self._items.get(key)
+        if item is not None:
+            if item[1] == span:
+                self._items[key] = (rect, span)
+                return
+            self._unlink(key, item[1])
+        self._items[key] = (rect, span)
+        cells = self._cells
+        for cell_x in range(span[0], span[1] + 1):
+            for cell_y in range(span[2], span[3] + 1):
+                cell = cells.get((cell_x, cell_y))
+                if cell is None:
+                    cells[(cell_x, cell_y)] = {key}
+                else:
+                    cell.add(key)
+
+    def remove(self, key: Hashable) -> None:
+        item = self._items.pop(key, None)
+        if item is not None:
+            self._unlink(key, item[1])
+
+    def _unlink(self, key: Hashable, span: Tuple[int, int, int, int]) -> None:
+        cells = self._cells
+        for cell_x in range(span[0], span[1] + 1):
+            for cell_y in range(span[2], span[3] + 1):
+                cell = cells[(cell_x, cell_y)]
+                cell.discard(key)
+                if not cell:
+                    del cells[(cell_x, cell_y)]
+
+    def query(self, rect: Rect) -> Set[Hashable]:
+        """Keys whose rect collides with rect"""
+        found: Set[Hashable] = set()
+        if rect.width <= 0 or rect.height <= 0:
+            return found
+        cells = self._cells
+        items = self._items
+        for cell in _cells(rect, self._cell_size):
+            for key in cells.get(cell, ()):
+                if key not in found and rect.colliderect(items[key][0]):
+                    found.add(key)
+        return found
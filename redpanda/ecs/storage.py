@@ -0,0 +1,73 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, Dict, FrozenSet, List, Optional, Tuple
+if TYPE_CHECKING:
+    from redpanda.ecs.core import Component, Entity
+
+
+class Archetype():
+    """Table of entities that share the exact same set of component names.
+
+    Every component name has its own column, row N of each column belongs
+    to the entity in row N of entities. Systems iterate the columns directly
+    instead of doing a dict lookup per component per entity.
+    """
+    __slots__ = ['_signature', '_columns', '_entities', '_add_edges', '_remove_edges']
+
+    def __init__(self, signature: FrozenSet[str]) -> None:
+        self._signature: FrozenSet[str] = signature
+        self._columns: Dict[str, List[Component]] = {name: [] for name in sorted(signature)}
+        self._entities: List[Entity] = []
+        # Archetype graph, caches where an entity goes when a component is added/removed
+        self._add_edges: Dict[str, Archetype] = {}
+        self._remove_edges: Dict[str, Archetype] = {}
+
+    def __str__(self) -> str:
+        return f'Archetype[{" ".join(self._columns.keys())}]: {len(self._entities)} entities'
+
+    def __len__(self) -> int:
+        return len(self._entities)
+
+    @property
+    def signature(self) -> FrozenSet[str]:
+        return self._signature
+
+    @property
+    def entities(self) -> List[Entity]:
+        return self._entities
+
+    @property
+    def columns(self) -> Dict[str, List[Component]]:
+        return self._columns
+
+    def column(self, name: str) -> List[Component]:
+        """Returns the column holding all components with the given name"""
+        return self._columns[name]
+
+    def matches(self, names: FrozenSet[str]) -> bool:
+        """Test if archetype holds at least the given component names"""
+        return names <= self._signature
+
+    def append(self, entity: Entity, components: Dict[str, Component]) -> int:
+        """Adds entity and its components as a new row, returns the row"""
+        for name, column in self._columns.items():
+            column.append(components[name])
+        self._entities.append(entity)
+        return len(self._entities) - 1
+
+    def swap_remove(self, row: int) -> Tuple[Dict[str, Component], Optional[Entity]]:
+        """Removes a row by moving the last row into its place.
+
+        Returns the removed components and the entity that now lives
+        in row, if any, so the caller can fix up its row index.
+        """
+        last = len(self._entities) - 1
+        components: Dict[str, Component] = {}
+        for name, column in self._columns.items():
+            components[name] = column[row]
+            column[row] = column[last]
+            column.pop()
+        entities = self._entities
+        entities[row] = entities[last]
+        entities.pop()
+        moved = entities[row] if row != last else None
+        return components, moved
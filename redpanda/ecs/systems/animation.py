@@ -1,31 +1,57 @@
-from redpanda.ecs.core import Resources, System, World
-from redpanda.ecs.core import ContainsComponentsQuery
+from typing import Dict
+from redpanda.ecs.core import Access, Changed, ContainsComponentsQuery, Entity, Resources, System, World
 from redpanda.ecs.pygame_plugin import ResourceTypes
 
 
 class SpriteAnimation(System):
+    """Advances the animation frame of moving entities.
+
+    Only entities whose movement changed since the last run are looked at
+    to keep track of which entities are moving, idle entities are not
+    visited every frame.
+    """
     def __init__(self) -> None:
         super().__init__('Animation')
+        self.set_access(Access(read_components=('sprite', 'direction', 'movement'),
+                               write_components=('animation',),
+                               read_resources=(ResourceTypes.GAME_TIME_ELAPSED,)))
+        components = ('animation',
+                      'sprite',
+                      'direction',
+                      'movement')  # TODO Should I really require movement component to animate?
+        self._names = frozenset(components)
+        self._movement_changed = ContainsComponentsQuery(*components, filter=Changed('movement'))
+        self._moving: Dict[int, Entity] = {}
 
     def run_once(self, world: World, resources: Resources) -> None:
-        entities = world.query(ContainsComponentsQuery('animation',
-                                                       'sprite',
-                                                       'direction',
-                                                       'movement'))  # TODO Should I really require movement component to animate?
         time_elapsed = resources[ResourceTypes.GAME_TIME_ELAPSED]
-        for entity in entities:
-            animation = entity.components['animation']
-            sprite = entity.components['sprite'].sprite
-            direction = entity.components['direction'].value
-            movement = entity.components['movement'].value
+        moving = self._moving
+        for entity in world.query(self._movement_changed):
+            if entity.components['movement'].value.length() > 0:
+                moving[entity.id] = entity
+            else:
+                moving.pop(entity.id, None)
+                entity.components['animation'].counter = 0  # Reset back to standing ASSUMPTION
+
+        stopped = []
+        names = self._names
+        for handle, entity in moving.items():
+            archetype = entity.archetype
+            if not names <= archetype.signature:  # despawned or lost a component
+                stopped.append(handle)
+                continue
+            columns = archetype.columns
+            row = entity._row
+            animation = columns['animation'][row]
+            sprite = columns['sprite'][row].sprite
+            direction = columns['direction'][row].value
             # TODO determine state based on other components, for now leave it as idle
             frames = sprite.animation_set(animation.action).direction(direction).frames
-            if movement.length() > 0:
-                animation.timer += time_elapsed
-                timeout = 200  # TODO get timeout from animation
-                if animation.timer > timeout:
-                    animation.timer -= timeout
-                    animation.counter = (animation.counter + 1) % len(frames)
-                animation.counter = animation.counter % len(frames)  # TODO instead when direction changes counter should reset
-            else:
-                animation.counter = 0  # Reset back to standing ASSUMPTION
+            animation.timer += time_elapsed
+            timeout = 200  # TODO get timeout from animation
+            if animation.timer > timeout:
+                animation.timer -= timeout
+                animation.counter = (animation.counter + 1) % len(frames)
+            animation.counter = animation.counter % len(frames)  # TODO instead when direction changes counter should reset
+        for handle in stopped:
+            del moving[handle]
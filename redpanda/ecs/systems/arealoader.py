@@ -1,80 +1,265 @@
-from redpanda.ecs.core import Resources, System, World
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from enum import IntEnum
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+import functools
+import time
+from redpanda.ecs.core import Area, Resources, System, World
 from redpanda.ecs.pygame_plugin import ResourceTypes
 import pygame
 import pytmx
+import pytmx.util_pygame
 import pyscroll
 import redpanda.logging
-from redpanda.ecs.types import PyScrollMap
+from redpanda.ecs.events import EventReader
+from redpanda.ecs.types import AreaLoadEvent, PyScrollMap
+from redpanda.ecs.spatial import DEFAULT_CELL_SIZE, UniformGrid
 
 
 logger = redpanda.logging.get_logger('ecs.system.AreaLoader')
 
 
+class AreaLoadState(IntEnum):
+    queued = 0
+    loading = 1     # reading the map on the worker
+    finalizing = 2  # converting tiles and building the renderer on the main thread
+    ready = 3
+    failed = 4
+
+
+def _deferred_image_loader(pending: Dict[int, Tuple], filename: str, colorkey, **kwargs):
+    """pytmx image loader that only decodes, safe off the main thread.
+
+    Tiles are converted to the display format when the area is finalized,
+    the arguments for that are kept in pending by id of the tile.
+    """
+    if colorkey:
+        colorkey = pygame.Color('#{0}'.format(colorkey))
+    pixelalpha = kwargs.get('pixelalpha', True)
+    image = pygame.image.load(filename)
+
+    def load_image(rect=None, flags=None):
+        tile = image.subsurface(rect) if rect else image.copy()
+        if flags:
+            tile = pytmx.util_pygame.handle_transformation(tile, flags)
+        pending[id(tile)] = (colorkey, pixelalpha)
+        return tile
+
+    return load_image
+
+
+class _AreaLoad():
+    """Loading of one area"""
+    def __init__(self, area: Area, prefetch: bool) -> None:
+        self.area: Area = area
+        self.prefetch: bool = prefetch
+        self.state: AreaLoadState = AreaLoadState.queued
+        self.future: Optional[Future] = None
+        self.steps: Optional[Iterator[None]] = None
+        self.doors: List[Tuple[pygame.Rect, str]] = []
+
+
 # TODO should this belong in redpanda.ecs.systems or in a higher layer's system?
 
 class AreaLoader(System):
-    """Loads areas queued"""
-    def __init__(self) -> None:
+    """Loads areas in the background.
+
+    An AreaLoadEvent queues the area, the TMX file is read and its tiles
+    decoded on a worker thread, then the tiles are converted and the
+    renderer built on the main thread, a step at a time within
+    finalize_budget_ms per frame. Once ready the area gets its map.
+
+    An area that is not a prefetch is needed now, as soon as its worker is
+    done it is finalized in one go. Prefetch queues the areas behind the
+    doors within prefetch_distance of the camera tracking entity, so they
+    are ready when it walks through. Doors name their area with the
+    door_property object property.
+
+    At most max_loaded_areas maps are kept, the least recently current
+    areas are unloaded first. The current area, the areas behind its doors
+    and areas requested but not entered yet are never unloaded.
+    """
+    TILES_PER_STEP = 64
+
+    def __init__(self,
+                 collision_cell_size: int = DEFAULT_CELL_SIZE,
+                 workers: int = 1,
+                 finalize_budget_ms: float = 2.0,
+                 prefetch_distance: float = 256,
+                 door_property: str = 'area',
+                 max_loaded_areas: int = 4) -> None:
         super().__init__('AreaLoader')
+        self._collision_cell_size = collision_cell_size
+        self._workers: int = workers
+        self._finalize_budget: float = finalize_budget_ms / 1000
+        self._prefetch_distance: float = prefetch_distance
+        self._door_property: str = door_property
+        self._max_loaded_areas: int = max_loaded_areas
+        self._reader: EventReader[AreaLoadEvent]
+        self._pool: Optional[ThreadPoolExecutor] = None
+        # least recently current first
+        self._loads: OrderedDict[str, _AreaLoad] = OrderedDict()
+        # requested, not a prefetch, and not entered yet
+        self._wanted: Set[str] = set()
 
     def initialize(self, world: World, resources: Resources) -> None:
-        resources['area_loader_list'] = list()
+        self._reader = resources.events(AreaLoadEvent).reader()
+        self._pool = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix='area-loader')
         logger.info('Initialized')
 
-    def run_once(self, world: World, resources: Resources) -> None:
-        # I need the area
-        # I need the resource for area loading queue
-        # Add to area walls
-        # Add to world entities
-        # Add to area entities
-        for area_name in resources['area_loader_list']:
-            # something to do
-            area = world.find_area(area_name)
-            # TODO Move this to a system so that it can access resources
-            # viewport = (resources[ResourceTypes.SYS_RESOLUTION]['width'],
-            #             resources[ResourceTypes.SYS_RESOLUTION]['height'])
-            viewport = (640, 480)  # TODO read from resources
-
-            tmx_data = pytmx.util_pygame.load_pygame(area.map_filename)
-            map_data = pyscroll.data.TiledMapData(tmx_data)
-            map_layer = pyscroll.BufferedRenderer(map_data,
-                                                  viewport,
-                                                  clamp_camera=True)
-            map_layer.zoom = 3  # TODO read from config
-            main_group = pyscroll.PyscrollGroup(map_layer=map_layer, default_layer=4)
-
-            walls = list()
-            doors = list()
-            stationary_collision_list = list()
-            #area_entities = list()
-            for object in tmx_data.objects:
-                if object.type == 'SolidCollision':
-                    walls.append(
-                        pygame.Rect(
-                            object.x, object.y,
-                            object.width, object.height
-                        )
-                    )
-                elif object.type == 'Entity':
-                    logger.info(f'entity: {str(object)}')
-                elif object.type == 'Door':
-                    logger.info(f'door: {str(object)}')
-                    doors.append(
-                        pygame.Rect(
-                            object.x, object.y,
-                            object.width, object.height
-                        )
+    def state(self, area_name: str) -> Optional[AreaLoadState]:
+        load = self._loads.get(area_name)
+        return load.state if load is not None else None
+
+    def request(self, world: World, area_name: str, prefetch: bool = False) -> None:
+        """Queue an area, a request that is not a prefetch makes a queued
+        prefetch urgent. Areas that failed to load are tried again."""
+        if not prefetch:
+            self._wanted.add(area_name)
+        load = self._loads.get(area_name)
+        if load is not None and load.state != AreaLoadState.failed:
+            if not prefetch:
+                load.prefetch = False
+            return
+        area = world.find_area(area_name)
+        if area is None:
+            logger.error(f'Invalid area: {area_name}')
+            return
+        load = _AreaLoad(area, prefetch)
+        self._loads[area_name] = load
+        if area.map is not None:
+            # loaded by someone else
+            load.state = AreaLoadState.ready
+            return
+        load.future = self._pool.submit(self._read, load)
+        logger.info(f'{"Prefetching" if prefetch else "Loading"} area {area_name}')
+
+    def _read(self, load: _AreaLoad):
+        """Worker: read the map, decode its tiles and collect its objects"""
+        load.state = AreaLoadState.loading
+        pending: Dict[int, Tuple] = {}
+        tmx_data = pytmx.TiledMap(load.area.map_filename, image_loader=functools.partial(_deferred_image_loader, pending))
+
+        walls = list()
+        doors = list()
+        for object in tmx_data.objects:
+            if object.type == 'SolidCollision':
+                walls.append(
+                    pygame.Rect(
+                        object.x, object.y,
+                        object.width, object.height
                     )
-                    #entity = Entity()
-                    #self._area_entities.append(
-                        
-                    #)
+                )
+            elif object.type == 'Entity':
+                logger.info(f'entity: {str(object)}')
+            elif object.type == 'Door':
+                logger.info(f'door: {str(object)}')
+                doors.append((pygame.Rect(object.x, object.y, object.width, object.height),
+                              object.properties.get(self._door_property)))
+
+        stationary_collision_list = list()
+        stationary_collision_list.extend(walls)
+        stationary_collision_list.extend(rect for rect, _ in doors)
+        stationary_collision_grid = UniformGrid(stationary_collision_list, self._collision_cell_size)
+        return tmx_data, pending, doors, stationary_collision_list, stationary_collision_grid
+
+    def _finalize(self, load: _AreaLoad) -> Iterator[None]:
+        """Main thread: a step per next, the area has its map at the end"""
+        tmx_data, pending, doors, stationary_collision_list, stationary_collision_grid = load.future.result()
+        images = tmx_data.images
+        for index, image in enumerate(images):
+            if image is None:
+                continue
+            colorkey, pixelalpha = pending.pop(id(image), (None, True))
+            images[index] = pytmx.util_pygame.smart_convert(image, colorkey, pixelalpha)
+            if index % self.TILES_PER_STEP == 0:
+                yield
+
+        map_data = pyscroll.data.TiledMapData(tmx_data)
+        yield
+        # TODO Move this to a system so that it can access resources
+        # viewport = (resources[ResourceTypes.SYS_RESOLUTION]['width'],
+        #             resources[ResourceTypes.SYS_RESOLUTION]['height'])
+        viewport = (640, 480)  # TODO read from resources
+        map_layer = pyscroll.BufferedRenderer(map_data,
+                                              viewport,
+                                              clamp_camera=True)
+        map_layer.zoom = 3  # TODO read from config
+        main_group = pyscroll.PyscrollGroup(map_layer=map_layer, default_layer=4)
+        yield
+
+        load.doors = doors
+        load.area.map = PyScrollMap(tmx_data, map_data, map_layer, main_group,
+                                    stationary_collision_list, stationary_collision_grid)
+
+    def _step(self, load: _AreaLoad, deadline: Optional[float]) -> None:
+        """Advance the load, until deadline or to the end when there is none"""
+        if load.state in (AreaLoadState.queued, AreaLoadState.loading):
+            if not load.future.done():
+                return
+            if load.future.exception() is not None:
+                load.state = AreaLoadState.failed
+                logger.error(f'Unable to load area {load.area.name}: {load.future.exception()}')
+                return
+            load.state = AreaLoadState.finalizing
+            load.steps = self._finalize(load)
+        if load.state != AreaLoadState.finalizing:
+            return
+        for _ in load.steps:
+            if deadline is not None and time.perf_counter() >= deadline:
+                return
+        load.state = AreaLoadState.ready
+        load.steps = None
+        logger.info(f'Area {load.area.name} ready')
+
+    def _prefetch_doors(self, world: World, resources: Resources) -> None:
+        tracking_entity = resources.get(ResourceTypes.GAME_CAMERA_TRACKING_ENTITY)
+        if tracking_entity is None:
+            return
+        load = self._loads.get(world.current_area_name)
+        if load is None or load.state != AreaLoadState.ready:
+            return
+        center = pygame.Vector2(tracking_entity.rect.center)
+        for rect, area_name in load.doors:
+            if area_name and area_name not in self._loads and \
+                    center.distance_to(rect.center) <= self._prefetch_distance:
+                self.request(world, area_name, prefetch=True)
+
+    def run_once(self, world: World, resources: Resources) -> None:
+        for event in self._reader.read():
+            self.request(world, event.area, event.prefetch)
 
-            stationary_collision_list.extend(walls)
-            stationary_collision_list.extend(doors)
-            
-            map = PyScrollMap(tmx_data, map_data, map_layer, main_group, stationary_collision_list)
+        deadline = time.perf_counter() + self._finalize_budget
+        for load in list(self._loads.values()):
+            if load.state in (AreaLoadState.ready, AreaLoadState.failed):
+                continue
+            if not load.prefetch:
+                self._step(load, None)
+            elif time.perf_counter() < deadline:
+                self._step(load, deadline)
 
-            area.map = map
+        self._wanted.discard(world.current_area_name)
+        current = self._loads.get(world.current_area_name)
+        if current is not None:
+            self._loads.move_to_end(current.area.name)
+        self._prefetch_doors(world, resources)
+        self._evict(world)
 
-        resources['area_loader_list'].clear()
+    def _evict(self, world: World) -> None:
+        loaded = [load for load in self._loads.values() if load.state == AreaLoadState.ready]
+        excess = len(loaded) - self._max_loaded_areas
+        if excess <= 0:
+            return
+        keep = {world.current_area_name} | self._wanted
+        current = self._loads.get(world.current_area_name)
+        if current is not None:
+            keep.update(area_name for _, area_name in current.doors)
+        for load in loaded:
+            if excess <= 0:
+                break
+            if load.area.name in keep:
+                continue
+            logger.info(f'Unloading area {load.area.name}')
+            load.area.map = None
+            del self._loads[load.area.name]
+            excess -= 1
@@ -0,0 +1,80 @@
+from typing import Dict, Set, Tuple
+from pygame import Rect
+from redpanda.ecs.core import Access, Changed, ContainsComponentsQuery, Resources, System, World
+from redpanda.ecs.events import Events
+from redpanda.ecs.spatial import DEFAULT_CELL_SIZE, SpatialHash
+from redpanda.ecs.types import EntityCollisionEvent
+import redpanda.logging
+
+
+logger = redpanda.logging.get_logger('ecs.system.EntityCollision')
+
+
+class EntityCollision(System):
+    """Broadphase entity to entity collision using the feet rects.
+
+    Keeps a spatial hash per area. Only entities whose location, sprite,
+    animation or direction changed since the last run are visited, the
+    feet depend on all of them. Each run, for every entity whose feet moved
+    or changed size, an EntityCollisionEvent is sent to
+    resources.events(EntityCollisionEvent) for every entity its feet overlap.
+    Pairs where neither entity moved are not reported again.
+    """
+    def __init__(self, cell_size: int = DEFAULT_CELL_SIZE) -> None:
+        super().__init__('EntityCollision')
+        self._cell_size = cell_size
+        self._hashes: Dict[str, SpatialHash] = {}
+        # handle -> (area, feet) at the last update
+        self._feet: Dict[int, Tuple[str, Rect]] = {}
+        names = ('location', 'sprite', 'animation', 'direction')
+        self._names = names
+        self._changed = ContainsComponentsQuery(*names, filter=Changed(*names))
+        # feet reads the sprite, animation and direction
+        self.set_access(Access(read_components=('location', 'sprite', 'animation', 'direction'),
+                               write_resources=(Events.resource_name(EntityCollisionEvent),)))
+
+    def initialize(self, world: World, resources: Resources) -> None:
+        resources.events(EntityCollisionEvent)
+        logger.info('Initialized')
+
+    def _hash(self, area: str) -> SpatialHash:
+        spatial_hash = self._hashes.get(area)
+        if spatial_hash is None:
+            spatial_hash = self._hashes[area] = SpatialHash(self._cell_size)
+        return spatial_hash
+
+    def run_once(self, world: World, resources: Resources) -> None:
+        events = resources.events(EntityCollisionEvent)
+        tracked = self._feet
+        moved = []
+        for entity in world.query(self._changed):
+            handle = entity.id
+            area = entity.components['location'].area
+            feet = entity.feet
+            last = tracked.get(handle)
+            if last is not None:
+                if last[0] == area and last[1] == feet:
+                    continue
+                if last[0] != area:
+                    self._hash(last[0]).remove(handle)
+            tracked[handle] = (area, feet)
+            self._hash(area).update(handle, feet)
+            moved.append((handle, area, feet))
+
+        # Forget despawned entities and those that lost a component, only
+        # scanned when the counts differ
+        columns = world.query_columns(*self._names)
+        if sum(len(entities) for entities, _ in columns) != len(tracked):
+            live: Set[int] = {entity.id for entities, _ in columns for entity in entities}
+            for handle in [handle for handle in tracked if handle not in live]:
+                self._hash(tracked.pop(handle)[0]).remove(handle)
+
+        reported: Set[Tuple[int, int]] = set()
+        for handle, area, feet in moved:
+            for other in self._hashes[area].query(feet):
+                if other == handle:
+                    continue
+                pair = (handle, other) if handle < other else (other, handle)
+                if pair not in reported:
+                    reported.add(pair)
+                    events.send(EntityCollisionEvent(*pair))
@@ -1,9 +1,11 @@
 import random
+from typing import Dict
 from pygame.math import Vector3
-from redpanda.ecs.core import Resources, System, World
-from redpanda.ecs.core import ContainsComponentsQuery
+from redpanda.ecs.core import Access, Entity, Resources, System, World
+from redpanda.ecs.core import Added, ContainsComponentsQuery
 from redpanda.ecs.pygame_plugin import ResourceTypes
 from redpanda.ecs.types import Direction
+from redpanda.timerregistery import TimerRegistry
 
 
 class PlayerInput(System):
@@ -14,6 +16,9 @@ class PlayerInput(System):
     def __init__(self) -> None:
         super().__init__('PlayerInput')
         self._type = 'fluid'  # vs 'priority # TODO make this configurable
+        self.set_access(Access(read_components=('controller',),
+                               write_components=('direction', 'movement'),
+                               read_resources=[ResourceTypes.CONTROLLER_PREFIX + str(i) for i in range(1, 5)]))
 
     def run_once(self, world: World, resources: Resources) -> None:
         # Find all entities with controller, direction, and movement
@@ -69,25 +74,60 @@ class PlayerInput(System):
 class RandomInput(System):
     def __init__(self) -> None:
         super().__init__('RandomInput')
-        self._timer: float = 0
-        self._timeout: float 
+        # Expired timers are reset
+        self.set_access(Access(read_components=('random_direction_timer',),
+                               write_components=('direction', 'movement'),
+                               write_resources=(ResourceTypes.SYS_TIMERS,)))
+        self._names = frozenset(('random_direction_timer', 'direction', 'movement'))
+        self._added = ContainsComponentsQuery(*self._names, filter=Added('random_direction_timer'))
+        # timer handle -> entity
+        self._entities: Dict[int, Entity] = {}
+        # entities tracked after the last sweep of stale ones
+        self._swept_size: int = 0
+
+    def _tracks(self, world: World, timers: TimerRegistry, handle: int, entity: Entity) -> bool:
+        """False once the entity is despawned, lost a component or the timer was replaced or removed"""
+        return (world.contains(entity)
+                and handle in timers
+                and self._names <= entity.archetype.signature
+                and entity.components['random_direction_timer'].id == handle)
 
     def run_once(self, world: World, resources: Resources) -> None:
-        entities = world.query(ContainsComponentsQuery('random_direction_timer',
-                                                       'direction',
-                                                       'movement'))
-        for entity in entities:
-            # TODO read the type of random input????
-            direction_timer = resources[ResourceTypes.SYS_TIMERS].timer(entity.components['random_direction_timer'].id)
-            if direction_timer.expired:
-                direction_timer.queue_reset = True
-                new_direction = random.choice(list(Direction))
-                entity.components['direction'].value = new_direction
-                if new_direction == Direction.up:
-                    entity.components['movement'].value = Vector3(0, -1, 0)
-                elif new_direction == Direction.down:
-                    entity.components['movement'].value = Vector3(0, 1, 0)
-                elif new_direction == Direction.left:
-                    entity.components['movement'].value = Vector3(-1, 0, 0)
-                elif new_direction == Direction.right:
-                    entity.components['movement'].value = Vector3(1, 0, 0)
+        timers = resources[ResourceTypes.SYS_TIMERS]
+        # Only entities whose timer expired are visited, new ones are picked
+        # up through the Added filter
+        for entity in world.query(self._added):
+            handle = entity.components['random_direction_timer'].id
+            self._entities[handle] = entity
+            if timers.is_expired(handle):
+                self._change_direction(entity, timers, handle)
+        # Drained so that timers expiring over several advances are not missed
+        for handle in timers.drain_fired():
+            entity = self._entities.get(handle)
+            if entity is None:
+                continue
+            if not self._tracks(world, timers, handle, entity):
+                del self._entities[handle]
+                continue
+            if timers.is_expired(handle):
+                self._change_direction(entity, timers, handle)
+        # Entities whose timer never fires again are swept once the map has
+        # doubled since the last sweep, amortized over the runs
+        if len(self._entities) > 2 * self._swept_size:
+            self._entities = {handle: entity for handle, entity in self._entities.items()
+                              if self._tracks(world, timers, handle, entity)}
+            self._swept_size = max(len(self._entities), 16)
+
+    def _change_direction(self, entity: Entity, timers: TimerRegistry, handle: int) -> None:
+        # TODO read the type of random input????
+        timers.reset(handle)
+        new_direction = random.choice(list(Direction))
+        entity.components['direction'].value = new_direction
+        if new_direction == Direction.up:
+            entity.components['movement'].value = Vector3(0, -1, 0)
+        elif new_direction == Direction.down:
+            entity.components['movement'].value = Vector3(0, 1, 0)
+        elif new_direction == Direction.left:
+            entity.components['movement'].value = Vector3(-1, 0, 0)
+        elif new_direction == Direction.right:
+            entity.components['movement'].value = Vector3(1, 0, 0)
@@ -1,31 +1,166 @@
+from itertools import chain
 from pygame.math import Vector3
-from redpanda.ecs.core import Resources, System, World
-from redpanda.ecs.core import ContainsComponentsQuery
+from redpanda.ecs.core import Access, Resources, System, World
 from redpanda.ecs.pygame_plugin import ResourceTypes
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, only needed for VectorizedEntityMovement
+    np = None
 
 
 class EntityMovement(System):
     def __init__(self) -> None:
         super().__init__('PlayerMovement')
+        # feet reads the sprite, animation and direction
+        self.set_access(Access(read_components=('speed', 'movement', 'sprite', 'animation', 'direction'),
+                               write_components=('velocity', 'location'),
+                               read_resources=(ResourceTypes.GAME_TIME_ELAPSED,)))
 
     def run_once(self, world: World, resources: Resources) -> None:
         # Use resources for controller to apply to velocity
         # Update position with current velocity
         # Consider acceleration
-        entities = world.query(ContainsComponentsQuery('velocity',
-                                                       'speed',
-                                                       'location',
-                                                       'movement'))
-        for entity in entities:
-            # old_velocity = entity.components['velocity']
-            entity.components['velocity'] = entity.components['speed']
-            time_elapsed_seconds = resources[ResourceTypes.GAME_TIME_ELAPSED] / 1000
-            location = entity.components['location']
-            velocity = entity.components['velocity']
-            movement = entity.components['movement']
-
-            delta = movement.value * (velocity.value * Vector3(time_elapsed_seconds))
-            location.position += delta
-            # TODO handle wall sliding
-            if world.collide_check(entity.feet):
-                location.position -= delta
+        time_elapsed_seconds = Vector3(resources[ResourceTypes.GAME_TIME_ELAPSED] / 1000)
+        for entities, columns in world.query_columns('velocity',
+                                                     'speed',
+                                                     'location',
+                                                     'movement'):
+            velocities, speeds, locations, movements = columns
+            for row, entity in enumerate(entities):
+                # old_velocity = velocities[row]
+                velocity = velocities[row]
+                speed = speeds[row].value
+                if velocity.value != speed:
+                    # through the setter so Changed('velocity') sees it, a copy so the two never alias
+                    velocity.value = Vector3(speed)
+                location = locations[row]
+                movement = movements[row]
+
+                delta = movement.value * (velocity.value * time_elapsed_seconds)
+                if not delta.length_squared():
+                    continue  # not moving, leave the cached rect alone
+                location.position += delta
+                # TODO handle wall sliding
+                if world.collide_check(entity.feet):
+                    location.position -= delta
+
+
+class VectorizedEntityMovement(System):
+    """NumPy version of EntityMovement for large numbers of entities.
+
+    Location, movement and speed of every matching entity are packed into
+    preallocated arrays, integrated with one batched expression and the
+    resulting feet rects are tested against the static collision geometry
+    of the current area in bulk. Only entities that actually moved get their
+    location written back. EntityMovement is the reference implementation,
+    results match it up to the float precision of dtype.
+    """
+    COLLISION_CHUNK = 4096
+
+    def __init__(self, dtype=None) -> None:
+        super().__init__('VectorizedMovement')
+        if np is None:
+            raise ImportError('VectorizedEntityMovement requires numpy')
+        self._dtype = dtype or np.float32
+        self._position = np.empty((0, 3), dtype=self._dtype)
+        self._movement = np.empty((0, 3), dtype=self._dtype)
+        self._speed = np.empty(0, dtype=self._dtype)
+        self._size = np.empty((0, 2), dtype=np.int32)
+        self._collision_list = None
+        self._collision_rects = np.empty((0, 4), dtype=np.int32)
+        # feet reads the sprite, animation and direction
+        self.set_access(Access(read_components=('speed', 'movement', 'sprite', 'animation', 'direction'),
+                               write_components=('velocity', 'location'),
+                               read_resources=(ResourceTypes.GAME_TIME_ELAPSED,)))
+
+    def _reserve(self, count: int) -> None:
+        """Grow the packed arrays, they are reused between frames"""
+        if len(self._speed) < count:
+            capacity = max(count, 2 * len(self._speed))
+            self._position = np.empty((capacity, 3), dtype=self._dtype)
+            self._movement = np.empty((capacity, 3), dtype=self._dtype)
+            self._speed = np.empty(capacity, dtype=self._dtype)
+            self._size = np.empty((capacity, 2), dtype=np.int32)
+
+    def _static_rects(self, world: World):
+        """Static collision rects of the current area as an (M, 4) array"""
+        area_map = world.current_area.map
+        if area_map is None:
+            return None
+        collision_list = area_map.stationary_collision_list
+        if collision_list is not self._collision_list:
+            self._collision_list = collision_list
+            self._collision_rects = np.array([tuple(rect) for rect in collision_list],
+                                             dtype=np.int32).reshape(-1, 4)
+        return self._collision_rects
+
+    @staticmethod
+    def feet_rects(position: 'np.ndarray', size: 'np.ndarray') -> 'np.ndarray':
+        """Entity.feet of packed positions (N, 2 or 3) and image sizes (N, 2)
+        as an (N, 4) array of x, y, width, height"""
+        width, height = size[:, 0], size[:, 1]
+        # Same integer math as Entity.rect and Entity.feet
+        left = np.trunc(position[:, 0]).astype(np.int32)
+        bottom = np.trunc(position[:, 1]).astype(np.int32) + height
+        feet_width = np.trunc(width * 0.7).astype(np.int32)
+        feet_height = np.trunc(height * 0.3).astype(np.int32)
+        return np.stack([left + width // 2 - feet_width // 2,
+                         bottom - feet_height,
+                         feet_width,
+                         feet_height], axis=1)
+
+    def _collides(self, feet: 'np.ndarray', rects: 'np.ndarray') -> 'np.ndarray':
+        """Batched Rect.collidelist, returns a bool per feet rect"""
+        hit = np.zeros(len(feet), dtype=bool)
+        if not len(rects) or not len(feet):
+            return hit
+        rx, ry = rects[:, 0], rects[:, 1]
+        rr, rb = rx + rects[:, 2], ry + rects[:, 3]
+        for begin in range(0, len(feet), self.COLLISION_CHUNK):
+            chunk = feet[begin:begin + self.COLLISION_CHUNK]
+            fx, fy = chunk[:, 0:1], chunk[:, 1:2]
+            fr, fb = fx + chunk[:, 2:3], fy + chunk[:, 3:4]
+            overlap = (fx < rr) & (rx < fr) & (fy < rb) & (ry < fb)
+            hit[begin:begin + len(chunk)] = overlap.any(axis=1)
+        return hit
+
+    def run_once(self, world: World, resources: Resources) -> None:
+        time_elapsed_seconds = resources[ResourceTypes.GAME_TIME_ELAPSED] / 1000
+        for entities, columns in world.query_columns('velocity',
+                                                     'speed',
+                                                     'location',
+                                                     'movement'):
+            velocities, speeds, locations, movements = columns
+            for velocity, component in zip(velocities, speeds):
+                if velocity.value != component.value:
+                    velocity.value = Vector3(component.value)
+            count = len(entities)
+            self._reserve(count)
+            position = self._position[:count]
+            movement = self._movement[:count]
+            speed = self._speed[:count]
+            size = self._size[:count]
+
+            position.reshape(-1)[:] = np.fromiter(chain.from_iterable(location.position for location in locations),
+                                                  dtype=self._dtype, count=3 * count)
+            movement.reshape(-1)[:] = np.fromiter(chain.from_iterable(component.value for component in movements),
+                                                  dtype=self._dtype, count=3 * count)
+            # Vector3 * Vector3 is a dot product, so delta is movement * (speed . (t, t, t))
+            speed[:] = np.fromiter((component.x + component.y + component.z for component in speeds),
+                                   dtype=self._dtype, count=count)
+            speed *= time_elapsed_seconds
+
+            moving = np.flatnonzero(np.any(movement != 0, axis=1) & (speed != 0))
+            if not len(moving):
+                continue
+            moved = position[moving] + movement[moving] * speed[moving, np.newaxis]
+
+            rects = self._static_rects(world)
+            if rects is not None and len(rects):
+                size[moving] = [entities[index].image.get_size() for index in moving.tolist()]
+                blocked = self._collides(self.feet_rects(moved, size[moving]), rects)
+                moving = moving[~blocked]
+                moved = moved[~blocked]
+
+            for index, (x, y, z) in zip(moving.tolist(), moved.tolist()):
+                locations[index].position = Vector3(x, y, z)
@@ -1,6 +1,7 @@
+from typing import Optional
 from redpanda.ecs.core import Resources, System, World
-from redpanda.ecs.pygame_plugin import ResourceTypes
-from redpanda.ecs.types import WorldMovementEvent
+from redpanda.ecs.events import EventReader
+from redpanda.ecs.types import AreaLoadEvent, WorldMovementEvent
 import redpanda.logging
 
 
@@ -10,17 +11,31 @@ logger = redpanda.logging.get_logger('ecs.system.WorldMovement')
 # TODO should this belong in redpanda.ecs.systems or in a higher layer's system?
 
 class WorldMovement(System):
-    """Loads areas queued"""
+    """Moves the world to another area.
+
+    The area's map is loaded in the background by AreaLoader, the area is
+    entered once its map is there so nothing moves or renders without
+    collision or tiles. Until then the current area stays.
+    """
     def __init__(self) -> None:
         super().__init__('WorldMovement')
+        self._reader: EventReader[WorldMovementEvent]
+        self._entering: Optional[str] = None
 
     def initialize(self, world: World, resources: Resources) -> None:
-        resources['world_movement_list'] = list()
+        self._reader = resources.events(WorldMovementEvent).reader()
         logger.info('Initialized')
 
     def run_once(self, world: World, resources: Resources) -> None:
-        events = resources['world_movement_list']
-        for event in events:
-            resources['area_loader_list'].append(event.area)
-            world.enter_area(event.area)
-        resources['world_movement_list'].clear()
+        area_loads = resources.events(AreaLoadEvent)
+        for event in self._reader.read():
+            area_loads.send(AreaLoadEvent(event.area))
+            self._entering = event.area  # the latest movement wins
+
+        if self._entering is None:
+            return
+        area = world.find_area(self._entering)
+        if area is None or area.map is not None:
+            # enter_area reports unknown areas
+            world.enter_area(self._entering)
+            self._entering = None
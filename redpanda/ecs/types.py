@@ -1,5 +1,5 @@
 from enum import IntEnum
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import List
 
 
@@ -33,7 +33,6 @@ class Timer():
     random_timeout: bool = False
     timer_range_begin: float = 0
     timer_range_end: float = 0
-    queue_reset: bool = False
 
 
 @dataclass
@@ -41,7 +40,7 @@ class SoundEffect():
     name: str
     sound: str
     triggers: List[str]
-    timer: Timer = Timer()  # TODO consider placing this in global timers
+    timer: Timer = field(default_factory=Timer)  # TODO consider placing this in global timers
     volume: float = 0
     enabled: bool = False
     triggered: bool = False
@@ -55,11 +54,13 @@ class PyScrollMap():
                  map_data,
                  map_layer,
                  main_group,
-                 stationary_collision_list) -> None:
+                 stationary_collision_list,
+                 stationary_collision_grid=None) -> None:
         self._tmx_data = tmx_data
         self._map_data = map_data
         self._map_layer = map_layer
         self._stationary_collision_list = stationary_collision_list
+        self._stationary_collision_grid = stationary_collision_grid  # UniformGrid over the list
         self._main_group = main_group  # TODO should this be here or in the area?
 
     @property
@@ -78,6 +79,10 @@ class PyScrollMap():
     def stationary_collision_list(self):
         return self._stationary_collision_list
 
+    @property
+    def stationary_collision_grid(self):
+        return self._stationary_collision_grid
+
     @property
     def main_group(self):
         return self._main_group
@@ -86,3 +91,17 @@ class PyScrollMap():
 @dataclass
 class WorldMovementEvent():
     area: str
+
+
+@dataclass
+class AreaLoadEvent():
+    """Load the map of an area, prefetch loads it in the background without hurry"""
+    area: str
+    prefetch: bool = False
+
+
+@dataclass
+class EntityCollisionEvent():
+    """Feet rects of two entities overlap, values are entity handles"""
+    first: int
+    second: int
@@ -1,4 +1,4 @@
-from redpanda.spriteloader import load_sprite
+from redpanda.spriteloader import sprite_cache
 from redpanda.ecs.core import Component, Resources
 import redpanda.ecs.components as Components
 from typing import List
@@ -7,12 +7,14 @@ from pygame import Vector3
 
 def create_components_from_entity_template(name: str, resources: Resources) -> List[Component]:
     template = resources['entity_templates'].template(name)
-    spritesheet = resources['asset_registry'].spritesheet(template.spritesheet)
-    sprite = load_sprite(spritesheet, template.width, template.height)
+    asset_registry = resources['asset_registry']
+    spritesheet = asset_registry.spritesheet(template.spritesheet)
+    # Entities of the same template share one sprite, collection frames come from the atlas
+    sprite = sprite_cache.sprite(spritesheet, template.width, template.height, asset_registry.atlas())
     return [
         Components.DirectionComponent(),
         Components.LocationComponent('area1',
                                      Vector3(24, 24, 0)), # TODO Fix me
                                      #Vector3(1024.0, 1024.0, 0.0)),  # TODO fix me
-        Components.SpriteComponent(sprite),
+        Components.SpriteComponent(sprite, sprite_cache),
     ]
@@ -1,6 +1,8 @@
 from __future__ import annotations  # python 3.10
 import yaml
 import os
+from typing import Dict, Optional
+from redpanda.assetcache import CompiledAssetCache, cached
 from redpanda.template.entitytemplate import EntityTemplate
 import redpanda.logging
 
@@ -18,6 +20,10 @@ class EntityTemplateRegistry():
     def __repr__(self) -> str:
         return f'{repr(self._db)}'
 
+    @property
+    def templates(self) -> Dict[str, EntityTemplate]:
+        return self._db
+
     def template(self, name: str) -> EntityTemplate:
         if name in self._db:
             data = self._db[name]
@@ -50,23 +56,31 @@ class EntityTemplateParser():
         return self._template
 
 
+def _parse_templates(yaml_filename: str) -> Dict[str, EntityTemplate]:
+    templates: Dict[str, EntityTemplate] = {}
+    with open(yaml_filename) as yaml_file:
+        data = yaml.load(yaml_file, Loader=yaml.FullLoader)
+        if data.get('type') != 'entity-template':
+            raise ValueError(f'{data.get("type")} is not of type npc-template')
+        if 'entity-template' in data:
+            for name, yaml_npc_data in data['entity-template'].items():
+                template = EntityTemplateParser().parse(name, yaml_npc_data).template()
+                templates[template.name] = template
+    return templates
+
+
 class EntityTemplateRegistryParser():
-    def __init__(self, yaml_dir: str) -> None:
+    def __init__(self, yaml_dir: str, cache: Optional[CompiledAssetCache] = None) -> None:
         self._registry: EntityTemplateRegistry = EntityTemplateRegistry()
         self._yaml_dir: str = yaml_dir
+        self._cache: Optional[CompiledAssetCache] = cache
 
     def parse(self, filename: str) -> EntityTemplateRegistryParser:
         # load yaml file
         yaml_filename = os.path.join(self._yaml_dir, filename)
         try:
-            with open(yaml_filename) as yaml_file:
-                data = yaml.load(yaml_file, Loader=yaml.FullLoader)
-                if data.get('type') != 'entity-template':
-                    raise ValueError(f'{data.get("type")} is not of type npc-template')
-                if 'entity-template' in data:
-                    for name, yaml_npc_data in data['entity-template'].items():
-                        template = EntityTemplateParser().parse(name, yaml_npc_data).template()
-                        self._registry.add_template(template.name, template)
+            for name, template in cached(self._cache, yaml_filename, _parse_templates).items():
+                self._registry.add_template(name, template)
         except yaml.YAMLError:
             logger.error('Unable to load npc templates')
             raise
@@ -0,0 +1,179 @@
+"""Pack file of ready to blit sprite frames
+
+The packer loads sprites the usual way (decode, scale, flip) and writes the
+raw pixels of every frame into one file, together with an index. At
+runtime the file is memory mapped and every frame is a surface sharing the
+mapped pages, no image is decoded. The mapping is copy on write, processes
+mapping the same pack share its pages until a frame is drawn on.
+
+File layout: magic, format version, index length, JSON index, padding to a
+page boundary, then the pixels of each frame aligned to 16 bytes.
+
+Pack the entity templates of a game, run from the repository root:
+    python -m redpanda.pixelpack assets_dir assets.yaml templates.yaml sprites.pack
+"""
+from typing import Dict, Iterable, List, Optional, Tuple
+import json
+import mmap
+import struct
+import pygame
+from redpanda.sprite import Sprite, SpriteAnimation, SpriteAnimationSet
+from redpanda.spriteloader import load_sprite
+from redpanda.spritesheet import SpriteSheetMetaData
+import redpanda.logging
+
+
+logger = redpanda.logging.get_logger('sprite.pack')
+
+
+PACK_MAGIC = b'RPPK'
+PACK_FORMAT_VERSION = 1
+# BGRA matches the byte order of 32 bit displays on little endian hosts
+DEFAULT_PIXEL_FORMAT = 'BGRA'
+
+_HEADER = struct.Struct('<4sII')  # magic, version, index length
+_FRAME_ALIGNMENT = 16
+
+
+def pack_key(name: str, width: int, height: int) -> str:
+    return f'{name}:{width}x{height}'
+
+
+def _align(offset: int, alignment: int) -> int:
+    return (offset + alignment - 1) // alignment * alignment
+
+
+class PixelPackWriter():
+    """Collects sprites and writes them as a pack file, needs a display for
+    loading the sprites"""
+    def __init__(self, pixel_format: str = DEFAULT_PIXEL_FORMAT) -> None:
+        self._pixel_format: str = pixel_format
+        self._sprites: Dict[str, Sprite] = {}
+
+    def __len__(self) -> int:
+        return len(self._sprites)
+
+    def add_sprite(self, meta: SpriteSheetMetaData, width: int, height: int) -> None:
+        key = pack_key(meta.name, width, height)
+        if key not in self._sprites:
+            self._sprites[key] = load_sprite(meta, width, height)
+
+    def write(self, filename: str) -> None:
+        # Index: key -> list of (set name, list of directions of frames [offset, width, height])
+        index: Dict[str, List] = {}
+        chunks: List[Tuple[int, bytes]] = []
+        offset = 0
+        for key, sprite in self._sprites.items():
+            sets = []
+            for animation_set in sprite.animation_sets:
+                directions = []
+                for animation in animation_set.directions:
+                    frames = []
+                    for frame in animation.frames:
+                        pixels = pygame.image.tostring(frame, self._pixel_format)
+                        offset = _align(offset, _FRAME_ALIGNMENT)
+                        chunks.append((offset, pixels))
+                        frames.append([offset, frame.get_width(), frame.get_height()])
+                        offset += len(pixels)
+                    directions.append(frames)
+                sets.append([animation_set.name, directions])
+            index[key] = sets
+        header = json.dumps({'pixel_format': self._pixel_format, 'sprites': index},
+                            separators=(',', ':')).encode()
+        data_start = _align(_HEADER.size + len(header), mmap.PAGESIZE)
+        with open(filename, 'wb') as pack_file:
+            pack_file.write(_HEADER.pack(PACK_MAGIC, PACK_FORMAT_VERSION, len(header)))
+            pack_file.write(header)
+            for chunk_offset, pixels in chunks:
+                pack_file.seek(data_start + chunk_offset)
+                pack_file.write(pixels)
+            pack_file.truncate(data_start + offset)
+        logger.info(f'Packed {len(self._sprites)} sprites, {len(chunks)} frames into {filename}')
+
+
+class PixelPack():
+    """Memory mapped pack file, sprite() builds sprites whose frames share
+    the mapped pixels. Keep the pack alive as long as its sprites are used."""
+    def __init__(self, filename: str) -> None:
+        self._filename: str = filename
+        with open(filename, 'rb') as pack_file:
+            magic, version, index_length = _HEADER.unpack(pack_file.read(_HEADER.size))
+            if magic != PACK_MAGIC:
+                raise ValueError(f'{filename} is not a sprite pack')
+            if version != PACK_FORMAT_VERSION:
+                raise ValueError(f'{filename} is pack version {version}, expected {PACK_FORMAT_VERSION}')
+            header = json.loads(pack_file.read(index_length))
+            self._map = mmap.mmap(pack_file.fileno(), 0, access=mmap.ACCESS_COPY)
+        self._data_start: int = _align(_HEADER.size + index_length, mmap.PAGESIZE)
+        self._pixel_format: str = header['pixel_format']
+        self._index: Dict[str, List] = header['sprites']
+        self._view = memoryview(self._map)
+
+    def __str__(self) -> str:
+        return f'PixelPack: {self._filename} {len(self._index)} sprites'
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._index
+
+    def has_sprite(self, name: str, width: int, height: int) -> bool:
+        return pack_key(name, width, height) in self._index
+
+    def _frame(self, offset: int, width: int, height: int) -> pygame.Surface:
+        start = self._data_start + offset
+        pixels = self._view[start:start + width * height * 4]
+        return pygame.image.frombuffer(pixels, (width, height), self._pixel_format)
+
+    def sprite(self, name: str, width: int, height: int) -> Optional[Sprite]:
+        sets = self._index.get(pack_key(name, width, height))
+        if sets is None:
+            return None
+        animation_sets: List[SpriteAnimationSet] = []
+        for set_name, directions in sets:
+            animations = [SpriteAnimation([self._frame(*frame) for frame in frames]) for frames in directions]
+            animation_sets.append(SpriteAnimationSet(set_name, animations))
+        return Sprite(name, animation_sets)
+
+
+def pack_templates(yaml_dir: str,
+                   assets_filename: str,
+                   templates_filenames: Iterable[str],
+                   output_filename: str,
+                   pixel_format: str = DEFAULT_PIXEL_FORMAT) -> None:
+    """Pack the sprite of every entity template at its size"""
+    from redpanda.assetregistry import AssetRegistryParser
+    from redpanda.entitytemplateregistry import EntityTemplateRegistryParser
+
+    assets = AssetRegistryParser(yaml_dir).parse(assets_filename).build()
+    writer = PixelPackWriter(pixel_format)
+    for templates_filename in templates_filenames:
+        templates = EntityTemplateRegistryParser(yaml_dir).parse(templates_filename).build()
+        for template in templates.templates.values():
+            spritesheet = assets.spritesheet(template.spritesheet)
+            writer.add_sprite(spritesheet, template.width, template.height)
+    writer.write(output_filename)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    import argparse
+    import os
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+    parser = argparse.ArgumentParser(description='Pack the sprites of entity templates')
+    parser.add_argument('yaml_dir')
+    parser.add_argument('assets')
+    parser.add_argument('templates', nargs='+')
+    parser.add_argument('output')
+    parser.add_argument('--pixel-format', default=DEFAULT_PIXEL_FORMAT, choices=('BGRA', 'RGBA', 'ARGB'))
+    args = parser.parse_args(argv)
+
+    pygame.init()
+    pygame.display.set_mode((1, 1), depth=32)
+    pack_templates(args.yaml_dir, args.assets, args.templates, args.output, args.pixel_format)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,7 @@
-
+from __future__ import annotations
+from collections import OrderedDict
+from typing import Optional
+import os
 import pygame
 import redpanda.logging
 
@@ -6,15 +9,108 @@ import redpanda.logging
 logger = redpanda.logging.get_logger('sounds')
 
 
+DEFAULT_SOUND_CACHE_BUDGET = 32 * 1024 * 1024  # bytes of decoded samples
+
+
+class SoundCache():
+    """Decoded sounds, the least recently played are unloaded once the
+    decoded samples exceed the budget.
+
+    Pinned sounds and sounds that are playing are never unloaded.
+    """
+    def __init__(self, budget: int = DEFAULT_SOUND_CACHE_BUDGET) -> None:
+        self._budget: int = budget
+        self._sounds: OrderedDict[int, SoundData] = OrderedDict()
+        self._bytes: int = 0
+        self._evictions: int = 0
+
+    def __str__(self) -> str:
+        return f'SoundCache: {len(self._sounds)} sounds {self._bytes} / {self._budget} bytes evictions: {self._evictions}'
+
+    def __len__(self) -> int:
+        return len(self._sounds)
+
+    @property
+    def bytes(self) -> int:
+        """Bytes of decoded samples held"""
+        return self._bytes
+
+    @property
+    def budget(self) -> int:
+        return self._budget
+
+    @budget.setter
+    def budget(self, budget: int) -> None:
+        self._budget = budget
+        self._evict()
+
+    @property
+    def evictions(self) -> int:
+        return self._evictions
+
+    @staticmethod
+    def size_of(sound: pygame.mixer.Sound) -> int:
+        frequency, size, channels = pygame.mixer.get_init()
+        return int(sound.get_length() * frequency) * channels * (abs(size) // 8)
+
+    def touch(self, data: SoundData) -> None:
+        """Mark as most recently played"""
+        if id(data) in self._sounds:
+            self._sounds.move_to_end(id(data))
+
+    def loaded(self, data: SoundData) -> None:
+        self._sounds[id(data)] = data
+        self._bytes += data.bytes
+        self._evict()
+
+    def unloaded(self, data: SoundData) -> None:
+        if self._sounds.pop(id(data), None) is not None:
+            self._bytes -= data.bytes
+
+    def _evict(self) -> None:
+        if self._bytes <= self._budget:
+            return
+        # The most recent sound is kept even when it alone is over budget
+        for data in list(self._sounds.values())[:-1]:
+            if self._bytes <= self._budget:
+                break
+            if data.pinned or data.playing:
+                continue
+            data.unload()
+            self._evictions += 1
+
+    def clear(self) -> None:
+        for data in list(self._sounds.values()):
+            data.unload()
+
+
+# Shared by all sounds
+sound_cache = SoundCache()
+
+
 class SoundData:
-    def __init__(self, name: str, filename: str, load_now: bool = True) -> None:
+    """A sound effect, decoded on first use unless load_now is set.
+
+    The decoded sound counts against the budget of the sound cache and
+    can be unloaded when it has not been played for a while, pin sounds
+    that are played often.
+    """
+    def __init__(self,
+                 name: str,
+                 filename: str,
+                 load_now: bool = False,
+                 cache: Optional[SoundCache] = None) -> None:
         self._name: str = name
         self._filename: str = filename
-        try:
-            self._sound = pygame.mixer.Sound(self._filename)
-        except FileNotFoundError as e:
+        self._cache: SoundCache = cache if cache is not None else sound_cache
+        self._sound: Optional[pygame.mixer.Sound] = None
+        self._bytes: int = 0
+        self._pinned: bool = False
+        if not os.path.isfile(self._filename):
             logger.error(f'Sound filename not found: {self._filename}')
-            raise
+            raise FileNotFoundError(self._filename)
+        if load_now:
+            self.load()
 
     @property
     def name(self) -> str:
@@ -26,4 +122,57 @@ class SoundData:
 
     @property
     def sound(self) -> pygame.mixer.Sound:
+        """The decoded sound, decoding it when it is not loaded"""
+        if self._sound is None:
+            self.load()
+        else:
+            self._cache.touch(self)
         return self._sound
+
+    @property
+    def loaded(self) -> bool:
+        return self._sound is not None
+
+    @property
+    def bytes(self) -> int:
+        return self._bytes
+
+    @property
+    def pinned(self) -> bool:
+        return self._pinned
+
+    @property
+    def playing(self) -> bool:
+        return self._sound is not None and self._sound.get_num_channels() > 0
+
+    def pin(self) -> None:
+        """Keep loaded, loads it now"""
+        self._pinned = True
+        self.load()
+
+    def unpin(self) -> None:
+        self._pinned = False
+
+    def load(self) -> None:
+        if self._sound is not None:
+            return
+        try:
+            self._sound = pygame.mixer.Sound(self._filename)
+        except FileNotFoundError as e:
+            logger.error(f'Sound filename not found: {self._filename}')
+            raise
+        self._bytes = self._cache.size_of(self._sound)
+        self._cache.loaded(self)
+
+    def unload(self) -> None:
+        if self._sound is None:
+            return
+        self._cache.unloaded(self)
+        self._sound = None
+        self._bytes = 0
+
+    def play(self, volume: Optional[float] = None) -> Optional[pygame.mixer.Channel]:
+        sound = self.sound
+        if volume is not None:
+            sound.set_volume(volume)
+        return sound.play()
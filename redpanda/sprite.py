@@ -18,6 +18,14 @@ class SpriteAnimationSet():
         self._name: str = name
         self._direction: List[SpriteAnimation] = animations
 
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def directions(self) -> List[SpriteAnimation]:
+        return self._direction
+
     def direction(self, direction: Direction) -> SpriteAnimation:
         return self._direction[direction]
 
@@ -32,6 +40,10 @@ class Sprite():
     def name(self) -> str:
         return self._name
 
+    @property
+    def animation_sets(self) -> List[SpriteAnimationSet]:
+        return self._sets
+
     # TODO convert to getitem
     def animation_set(self, animation: Animation) -> SpriteAnimationSet:
         return self._sets[animation]
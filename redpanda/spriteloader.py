@@ -1,23 +1,156 @@
+from collections import OrderedDict
 from redpanda.ecs.types import Animation, Direction
-from typing import List, Optional
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+from redpanda.atlas import TextureAtlas
 from redpanda.sprite import Sprite, SpriteAnimation, SpriteAnimationSet
 from redpanda.spritesheet import SpriteSheetAnimation, SpriteSheetAnimationSet, SpriteSheetMetaData
 import pygame
 import redpanda.logging
+if TYPE_CHECKING:
+    from redpanda.pixelpack import PixelPack
 
 
 logger = redpanda.logging.get_logger('sprite.loader')
 
 
+DEFAULT_IMAGE_CACHE_BUDGET = 64 * 1024 * 1024  # bytes of decoded pixels
+
+
+class ImageCacheStats():
+    """Counters of an ImageCache"""
+    __slots__ = ['hits', 'misses', 'evictions']
+
+    def __init__(self) -> None:
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+
+    def __str__(self) -> str:
+        return f'hits: {self.hits} misses: {self.misses} evictions: {self.evictions} hit rate: {self.hit_rate:.1%}'
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def reset(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+
+class ImageCache():
+    """Decoded images keyed by filename, least recently used are evicted
+    once the decoded pixels exceed the budget.
+
+    The returned surfaces are shared, treat them as read only.
+    """
+    def __init__(self, budget: int = DEFAULT_IMAGE_CACHE_BUDGET) -> None:
+        self._budget: int = budget
+        self._images: OrderedDict[str, pygame.Surface] = OrderedDict()
+        self._bytes: int = 0
+        self._stats = ImageCacheStats()
+
+    def __str__(self) -> str:
+        return f'ImageCache: {len(self._images)} images {self._bytes} / {self._budget} bytes {self._stats}'
+
+    def __len__(self) -> int:
+        return len(self._images)
+
+    def __contains__(self, filename: str) -> bool:
+        return filename in self._images
+
+    @property
+    def stats(self) -> ImageCacheStats:
+        return self._stats
+
+    @property
+    def bytes(self) -> int:
+        """Bytes of decoded pixels held"""
+        return self._bytes
+
+    @property
+    def budget(self) -> int:
+        return self._budget
+
+    @budget.setter
+    def budget(self, budget: int) -> None:
+        self._budget = budget
+        self._evict()
+
+    @staticmethod
+    def size_of(image: pygame.Surface) -> int:
+        return image.get_pitch() * image.get_height()
+
+    def load(self, filename: str) -> pygame.Surface:
+        """Returns the decoded image, decoding it on a miss"""
+        image = self._images.get(filename)
+        if image is not None:
+            self._stats.hits += 1
+            self._images.move_to_end(filename)
+            return image
+        self._stats.misses += 1
+        image = pygame.image.load(filename).convert_alpha()
+        self._images[filename] = image
+        self._bytes += self.size_of(image)
+        self._evict()
+        return image
+
+    def add(self, filename: str, image: pygame.Surface) -> None:
+        """Insert an image decoded elsewhere, it should already be converted"""
+        previous = self._images.pop(filename, None)
+        if previous is not None:
+            self._bytes -= self.size_of(previous)
+        self._images[filename] = image
+        self._bytes += self.size_of(image)
+        self._evict()
+
+    def _evict(self) -> None:
+        # The most recent image is kept even when it alone is over budget
+        while self._bytes > self._budget and len(self._images) > 1:
+            _, image = self._images.popitem(last=False)
+            self._bytes -= self.size_of(image)
+            self._stats.evictions += 1
+
+    def clear(self) -> None:
+        self._images.clear()
+        self._bytes = 0
+
+
+# Shared by all sprite loads
+image_cache = ImageCache()
+
+
 class SimpleSpriteSheetConverter():
-    """Simple sprite sheet"""
-    def __init__(self, filename: str, width: int, height: int) -> None:
-        try:
-            self._sheet = pygame.image.load(filename).convert_alpha()
-        except pygame.error as message:
-            # TODO do better error handling
-            logger.error('Unable to load spritesheet image: {}'.format(filename))
-            raise SystemExit from message
+    """Simple sprite sheet
+
+    When the file was packed into the atlas its page is used as the sheet,
+    rectangles are then relative to the region of the file on the page.
+    Frames of an atlas page that need no scaling or flipping and lie within
+    the file are subsurfaces sharing the page's pixels, the atlas keeps its
+    pages for as long as it lives. Other frames are copies, a subsurface of
+    a sheet from the image cache would keep the whole sheet alive after the
+    cache evicts it, outside of its budget.
+    """
+    def __init__(self,
+                 filename: str,
+                 width: int,
+                 height: int,
+                 cache: Optional[ImageCache] = None,
+                 atlas: Optional[TextureAtlas] = None) -> None:
+        region = atlas.region(filename) if atlas is not None else None
+        # Only atlas pages are shared, see the class docstring
+        self._shared: bool = region is not None
+        if region is not None:
+            self._sheet, self._region = region
+        else:
+            try:
+                self._sheet = (cache if cache is not None else image_cache).load(filename)
+            except pygame.error as message:
+                # TODO do better error handling
+                logger.error('Unable to load spritesheet image: {}'.format(filename))
+                raise SystemExit from message
+            self._region = self._sheet.get_rect()
 
         self._width = width
         self._height = height
@@ -30,10 +163,16 @@ class SimpleSpriteSheetConverter():
         """Loads image from specific rectangle"""
         if not rectangle:
             # Use full image
-            rectangle = self._sheet.get_rect()
-        rect = pygame.Rect(rectangle)
+            rect = pygame.Rect(self._region)
+        else:
+            rect = pygame.Rect(rectangle).move(self._region.topleft)
+        if self._shared and rect.size == (self._width, self._height) and not flip_x and not flip_y \
+                and colorkey is None and self._region.contains(rect):
+            # No conversion needed, share the pixels of the page, treat the frame as read only
+            return self._sheet.subsurface(rect)
         image = pygame.Surface(rect.size, pygame.SRCALPHA).convert_alpha()
-        image.blit(self._sheet, (0, 0), rect)
+        # Clipped to the file, on an atlas page the neighbours are not copied
+        image.blit(self._sheet, (0, 0), rect.clip(self._region))
         if colorkey is not None:
             # use specified colorkey
             if colorkey == -1:
@@ -55,14 +194,17 @@ class SimpleSpriteSheetConverter():
         return self.images_at(tups, colorkey)
 
 
-def load_sprite(meta: SpriteSheetMetaData, width: int, height: int) -> Sprite:
+def load_sprite(meta: SpriteSheetMetaData,
+                width: int,
+                height: int,
+                cache: Optional[ImageCache] = None,
+                atlas: Optional[TextureAtlas] = None) -> Sprite:
     def load_sprite_animation(meta: SpriteSheetAnimation) -> SpriteAnimation:
         list_of_frames: List[pygame.Surface] = []
 
         for frame in meta.frames:
-            # TODO need to cache the converter for same filename or make
-            #      converter cache it
-            converter = SimpleSpriteSheetConverter(frame.filename, width, height)
+            # The decoded sheet comes from the image cache, the converter is cheap
+            converter = SimpleSpriteSheetConverter(frame.filename, width, height, cache, atlas)
             list_of_frames.append(converter.image_at(frame.rect,
                                                      frame.flip_x,
                                                      frame.flip_y))
@@ -83,3 +225,87 @@ def load_sprite(meta: SpriteSheetMetaData, width: int, height: int) -> Sprite:
             list_of_animation_sets.append(load_sprite_animation_set(meta.animation_set(entry.name)))
 
     return Sprite(meta.name, list_of_animation_sets)
+
+
+class SpriteCache():
+    """Sprites shared by every entity using the same spritesheet and size.
+
+    sprite() loads a sprite once per (spritesheet name, width, height).
+    SpriteComponent retains the sprite while it is attached to an entity,
+    once the last one is released the sprite is dropped from the cache.
+    Sprites that were loaded but never retained are dropped by trim().
+
+    Sprites found in the pixel pack are taken from it instead of loading
+    their images.
+    """
+    def __init__(self, image_cache: Optional[ImageCache] = None, pack: Optional['PixelPack'] = None) -> None:
+        self._image_cache: Optional[ImageCache] = image_cache
+        self._pack: Optional['PixelPack'] = pack
+        self._sprites: Dict[Tuple[str, int, int], Sprite] = {}
+        # id(sprite) -> (key, reference count)
+        self._references: Dict[int, List] = {}
+
+    def __str__(self) -> str:
+        return f'SpriteCache: {len(self._sprites)} sprites {sum(count for _, count in self._references.values())} references'
+
+    def __len__(self) -> int:
+        return len(self._sprites)
+
+    @property
+    def pack(self) -> Optional['PixelPack']:
+        return self._pack
+
+    @pack.setter
+    def pack(self, pack: Optional['PixelPack']) -> None:
+        self._pack = pack
+
+    def sprite(self,
+               meta: SpriteSheetMetaData,
+               width: int,
+               height: int,
+               atlas: Optional[TextureAtlas] = None) -> Sprite:
+        """Returns the shared sprite, loading it on first use"""
+        key = (meta.name, width, height)
+        sprite = self._sprites.get(key)
+        if sprite is None:
+            if self._pack is not None:
+                sprite = self._pack.sprite(meta.name, width, height)
+            if sprite is None:
+                sprite = load_sprite(meta, width, height, self._image_cache, atlas)
+            self._sprites[key] = sprite
+            self._references[id(sprite)] = [key, 0]
+        return sprite
+
+    def references(self, sprite: Sprite) -> int:
+        entry = self._references.get(id(sprite))
+        return entry[1] if entry is not None else 0
+
+    def retain(self, sprite: Sprite) -> None:
+        entry = self._references.get(id(sprite))
+        if entry is not None:
+            entry[1] += 1
+
+    def release(self, sprite: Sprite) -> None:
+        entry = self._references.get(id(sprite))
+        if entry is None:
+            return
+        entry[1] -= 1
+        if entry[1] <= 0:
+            logger.debug(f'Evicting sprite {entry[0]}')
+            del self._references[id(sprite)]
+            del self._sprites[entry[0]]
+
+    def trim(self) -> None:
+        """Drop sprites that no entity uses"""
+        for sprite_id, (key, count) in list(self._references.items()):
+            if count <= 0:
+                del self._references[sprite_id]
+                del self._sprites[key]
+
+    def clear(self) -> None:
+        self._sprites.clear()
+        self._references.clear()
+
+
+# Shared by all entity spawns
+sprite_cache = SpriteCache()
@@ -119,6 +119,15 @@ class SpriteSheetMetaData():
     def add_animation_set(self, name: str, animation_set: SpriteSheetAnimationSet) -> None:
         self._sets[name] = animation_set
 
+    def filenames(self) -> List[str]:
+        """Image files used by the frames, in order of first use"""
+        filenames: Dict[str, None] = {}
+        for animation_set in self._sets.values():
+            for animation in animation_set._direction:
+                for frame in animation.frames:
+                    filenames[frame.filename] = None
+        return list(filenames)
+
 """
 class PygameImage():
     def __init__(self, filename: str) -> None:
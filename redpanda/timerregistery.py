@@ -1,28 +1,146 @@
-from typing import Dict
-import uuid
+from typing import Dict, List, Tuple
+import heapq
+import itertools
+import random
 from redpanda.ecs.types import Timer
 
 
+class _TimerEntry():
+    __slots__ = ['start', 'timeout', 'deadline', 'expired', 'version', 'timer_range_begin', 'timer_range_end']
+
+    def __init__(self, start: float, timeout: float, timer_range_begin: float, timer_range_end: float) -> None:
+        self.start: float = start
+        self.timeout: float = timeout
+        self.deadline: float = start + timeout
+        self.expired: bool = False
+        self.version: int = 0  # bumped on reset, older heap entries are ignored
+        self.timer_range_begin: float = timer_range_begin
+        self.timer_range_end: float = timer_range_end
+
+    @property
+    def random_timeout(self) -> bool:
+        return bool(self.timer_range_begin or self.timer_range_end)
+
+
 class TimerRegistry:
+    """Timers against a game clock in milliseconds.
+
+    The clock only moves when advance is called (by the Timers system with
+    the game time elapsed). Pending deadlines are kept in a min-heap, so
+    advancing only touches the timers that expire. A timer stays expired
+    until it is reset, reset restarts it from the current clock with a new
+    random timeout when it was created with a range.
+
+    Handles are integers and are never reused.
+
+    The handles that expired are also collected until drain_fired is
+    called, a consumer running less often than advance misses none.
+
+    Removed and reset timers leave stale entries in the heap, the heap is
+    rebuilt from the live timers once they are more than half of it.
+    """
     def __init__(self) -> None:
-        self._timers: Dict[str, Timer] = {}
+        self._clock: float = 0
+        self._timers: Dict[int, _TimerEntry] = {}
+        # (deadline, handle, version)
+        self._heap: List[Tuple[float, int, int]] = []
+        self._stale: int = 0  # heap entries of removed or reset timers
+        self._handles = itertools.count(1)
+        # handles that expired since the last drain, ordered and without duplicates
+        self._fired: Dict[int, None] = {}
+
+    def __len__(self) -> int:
+        return len(self._timers)
+
+    def __contains__(self, handle: int) -> bool:
+        return handle in self._timers
+
+    @property
+    def clock(self) -> float:
+        return self._clock
 
     @property
-    def timers(self) -> Dict[str, Timer]:
-        return self._timers
+    def fired(self) -> List[int]:
+        """Handles of the timers that expired since the last drain_fired"""
+        return list(self._fired)
 
-    def timer(self, id: str) -> Timer:
-        return self._timers[id]
+    def drain_fired(self) -> List[int]:
+        """Returns and forgets the handles that expired since the last call"""
+        fired = list(self._fired)
+        self._fired.clear()
+        return fired
+
+    def timer(self, handle: int) -> Timer:
+        """Returns a read only snapshot of a timer, use reset to restart it"""
+        entry = self._timers[handle]
+        return Timer(self._clock - entry.start,
+                     entry.timeout,
+                     entry.expired,
+                     random_timeout=entry.random_timeout,
+                     timer_range_begin=entry.timer_range_begin,
+                     timer_range_end=entry.timer_range_end)
 
     def create(self,
                initial_value: float = 0,
                timeout: float = 0,
                timer_range_begin: float = 0,
-               timer_range_end: float = 0) -> str:
-        id = uuid.uuid4()
-        self._timers[id] = Timer(initial_value,
-                                 timeout,
-                                 random_timeout=True if (timer_range_begin or timer_range_end) else False,
-                                 timer_range_begin=timer_range_begin,
-                                 timer_range_end=timer_range_end)
-        return id
+               timer_range_end: float = 0) -> int:
+        handle = next(self._handles)
+        entry = _TimerEntry(self._clock - initial_value, timeout, timer_range_begin, timer_range_end)
+        self._timers[handle] = entry
+        heapq.heappush(self._heap, (entry.deadline, handle, entry.version))
+        return handle
+
+    def remove(self, handle: int) -> None:
+        entry = self._timers.pop(handle)
+        self._fired.pop(handle, None)
+        if not entry.expired:
+            self._stale_entry()
+
+    def elapsed(self, handle: int) -> float:
+        return self._clock - self._timers[handle].start
+
+    def is_expired(self, handle: int) -> bool:
+        return self._timers[handle].expired
+
+    def reset(self, handle: int) -> None:
+        """Restart a timer from the current clock"""
+        entry = self._timers[handle]
+        if entry.random_timeout:
+            entry.timeout = random.uniform(entry.timer_range_begin, entry.timer_range_end)
+        pending = not entry.expired
+        entry.start = self._clock
+        entry.deadline = self._clock + entry.timeout
+        entry.expired = False
+        entry.version += 1
+        heapq.heappush(self._heap, (entry.deadline, handle, entry.version))
+        if pending:
+            self._stale_entry()  # after the push, a rebuild keeps the new deadline
+
+    def _stale_entry(self) -> None:
+        """A timer's entry in the heap is no longer its current one"""
+        self._stale += 1
+        if self._stale * 2 > len(self._heap):
+            self._heap = [(entry.deadline, handle, entry.version)
+                          for handle, entry in self._timers.items() if not entry.expired]
+            heapq.heapify(self._heap)
+            self._stale = 0
+
+    def advance(self, elapsed: float) -> List[int]:
+        """Move the clock forward, returns the handles of timers that expired
+        during this advance"""
+        self._clock += elapsed
+        clock = self._clock
+        heap = self._heap
+        timers = self._timers
+        fired: List[int] = []
+        while heap and heap[0][0] <= clock:
+            _, handle, version = heapq.heappop(heap)
+            entry = timers.get(handle)
+            if entry is None or entry.version != version:
+                self._stale -= 1
+                continue  # removed or reset since it was pushed
+            entry.expired = True
+            fired.append(handle)
+            self._fired[handle] = None
+        return fired
@@ -0,0 +1,88 @@
+"""Generational entity handles
+
+Run from the repository root:
+    python -m unittest discover tests
+"""
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import unittest
+from redpanda.ecs.allocator import EntityAllocator, handle_generation, handle_index
+from redpanda.ecs.core import Component, World
+
+
+class EntityAllocatorTest(unittest.TestCase):
+    def test_freed_slots_are_reused_with_a_new_generation(self) -> None:
+        allocator = EntityAllocator()
+        first = allocator.alloc()
+        allocator.free(first)
+        second = allocator.alloc()
+        self.assertEqual(handle_index(first), handle_index(second))
+        self.assertEqual(handle_generation(second), handle_generation(first) + 1)
+        self.assertFalse(allocator.is_alive(first))
+        self.assertTrue(allocator.is_alive(second))
+        self.assertEqual(len(allocator), 1)
+        self.assertEqual(allocator.capacity, 1)
+
+    def test_freeing_a_stale_handle_raises(self) -> None:
+        allocator = EntityAllocator()
+        handle = allocator.alloc()
+        allocator.free(handle)
+        with self.assertRaises(ValueError):
+            allocator.free(handle)
+        self.assertEqual(len(allocator), 0)
+        # the slot was only put back once
+        allocator.alloc()
+        allocator.alloc()
+        self.assertEqual(allocator.capacity, 2)
+
+
+class EntityReleaseTest(unittest.TestCase):
+    def test_despawned_handle_is_stale(self) -> None:
+        world = World()
+        entity = world.spawn([Component('c')])
+        handle = entity.id
+        world.despawn(entity)
+        self.assertFalse(world.contains(entity))
+        self.assertIsNone(world.entity(handle))
+        replacement = world.spawn([Component('c')])
+        self.assertNotEqual(replacement.id, handle)
+        self.assertIs(world.entity(replacement.id), replacement)
+
+    def test_despawning_twice_raises_without_corrupting_handles(self) -> None:
+        world = World()
+        entity = world.spawn([Component('c')])
+        world.despawn(entity)
+        with self.assertRaises(ValueError):
+            world.despawn(entity)
+        first = world.spawn([Component('c')])
+        second = world.spawn([Component('c')])
+        self.assertNotEqual(first.id, second.id)
+        self.assertTrue(world.contains(first) and world.contains(second))
+
+    def test_releasing_a_reserved_entity_gives_its_handle_back(self) -> None:
+        world = World()
+        reserved = world.reserve()
+        world.despawn(reserved)
+        with self.assertRaises(ValueError):
+            world.despawn(reserved)
+        with self.assertRaises(ValueError):
+            world.spawn_reserved(reserved, [Component('c')])
+        first = world.spawn([Component('c')])
+        second = world.spawn([Component('c')])
+        self.assertEqual(handle_index(first.id), handle_index(reserved.id))
+        self.assertNotEqual(first.id, reserved.id)
+        self.assertNotEqual(first.id, second.id)
+
+    def test_reserved_entity_exists_once_spawned(self) -> None:
+        world = World()
+        reserved = world.reserve()
+        self.assertFalse(world.contains(reserved))
+        world.spawn_reserved(reserved, [Component('c')])
+        self.assertTrue(world.contains(reserved))
+        self.assertIn('c', reserved.components)
+
+
+if __name__ == '__main__':
+    unittest.main()
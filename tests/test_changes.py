@@ -0,0 +1,133 @@
+"""Change ticks and the Changed and Added query filters
+
+Run from the repository root:
+    python -m unittest discover tests
+"""
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import unittest
+from typing import Callable, List, Optional
+from redpanda.ecs.core import (Added, Changed, Component, ContainsComponentsQuery, Entity, Resources,
+                               Stage, System, World)
+from redpanda.ecs.components import DirectionComponent
+from redpanda.ecs.types import Direction
+
+
+class Writer(System):
+    """Calls write(world) on each run"""
+    def __init__(self, name: str, write: Optional[Callable[[World], None]] = None) -> None:
+        super().__init__(name)
+        self.write = write
+
+    def run_once(self, world: World, resources: Resources) -> None:
+        if self.write is not None:
+            self.write(world)
+
+
+class Reader(Writer):
+    """Records the entities matching query on each run, then calls write"""
+    def __init__(self, name: str, query: ContainsComponentsQuery,
+                 write: Optional[Callable[[World], None]] = None) -> None:
+        super().__init__(name, write)
+        self.query = query
+        self.seen: List[List[Entity]] = []
+
+    def run_once(self, world: World, resources: Resources) -> None:
+        self.seen.append(world.query(self.query))
+        super().run_once(world, resources)
+
+
+def changed_direction() -> ContainsComponentsQuery:
+    return ContainsComponentsQuery('direction', filter=Changed('direction'))
+
+
+class ChangeTickTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.world = World()
+        self.resources = Resources()
+        self.entities = [self.world.spawn([DirectionComponent()]) for _ in range(3)]
+
+    def run_stage(self, systems: List[System], frames: int) -> None:
+        stage = Stage('update')
+        for system in systems:
+            stage.add_system(system)
+        stage.initialize(self.world, self.resources)
+        for _ in range(frames):
+            stage.run(self.world, self.resources)
+
+    def turn(self, entity: Entity, direction: Direction = Direction.up) -> Callable[[World], None]:
+        def write(world: World) -> None:
+            entity.components['direction'].value = direction
+        return write
+
+    def test_outside_a_system_everything_is_changed(self) -> None:
+        self.assertEqual(len(self.world.query(changed_direction())), 3)
+
+    def test_new_components_are_changed_on_the_first_run_only(self) -> None:
+        reader = Reader('reader', changed_direction())
+        self.run_stage([reader], 2)
+        self.assertEqual([len(seen) for seen in reader.seen], [3, 0])
+
+    def test_changes_of_earlier_systems_are_seen_once(self) -> None:
+        entity = self.entities[1]
+        turns = iter([Direction.up, Direction.left])
+
+        def write(world: World) -> None:
+            direction = next(turns, None)
+            if direction is not None:
+                entity.components['direction'].value = direction
+        reader = Reader('reader', changed_direction())
+        self.run_stage([Writer('writer', write), reader], 4)
+        self.assertEqual([len(seen) for seen in reader.seen], [3, 1, 0, 0])
+        self.assertEqual(reader.seen[1], [entity])
+
+    def test_changes_of_later_systems_are_seen_next_frame(self) -> None:
+        entity = self.entities[0]
+        reader = Reader('reader', changed_direction())
+        writer = Writer('writer', self.turn(entity))
+        self.run_stage([reader, writer], 3)
+        self.assertEqual([len(seen) for seen in reader.seen], [3, 1, 0])
+
+    def test_own_changes_are_not_reported_back(self) -> None:
+        reader = Reader('reader', changed_direction(), self.turn(self.entities[0]))
+        self.run_stage([reader], 3)
+        self.assertEqual([len(seen) for seen in reader.seen], [3, 0, 0])
+
+    def test_setting_the_same_value_is_not_a_change(self) -> None:
+        reader = Reader('reader', changed_direction())
+        writer = Writer('writer', self.turn(self.entities[0], Direction.down))
+        self.run_stage([writer, reader], 2)
+        self.assertEqual([len(seen) for seen in reader.seen], [3, 0])
+
+    def test_added_ignores_changes(self) -> None:
+        reader = Reader('reader', ContainsComponentsQuery('direction', filter=Added('direction')))
+        writer = Writer('writer', self.turn(self.entities[0]))
+        self.run_stage([writer, reader], 2)
+        self.assertEqual([len(seen) for seen in reader.seen], [3, 0])
+
+    def test_replaced_and_inserted_components_are_added(self) -> None:
+        replaced, inserted, _ = self.entities
+
+        def write(world: World) -> None:
+            if not write.done:
+                replaced.components['direction'] = DirectionComponent()
+                world.insert(inserted, [Component('tag')])
+                write.done = True
+        write.done = False
+        added_direction = Reader('direction', ContainsComponentsQuery('direction', filter=Added('direction')))
+        added_tag = Reader('tag', ContainsComponentsQuery('tag', filter=Added('tag')))
+        self.run_stage([Writer('writer', write), added_direction, added_tag], 3)
+        self.assertEqual([len(seen) for seen in added_direction.seen], [3, 0, 0])
+        self.assertEqual(added_tag.seen[0], [inserted])
+        self.assertEqual(added_tag.seen[1:], [[], []])
+
+    def test_filter_components_are_required(self) -> None:
+        self.world.spawn([Component('other')])
+        query = ContainsComponentsQuery(filter=Changed('direction'))
+        self.assertEqual(len(self.world.query(query)), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+"""Command buffers applied at the end of a stage
+
+Run from the repository root:
+    python -m unittest discover tests
+"""
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import unittest
+from typing import List
+from redpanda.ecs.core import (Added, CommandBuffer, Component, ContainsComponentsQuery, Entity,
+                               ParallelExecutor, Resources, Stage, System, World)
+
+
+class Spawner(System):
+    """Spawns count entities with a 'c' component through its command buffer, once"""
+    def __init__(self, count: int) -> None:
+        super().__init__('Spawner')
+        self.count = count
+        self.spawned: List[Entity] = []
+
+    def run_once(self, world: World, resources: Resources) -> None:
+        if not self.spawned:
+            commands = self.commands(world)
+            self.spawned = [commands.spawn([Component('c')]) for _ in range(self.count)]
+
+
+class AddedObserver(System):
+    """Counts the entities seen through Added('c')"""
+    def __init__(self) -> None:
+        super().__init__('AddedObserver')
+        self.query = ContainsComponentsQuery('c', filter=Added('c'))
+        self.seen: List[int] = []
+
+    def run_once(self, world: World, resources: Resources) -> None:
+        self.seen.append(len(world.query(self.query)))
+
+
+class SpawningObserver(AddedObserver, Spawner):
+    """Spawns and watches in the same system, the last of its stage"""
+    def __init__(self, count: int) -> None:
+        AddedObserver.__init__(self)
+        self.count = count
+        self.spawned = []
+
+    def run_once(self, world: World, resources: Resources) -> None:
+        AddedObserver.run_once(self, world, resources)
+        Spawner.run_once(self, world, resources)
+
+
+class CommandBufferTest(unittest.TestCase):
+    def run_stage(self, systems: List[System], frames: int, executor=None) -> World:
+        world = World()
+        resources = Resources()
+        stage = Stage('update', executor)
+        for system in systems:
+            stage.add_system(system)
+        stage.initialize(world, resources)
+        for _ in range(frames):
+            stage.run(world, resources)
+        return world
+
+    def test_spawned_entities_exist_after_the_stage(self) -> None:
+        spawner = Spawner(3)
+        world = self.run_stage([spawner], 1)
+        self.assertTrue(all(world.contains(entity) for entity in spawner.spawned))
+
+    def test_later_system_sees_spawned_entities_as_added(self) -> None:
+        observer = AddedObserver()
+        self.run_stage([Spawner(3), observer], 3)
+        self.assertEqual(observer.seen, [0, 3, 0])
+
+    def test_spawning_system_sees_its_own_spawns_as_added(self) -> None:
+        system = SpawningObserver(3)
+        self.run_stage([system], 3)
+        self.assertEqual(system.seen, [0, 3, 0])
+
+    def test_parallel_executor_sees_spawned_entities_as_added(self) -> None:
+        observer = AddedObserver()
+        self.run_stage([Spawner(3), observer], 3, ParallelExecutor(max_workers=2))
+        self.assertEqual(observer.seen, [0, 3, 0])
+
+
+class CommandOrderTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.world = World()
+        self.commands = CommandBuffer(self.world)
+
+    def test_commands_wait_for_apply(self) -> None:
+        entity = self.world.spawn([Component('a')])
+        spawned = self.commands.spawn([Component('a')])
+        self.commands.insert(entity, [Component('b')])
+        self.assertEqual(len(self.commands), 2)
+        self.assertFalse(self.world.contains(spawned))
+        self.assertNotIn('b', entity.components)
+        self.commands.apply()
+        self.assertEqual(len(self.commands), 0)
+        self.assertTrue(self.world.contains(spawned))
+        self.assertIn('b', entity.components)
+
+    def test_commands_apply_in_order(self) -> None:
+        entity = self.commands.spawn([Component('a')])
+        self.commands.insert(entity, [Component('b')])
+        self.commands.remove(entity, 'a')
+        self.commands.apply()
+        self.assertEqual(set(entity.components), {'b'})
+
+    def test_commands_on_despawned_entities_are_skipped(self) -> None:
+        entity = self.world.spawn([Component('a')])
+        self.commands.despawn(entity)
+        self.commands.insert(entity, [Component('b')])
+        self.commands.remove(entity, 'a')
+        self.commands.despawn(entity)
+        with self.assertLogs('ecs', level='WARNING'):
+            self.commands.apply()
+        self.assertFalse(self.world.contains(entity))
+
+    def test_removing_a_missing_component_is_ignored(self) -> None:
+        entity = self.world.spawn([Component('a')])
+        self.commands.remove(entity, 'b')
+        self.commands.apply()
+        self.assertEqual(set(entity.components), {'a'})
+
+
+if __name__ == '__main__':
+    unittest.main()
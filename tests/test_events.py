@@ -0,0 +1,99 @@
+"""Double buffered event channels and their readers
+
+Run from the repository root:
+    python -m unittest discover tests
+"""
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import unittest
+from redpanda.ecs.core import Resources
+from redpanda.ecs.events import Events
+
+
+class Ping():
+    def __init__(self, number: int) -> None:
+        self.number = number
+
+
+def numbers(events) -> list:
+    return [event.number for event in events]
+
+
+class EventsTest(unittest.TestCase):
+    def test_events_are_readable_for_two_frames(self) -> None:
+        events = Events(Ping)
+        events.send(Ping(1))
+        events.update()
+        events.send(Ping(2))
+        self.assertEqual(numbers(events), [1, 2])
+        events.update()
+        self.assertEqual(numbers(events), [2])
+        events.update()
+        self.assertEqual(len(events), 0)
+
+    def test_each_reader_sees_each_event_once(self) -> None:
+        events = Events(Ping)
+        first = events.reader()
+        second = events.reader()
+        events.send_batch([Ping(1), Ping(2)])
+        self.assertEqual(numbers(first.read()), [1, 2])
+        events.send(Ping(3))
+        self.assertEqual(numbers(first.read()), [3])
+        self.assertEqual(numbers(first.read()), [])
+        self.assertEqual(numbers(second.read()), [1, 2, 3])
+
+    def test_new_reader_starts_at_the_oldest_readable_event(self) -> None:
+        events = Events(Ping)
+        events.send(Ping(1))
+        events.update()
+        events.send(Ping(2))
+        events.update()
+        self.assertEqual(numbers(events.reader().read()), [2])
+
+    def test_slow_reader_counts_missed_events(self) -> None:
+        events = Events(Ping)
+        reader = events.reader()
+        events.send_batch([Ping(1), Ping(2)])
+        events.update()
+        events.update()
+        events.send(Ping(3))
+        self.assertEqual(len(reader), 1)
+        self.assertEqual(numbers(reader.read()), [3])
+        self.assertEqual(reader.missed, 2)
+
+    def test_buffer_grows_past_its_capacity(self) -> None:
+        events = Events(Ping, capacity=4)
+        reader = events.reader()
+        events.send_batch(Ping(number) for number in range(3))
+        events.update()
+        events.send_batch(Ping(number) for number in range(3, 10))
+        self.assertGreaterEqual(events.capacity, 10)
+        self.assertEqual(numbers(reader.read()), list(range(10)))
+        self.assertEqual(reader.missed, 0)
+
+    def test_clear_skips_unread_events(self) -> None:
+        events = Events(Ping)
+        reader = events.reader()
+        events.send(Ping(1))
+        events.clear()
+        events.send(Ping(2))
+        self.assertEqual(numbers(reader.read()), [2])
+
+    def test_reader_clear_skips_to_the_end(self) -> None:
+        events = Events(Ping)
+        reader = events.reader()
+        events.send(Ping(1))
+        reader.clear()
+        self.assertTrue(reader.is_empty())
+
+    def test_resources_share_one_channel_per_type(self) -> None:
+        resources = Resources()
+        channel = resources.events(Ping)
+        self.assertIs(resources.events(Ping), channel)
+        self.assertEqual(channel.event_type, Ping)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,188 @@
+"""Parity of VectorizedEntityMovement with the reference EntityMovement
+
+Run from the repository root:
+    python -m unittest discover tests
+"""
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import random
+import unittest
+from typing import List
+import pygame
+from pygame.math import Vector3
+from pygame.rect import Rect
+from redpanda.ecs.core import Area, Changed, ContainsComponentsQuery, Entity, Resources, Stage, System, World
+from redpanda.ecs.components import (AnimationComponent, DirectionComponent, LocationComponent,
+                                     MovementComponent, SpeedComponent, SpriteComponent,
+                                     VelocityComponent)
+from redpanda.ecs.pygame_plugin import ResourceTypes
+from redpanda.ecs.spatial import UniformGrid
+from redpanda.ecs.systems.movement import EntityMovement, VectorizedEntityMovement, np
+from redpanda.ecs.types import Direction, PyScrollMap
+from redpanda.sprite import Sprite, SpriteAnimation, SpriteAnimationSet
+
+
+AREA = 'test'
+FRAME_TIME = 250  # milliseconds, with the speeds below steps are whole pixels
+FRAMES = 40
+# odd sizes exercise the truncation of the feet rect
+SPRITE_SIZES = [(16, 24), (15, 23), (33, 17), (7, 9)]
+
+
+def make_sprite(width: int, height: int) -> Sprite:
+    frames = [pygame.Surface((width, height)) for _ in range(4)]
+    animation_sets = [SpriteAnimationSet(str(action), [SpriteAnimation(frames) for _ in Direction])
+                      for action in range(4)]
+    return Sprite(f'{width}x{height}', animation_sets)
+
+
+def make_walls() -> List[Rect]:
+    # a box around the play field and a few pillars in the way
+    walls = [Rect(0, 0, 512, 8), Rect(0, 504, 512, 8), Rect(0, 0, 8, 512), Rect(504, 0, 8, 512)]
+    walls.extend(Rect(96 + 64 * index, 96 + 48 * index, 24, 24) for index in range(6))
+    return walls
+
+
+def make_world(use_grid: bool) -> World:
+    """Same seed, same world: movers, blocked movers, zero speed and zero movement"""
+    world = World()
+    area = Area(AREA, 'test.tmx')
+    walls = make_walls()
+    area.map = PyScrollMap(None, None, None, pygame.sprite.Group(), walls,
+                           UniformGrid(walls) if use_grid else None)
+    world.add_area(area)
+    world.enter_area(AREA)
+
+    rng = random.Random(5)
+    sprites = [make_sprite(*size) for size in SPRITE_SIZES]
+    for index in range(200):
+        kind = index % 4
+        movement = MovementComponent()
+        if kind != 2:  # zero movement
+            movement.value = Vector3(rng.choice((-1, 0, 1)), rng.choice((-1, 1)), 0)
+        # zero speed, whole pixel steps and fractional steps
+        speed = (Vector3(0, 0, 0), Vector3(16, 16, 0), Vector3(32, 32, 0), Vector3(10.5, 3.25, 0))[kind]
+        world.spawn([LocationComponent(AREA, Vector3(rng.randrange(16, 480), rng.randrange(16, 460), 0)),
+                     DirectionComponent(Direction(index % 4)),
+                     VelocityComponent(),
+                     SpeedComponent(speed),
+                     movement,
+                     SpriteComponent(sprites[index % len(sprites)]),
+                     AnimationComponent()])
+    return world
+
+
+def positions(world: World) -> List[Vector3]:
+    return [Vector3(entity.components['location'].position)
+            for entity in sorted(world.query_columns('location')[0][0], key=lambda entity: entity.id)]
+
+
+@unittest.skipIf(np is None, 'numpy is not installed')
+class MovementParityTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        pygame.init()
+
+    def run_frames(self, system, use_grid: bool) -> World:
+        world = make_world(use_grid)
+        resources = Resources()
+        resources[ResourceTypes.GAME_TIME_ELAPSED] = FRAME_TIME
+        system.initialize(world, resources)
+        for _ in range(FRAMES):
+            system.run_once(world, resources)
+        return world
+
+    def assert_parity(self, use_grid: bool) -> None:
+        expected = positions(self.run_frames(EntityMovement(), use_grid))
+        actual = positions(self.run_frames(VectorizedEntityMovement(), use_grid))
+        self.assertEqual(len(expected), len(actual))
+        start = positions(make_world(use_grid))
+        blocked = 0
+        for index, (first, second) in enumerate(zip(expected, actual)):
+            self.assertTrue(np.allclose(tuple(first), tuple(second), rtol=1e-6, atol=1e-3),
+                            f'entity {index}: {first} != {second}')
+            if first == start[index] and index % 4 in (1, 3):
+                blocked += 1
+        # the walls are actually hit
+        self.assertGreater(blocked, 0)
+
+    def test_parity_with_collision_list(self) -> None:
+        self.assert_parity(use_grid=False)
+
+    def test_parity_with_collision_grid(self) -> None:
+        self.assert_parity(use_grid=True)
+
+    def test_zero_speed_and_zero_movement_do_not_move(self) -> None:
+        world = self.run_frames(VectorizedEntityMovement(), use_grid=False)
+        start = positions(make_world(use_grid=False))
+        for index, position in enumerate(positions(world)):
+            if index % 4 in (0, 2):
+                self.assertEqual(position, start[index])
+
+    def test_feet_rects_match_entity_feet(self) -> None:
+        rng = random.Random(7)
+        sprites = [make_sprite(*size) for size in SPRITE_SIZES]
+        entities = []
+        for index in range(64):
+            position = Vector3(rng.uniform(-50, 500), rng.uniform(-50, 500), 0)
+            entities.append(Entity([LocationComponent(AREA, position),
+                                    DirectionComponent(),
+                                    SpriteComponent(sprites[index % len(sprites)]),
+                                    AnimationComponent()]))
+        packed = np.array([tuple(entity.components['location'].position) for entity in entities], dtype=np.float32)
+        size = np.array([entity.image.get_size() for entity in entities], dtype=np.int32)
+        feet = VectorizedEntityMovement.feet_rects(packed, size)
+        for entity, rect in zip(entities, feet.tolist()):
+            self.assertEqual(tuple(entity.feet), tuple(rect))
+
+
+class VelocityObserver(System):
+    """Counts the entities seen through Changed('velocity')"""
+    def __init__(self) -> None:
+        super().__init__('VelocityObserver')
+        self.query = ContainsComponentsQuery('velocity', filter=Changed('velocity'))
+        self.seen: List[int] = []
+
+    def run_once(self, world: World, resources: Resources) -> None:
+        self.seen.append(len(world.query(self.query)))
+
+
+class VelocityTest(unittest.TestCase):
+    def assert_velocity_follows_speed(self, system) -> None:
+        world = make_world(use_grid=False)
+        resources = Resources()
+        resources[ResourceTypes.GAME_TIME_ELAPSED] = FRAME_TIME
+        observer = VelocityObserver()
+        stage = Stage('update')
+        stage.add_system(system)
+        stage.add_system(observer)
+        stage.initialize(world, resources)
+        for _ in range(3):
+            stage.run(world, resources)
+        entities, (velocities, speeds) = world.query_columns('velocity', 'speed')[0]
+        for velocity, speed in zip(velocities, speeds):
+            self.assertIsInstance(velocity, VelocityComponent)
+            self.assertIsNot(velocity, speed)
+            self.assertIsNot(velocity.value, speed.value)
+            self.assertEqual(velocity.value, speed.value)
+        # new components count as changed on the first frame, the speeds are
+        # not changing after that
+        self.assertEqual(observer.seen, [len(entities), 0, 0])
+
+        speeds[0].value = Vector3(7, 7, 0)
+        stage.run(world, resources)
+        self.assertEqual(observer.seen[-1], 1)
+        self.assertEqual(velocities[0].value, Vector3(7, 7, 0))
+
+    def test_entity_movement_sets_velocity(self) -> None:
+        self.assert_velocity_follows_speed(EntityMovement())
+
+    @unittest.skipIf(np is None, 'numpy is not installed')
+    def test_vectorized_movement_sets_velocity(self) -> None:
+        self.assert_velocity_follows_speed(VectorizedEntityMovement())
+
+
+if __name__ == '__main__':
+    unittest.main()
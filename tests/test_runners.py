@@ -0,0 +1,71 @@
+"""Runners and the frames they record
+
+Run from the repository root:
+    python -m unittest discover tests
+"""
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import time
+import unittest
+from redpanda.ecs.core import App, ECS, Resources, System, World
+from redpanda.ecs.profiler import Profiler
+from redpanda.ecs.pygame_plugin import ResourceTypes
+from redpanda.ecs.runners import BenchmarkRunner, FixedTimestepRunner
+
+
+class Counter(System):
+    """Counts its runs, quits the app after quit_after runs"""
+    def __init__(self, name: str, delay: float = 0, quit_after: int = 0) -> None:
+        super().__init__(name)
+        self.runs = 0
+        self.delay = delay
+        self.quit_after = quit_after
+
+    def run_once(self, world: World, resources: Resources) -> None:
+        self.runs += 1
+        if self.delay:
+            time.sleep(self.delay)
+        if self.quit_after and self.runs >= self.quit_after:
+            resources[ResourceTypes.SYS_QUIT] = True
+
+
+class RunnerProfilingTest(unittest.TestCase):
+    def frame_events(self, profiler: Profiler) -> int:
+        return sum(1 for event in profiler.chrome_trace()['traceEvents'] if event['name'] == 'frame')
+
+    def test_fixed_timestep_records_a_frame_per_render(self) -> None:
+        # 1ms steps and 5ms renders: the first pass takes no step, later ones several
+        simulation = Counter('simulation')
+        render = Counter('render', delay=0.005, quit_after=5)
+        profiler = Profiler()
+        (App.build()
+            .add_resource(ECS.RESOURCE_PROFILER, profiler)
+            .add_system_to_stage(ECS.STAGE_UPDATE, simulation)
+            .add_system_to_stage(ECS.STAGE_LAST, render)
+            .set_runner(FixedTimestepRunner(steps_per_second=1000))
+            .run())
+        self.assertEqual(render.runs, 5)
+        self.assertGreater(simulation.runs, render.runs)
+        self.assertEqual(profiler.frames.count, 5)
+        self.assertEqual(self.frame_events(profiler), 5)
+        self.assertEqual(profiler.stages[ECS.STAGE_LAST].count, 5)
+        self.assertEqual(profiler.stages[ECS.STAGE_UPDATE].count, simulation.runs)
+
+    def test_schedule_records_a_frame_per_update(self) -> None:
+        counter = Counter('counter')
+        profiler = Profiler()
+        runner = BenchmarkRunner(frames=7, warmup=3)
+        (App.build()
+            .add_resource(ECS.RESOURCE_PROFILER, profiler)
+            .add_system(counter)
+            .set_runner(runner)
+            .run())
+        self.assertEqual(counter.runs, 10)
+        self.assertEqual(profiler.frames.count, 10)
+        self.assertEqual(runner.report.frames, 7)
+
+
+if __name__ == '__main__':
+    unittest.main()
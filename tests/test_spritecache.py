@@ -0,0 +1,98 @@
+"""Reference counting of sprites shared through SpriteCache
+
+Run from the repository root:
+    python -m unittest discover tests
+"""
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import unittest
+from types import SimpleNamespace
+from typing import Optional
+import pygame
+from pygame.math import Vector3
+from redpanda.ecs.core import World
+from redpanda.ecs.components import AnimationComponent, DirectionComponent, LocationComponent, SpriteComponent
+from redpanda.ecs.types import Direction
+from redpanda.sprite import Sprite, SpriteAnimation, SpriteAnimationSet
+from redpanda.spriteloader import SpriteCache
+
+
+class SpritePack():
+    """Stands in for a PixelPack, builds a blank sprite per name and size"""
+    def __init__(self) -> None:
+        self.loads = 0
+
+    def sprite(self, name: str, width: int, height: int) -> Optional[Sprite]:
+        self.loads += 1
+        frames = [pygame.Surface((width, height))]
+        return Sprite(name, [SpriteAnimationSet('walking', [SpriteAnimation(frames) for _ in Direction])])
+
+
+def meta(name: str) -> SimpleNamespace:
+    return SimpleNamespace(name=name)
+
+
+class SpriteCacheTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.pack = SpritePack()
+        self.cache = SpriteCache(pack=self.pack)
+        self.world = World()
+
+    def spawn(self, sprite: Sprite):
+        return self.world.spawn([LocationComponent('area', Vector3(0, 0, 0)),
+                                 DirectionComponent(),
+                                 AnimationComponent(),
+                                 SpriteComponent(sprite, self.cache)])
+
+    def test_sprite_is_loaded_once(self) -> None:
+        sprite = self.cache.sprite(meta('hero'), 16, 24)
+        self.assertIs(self.cache.sprite(meta('hero'), 16, 24), sprite)
+        self.assertIsNot(self.cache.sprite(meta('hero'), 32, 48), sprite)
+        self.assertEqual(self.pack.loads, 2)
+
+    def test_spawn_retains_and_despawn_releases(self) -> None:
+        sprite = self.cache.sprite(meta('hero'), 16, 24)
+        first = self.spawn(sprite)
+        second = self.spawn(sprite)
+        self.assertEqual(self.cache.references(sprite), 2)
+        self.world.despawn(first)
+        self.assertEqual(self.cache.references(sprite), 1)
+        self.assertEqual(len(self.cache), 1)
+        self.world.despawn(second)
+        self.assertEqual(self.cache.references(sprite), 0)
+        self.assertEqual(len(self.cache), 0)
+
+    def test_replace_with_the_same_sprite_keeps_it(self) -> None:
+        sprite = self.cache.sprite(meta('hero'), 16, 24)
+        entity = self.spawn(sprite)
+        entity.components['sprite'] = SpriteComponent(sprite, self.cache)
+        self.assertEqual(self.cache.references(sprite), 1)
+        self.assertIs(self.cache.sprite(meta('hero'), 16, 24), sprite)
+        self.world.insert(entity, [SpriteComponent(sprite, self.cache)])
+        self.assertEqual(self.cache.references(sprite), 1)
+        self.world.despawn(entity)
+        self.assertEqual(len(self.cache), 0)
+        self.assertEqual(self.pack.loads, 1)
+
+    def test_replace_with_another_sprite_releases_the_old_one(self) -> None:
+        hero = self.cache.sprite(meta('hero'), 16, 24)
+        slime = self.cache.sprite(meta('slime'), 16, 16)
+        entity = self.spawn(hero)
+        entity.components['sprite'] = SpriteComponent(slime, self.cache)
+        self.assertEqual(self.cache.references(hero), 0)
+        self.assertEqual(self.cache.references(slime), 1)
+        self.assertEqual(len(self.cache), 1)
+
+    def test_trim_drops_unused_sprites(self) -> None:
+        used = self.cache.sprite(meta('hero'), 16, 24)
+        self.cache.sprite(meta('slime'), 16, 16)
+        self.spawn(used)
+        self.cache.trim()
+        self.assertEqual(len(self.cache), 1)
+        self.assertEqual(self.cache.references(used), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,143 @@
+"""The image cache and frames cut from sprite sheets and atlas pages
+
+Run from the repository root:
+    python -m unittest discover tests
+"""
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import tempfile
+import unittest
+import pygame
+from redpanda.atlas import TextureAtlas, build_collection_atlas
+from redpanda.ecs.types import Direction
+from redpanda.spriteloader import ImageCache, SimpleSpriteSheetConverter
+from redpanda.spritesheet import SpriteSheetAnimationSet, SpriteSheetFrame, SpriteSheetMetaData
+
+
+def save_image(directory: str, name: str, size) -> str:
+    filename = os.path.join(directory, name)
+    image = pygame.Surface(size, pygame.SRCALPHA)
+    image.fill((255, 0, 0, 255))
+    pygame.image.save(image, filename)
+    return filename
+
+
+class ImageCacheTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        pygame.init()
+        pygame.display.set_mode((1, 1))
+
+    def setUp(self) -> None:
+        self._directory = tempfile.TemporaryDirectory()
+        self.filenames = [save_image(self._directory.name, f'image{index}.png', (16, 16)) for index in range(3)]
+        self.size = ImageCache.size_of(pygame.Surface((16, 16), pygame.SRCALPHA).convert_alpha())
+
+    def tearDown(self) -> None:
+        self._directory.cleanup()
+
+    def test_images_are_decoded_once(self) -> None:
+        cache = ImageCache()
+        image = cache.load(self.filenames[0])
+        self.assertIs(cache.load(self.filenames[0]), image)
+        self.assertEqual((cache.stats.hits, cache.stats.misses), (1, 1))
+        self.assertEqual(cache.bytes, self.size)
+
+    def test_least_recently_used_are_evicted_over_budget(self) -> None:
+        cache = ImageCache(budget=2 * self.size)
+        first, second, third = self.filenames
+        cache.load(first)
+        cache.load(second)
+        cache.load(first)
+        cache.load(third)
+        self.assertIn(first, cache)
+        self.assertNotIn(second, cache)
+        self.assertIn(third, cache)
+        self.assertEqual(cache.stats.evictions, 1)
+        self.assertEqual(cache.bytes, 2 * self.size)
+
+    def test_most_recent_image_is_kept_over_budget(self) -> None:
+        cache = ImageCache(budget=1)
+        cache.load(self.filenames[0])
+        cache.load(self.filenames[1])
+        self.assertEqual(len(cache), 1)
+        self.assertIn(self.filenames[1], cache)
+
+    def test_lowering_the_budget_evicts(self) -> None:
+        cache = ImageCache()
+        for filename in self.filenames:
+            cache.load(filename)
+        cache.budget = self.size
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.bytes, self.size)
+
+    def test_add_replaces_and_counts_bytes(self) -> None:
+        cache = ImageCache()
+        cache.add('decoded', pygame.Surface((16, 16), pygame.SRCALPHA).convert_alpha())
+        cache.add('decoded', pygame.Surface((16, 16), pygame.SRCALPHA).convert_alpha())
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.bytes, self.size)
+        cache.clear()
+        self.assertEqual((len(cache), cache.bytes), (0, 0))
+
+
+class SpriteLoaderTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        pygame.init()
+        pygame.display.set_mode((1, 1))
+
+    def setUp(self) -> None:
+        self._directory = tempfile.TemporaryDirectory()
+        self.directory = self._directory.name
+        self.sheet = save_image(self.directory, 'sheet.png', (64, 24))
+
+    def tearDown(self) -> None:
+        self._directory.cleanup()
+
+    def test_frames_of_cached_sheets_are_copies(self) -> None:
+        cache = ImageCache()
+        converter = SimpleSpriteSheetConverter(self.sheet, 16, 24, cache)
+        frame = converter.image_at(pygame.Rect(16, 0, 16, 24))
+        self.assertIsNone(frame.get_parent())
+        self.assertEqual(frame.get_size(), (16, 24))
+        cache.clear()
+        self.assertEqual(frame.get_at((0, 0)), pygame.Color(255, 0, 0, 255))
+
+    def test_frames_of_atlas_pages_share_the_page(self) -> None:
+        cache = ImageCache()
+        atlas = TextureAtlas.build({self.sheet: cache.load(self.sheet)})
+        page, region = atlas.region(self.sheet)
+        converter = SimpleSpriteSheetConverter(self.sheet, 16, 24, cache, atlas)
+        frame = converter.image_at(pygame.Rect(16, 0, 16, 24))
+        self.assertIs(frame.get_parent(), page)
+        self.assertEqual(frame.get_abs_offset(), (region.x + 16, region.y))
+
+    def test_atlas_frames_past_the_file_are_copies(self) -> None:
+        cache = ImageCache()
+        atlas = TextureAtlas.build({self.sheet: cache.load(self.sheet)})
+        converter = SimpleSpriteSheetConverter(self.sheet, 16, 24, cache, atlas)
+        frame = converter.image_at(pygame.Rect(56, 0, 16, 24))
+        self.assertIsNone(frame.get_parent())
+        self.assertEqual(frame.get_size(), (16, 24))
+
+    def test_collection_atlas_uses_the_image_cache(self) -> None:
+        filenames = [save_image(self.directory, f'frame{index}.png', (16, 24)) for index in range(3)]
+        meta = SpriteSheetMetaData('collection')
+        animation_set = SpriteSheetAnimationSet('walking')
+        for filename in filenames:
+            animation_set.direction(Direction.down).add_frame(SpriteSheetFrame(filename, None, False, False))
+        meta.add_animation_set('walking', animation_set)
+        cache = ImageCache()
+        for filename in filenames:
+            cache.load(filename)  # decoded earlier, e.g. by AssetRegistryParser
+        atlas = build_collection_atlas([meta], cache=cache)
+        self.assertEqual(cache.stats.misses, 3)
+        self.assertEqual(cache.stats.hits, 3)
+        self.assertTrue(all(filename in atlas for filename in filenames))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,142 @@
+"""TimerRegistry deadlines, fired handles and heap upkeep
+
+Run from the repository root:
+    python -m unittest discover tests
+"""
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import random
+import unittest
+from redpanda.ecs.core import Resources, Stage, System, World
+from redpanda.ecs.components import DirectionComponent, MovementComponent, RandomDirectionTimerComponent
+from redpanda.ecs.pygame_plugin import ResourceTypes
+from redpanda.ecs.systems.input import RandomInput
+from redpanda.timerregistery import TimerRegistry
+
+
+class TimerRegistryTest(unittest.TestCase):
+    def test_timers_expire_at_their_deadline(self) -> None:
+        timers = TimerRegistry()
+        short = timers.create(timeout=100)
+        long = timers.create(timeout=300)
+        self.assertEqual(timers.advance(99), [])
+        self.assertEqual(timers.advance(1), [short])
+        self.assertTrue(timers.is_expired(short))
+        self.assertFalse(timers.is_expired(long))
+        self.assertEqual(timers.advance(500), [long])
+        # expired timers stay expired and do not fire again
+        self.assertEqual(timers.advance(500), [])
+
+    def test_initial_value_counts_as_elapsed(self) -> None:
+        timers = TimerRegistry()
+        handle = timers.create(initial_value=80, timeout=100)
+        self.assertEqual(timers.elapsed(handle), 80)
+        self.assertEqual(timers.advance(20), [handle])
+
+    def test_reset_restarts_from_the_current_clock(self) -> None:
+        timers = TimerRegistry()
+        handle = timers.create(timeout=100)
+        timers.advance(150)
+        timers.reset(handle)
+        self.assertFalse(timers.is_expired(handle))
+        self.assertEqual(timers.elapsed(handle), 0)
+        self.assertEqual(timers.advance(99), [])
+        self.assertEqual(timers.advance(1), [handle])
+
+    def test_reset_before_expiry_moves_the_deadline(self) -> None:
+        timers = TimerRegistry()
+        handle = timers.create(timeout=100)
+        timers.advance(60)
+        timers.reset(handle)
+        self.assertEqual(timers.advance(60), [])
+        self.assertEqual(timers.advance(40), [handle])
+
+    def test_random_timeout_stays_in_range(self) -> None:
+        random.seed(3)
+        timers = TimerRegistry()
+        handle = timers.create(timer_range_begin=50, timer_range_end=60)
+        for _ in range(20):
+            timers.reset(handle)
+            self.assertTrue(50 <= timers.timer(handle).timeout <= 60)
+
+    def test_fired_accumulates_until_drained(self) -> None:
+        timers = TimerRegistry()
+        first = timers.create(timeout=10)
+        second = timers.create(timeout=20)
+        timers.advance(10)
+        timers.advance(10)
+        self.assertEqual(timers.fired, [first, second])
+        self.assertEqual(timers.drain_fired(), [first, second])
+        self.assertEqual(timers.fired, [])
+        self.assertEqual(timers.drain_fired(), [])
+
+    def test_fired_lists_a_handle_once_and_forgets_removed_ones(self) -> None:
+        timers = TimerRegistry()
+        handle = timers.create(timeout=10)
+        removed = timers.create(timeout=10)
+        timers.advance(10)
+        timers.reset(handle)
+        timers.advance(10)
+        timers.remove(removed)
+        self.assertEqual(timers.drain_fired(), [handle])
+
+    def test_removed_timers_do_not_fire(self) -> None:
+        timers = TimerRegistry()
+        handle = timers.create(timeout=10)
+        timers.remove(handle)
+        self.assertNotIn(handle, timers)
+        self.assertEqual(timers.advance(100), [])
+
+    def test_heap_stays_bounded_under_churn(self) -> None:
+        timers = TimerRegistry()
+        kept = [timers.create(timeout=1_000_000) for _ in range(10)]
+        for _ in range(10_000):
+            timers.remove(timers.create(timeout=1_000_000))
+        for _ in range(10_000):
+            timers.reset(kept[0])
+        self.assertLessEqual(len(timers._heap), 2 * len(timers) + 1)
+        self.assertEqual(sorted(timers.advance(1_000_000)), sorted(kept))
+        self.assertEqual(timers._heap, [])
+
+
+class NpcSpawner(System):
+    """Spawns one NPC with a random direction timer through commands"""
+    def __init__(self) -> None:
+        super().__init__('NpcSpawner')
+        self.npc = None
+
+    def run_once(self, world: World, resources: Resources) -> None:
+        if self.npc is None:
+            handle = resources[ResourceTypes.SYS_TIMERS].create(timeout=100)
+            self.npc = self.commands(world).spawn([RandomDirectionTimerComponent(handle),
+                                                   DirectionComponent(),
+                                                   MovementComponent()])
+
+
+class RandomInputTest(unittest.TestCase):
+    def test_npc_spawned_through_commands_changes_direction(self) -> None:
+        world = World()
+        resources = Resources()
+        timers = resources[ResourceTypes.SYS_TIMERS] = TimerRegistry()
+        spawner = NpcSpawner()
+        stage = Stage('update')
+        stage.add_system(spawner)
+        stage.add_system(RandomInput())
+        stage.initialize(world, resources)
+        stage.run(world, resources)
+        stage.run(world, resources)
+        movement = spawner.npc.components['movement']
+        handle = spawner.npc.components['random_direction_timer'].id
+        self.assertEqual(movement.value.length(), 0)
+        # expires over two advances between runs
+        timers.advance(60)
+        timers.advance(60)
+        stage.run(world, resources)
+        self.assertEqual(movement.value.length(), 1)
+        self.assertFalse(timers.is_expired(handle))
+
+
+if __name__ == '__main__':
+    unittest.main()